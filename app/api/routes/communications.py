@@ -1,25 +1,234 @@
-from datetime import date
+from collections.abc import AsyncIterator
+from datetime import UTC, date, datetime, time
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_read_db
+from app.core.middleware import negotiate_encoding
 from app.schemas.communications import (
     CommunicationFullResponse,
     CommunicationLatestResponse,
     CommunicationResponse,
+    CommunicationsFullPageResponse,
+    CommunicationsPageResponse,
+    ExportRequest,
+    LatestBulkRequest,
+    LatestChangesResponse,
+)
+from app.services import fleet_snapshot
+from app.services.columnar import (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    arrow_ipc_stream,
+    arrow_ipc_stream_table,
+    columnar_json,
+    columnar_json_table,
+)
+from app.services.export import EXPORT_FORMATS, EXPORT_SCHEMA, export_communications
+from app.services.history_cache import (
+    get_closed_day_history,
+    is_cacheable_day,
+    table_rows,
+)
+from app.services.repository import (
+    closed_history_cutoff,
+    get_communications,
+    get_communications_page,
+    get_latest_changes,
+    get_latest_communications,
+    received_range,
+    stream_communications,
+    stream_latest_communications,
+)
+from app.services.serialization import (
+    dump_changes,
+    dump_page,
+    dump_row,
+    dump_rows,
+    dump_rows_stream,
+)
+from app.services.track_simplification import simplify_track
+from app.utils.http_cache import (
+    http_date,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
 )
-from app.services.repository import get_communications, get_latest_communications
 
 router = APIRouter(prefix="/api/v1", tags=["Communications"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Formatos alternativos del histórico negociados vía header Accept
+HISTORY_MEDIA_TYPES = (
+    ARROW_STREAM_MEDIA_TYPE,
+    COLUMNAR_JSON_MEDIA_TYPE,
+    NDJSON_MEDIA_TYPE,
+)
+
+# Formatos que se escriben conforme se leen las filas del cursor
+STREAMING_MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+# Tamaño de página cuando solo se envía `cursor`
+DEFAULT_PAGE_LIMIT = 100
+
+
+def _history_format(request: Request) -> str | None:
+    """Devuelve el formato alternativo solicitado vía header Accept, si hay."""
+    accept = request.headers.get("accept", "")
+    return next((m for m in HISTORY_MEDIA_TYPES if m in accept), None)
+
+
+async def _ndjson_lines(
+    communications: AsyncIterator, schema: type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """Serializa cada comunicación como una línea JSON conforme llega del cursor."""
+    async for communication in communications:
+        yield dump_row(communication, schema) + b"\n"
+
+
+def _history_filters(
+    received_at: date | None, from_dt: datetime | None, to_dt: datetime | None
+) -> dict:
+    """Valida y agrupa los filtros de fecha del histórico."""
+    start, end = received_range(None, from_dt, to_dt)
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior a 'to'")
+
+    return {"received_at": received_at, "from_dt": from_dt, "to_dt": to_dt}
+
+
+def _closed_history_headers(request: Request, filters: dict) -> dict | None:
+    """
+    Headers de caché de un histórico que termina antes de hoy (UTC).
+
+    Un rango cerrado (ver `closed_history_cutoff`) ya no cambia: su ETag
+    depende solo de la petición (ruta, query y formato solicitado) y se puede
+    responder 304 sin consultar la base de datos. Un rango que terminó antes
+    de hoy pero dentro del periodo de gracia aún puede recibir comunicaciones
+    atrasadas: solo se cachea HTTP_CACHE_CLOSING_MAX_AGE segundos, sin
+    validadores. Devuelve None si el rango incluye el día en curso.
+    """
+    _, end = received_range(**filters)
+    today = datetime.combine(datetime.now(UTC).date(), time.min)
+    if end is None or end > today:
+        return None
+
+    if end > closed_history_cutoff():
+        return {
+            "Cache-Control": f"public, max-age={settings.HTTP_CACHE_CLOSING_MAX_AGE}",
+            "Vary": "Accept",
+        }
+
+    return {
+        "ETag": make_etag(
+            settings.APP_VERSION,
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            _history_format(request),
+        ),
+        "Last-Modified": http_date(end),
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_CLOSED_MAX_AGE}, "
+        "immutable",
+        "Vary": "Accept",
+    }
+
+
+def _with_headers(response: Response, headers: dict | None) -> Response:
+    if headers:
+        response.headers.update(headers)
+    return response
+
+
+def _latest_headers(communications: list, *variant) -> dict:
+    """
+    Headers de validación del estado actual: el ETag se deriva del
+    received_epoch de cada dispositivo, así que cambia en cuanto llega una
+    comunicación nueva.
+    """
+    headers = {
+        "ETag": make_etag(
+            settings.APP_VERSION,
+            *variant,
+            *sorted(
+                (c.device_id, c.received_epoch or c.received_at) for c in communications
+            ),
+        ),
+        "Cache-Control": "no-cache",
+    }
+    received = [c.received_at for c in communications if c.received_at is not None]
+    if received:
+        headers["Last-Modified"] = http_date(max(received))
+    return headers
+
+
+def _json_response(content: bytes) -> Response:
+    """Respuesta JSON ya serializada; FastAPI no vuelve a validar el contenido."""
+    return Response(content, media_type="application/json")
+
+
+async def _get_page(  # noqa: PLR0913
+    db,
+    device_ids: list[str],
+    *,
+    limit: int | None,
+    cursor: str | None,
+    schema: type[BaseModel],
+    filters: dict,
+) -> Response:
+    try:
+        results, next_cursor = await get_communications_page(
+            db,
+            device_ids,
+            limit=limit or DEFAULT_PAGE_LIMIT,
+            cursor=cursor,
+            schema=schema,
+            **filters,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    return _json_response(dump_page(results, next_cursor, schema))
+
+
+async def _iterate(rows: list) -> AsyncIterator:
+    for row in rows:
+        yield row
+
+
+def _streaming_response(
+    media_type: str, communications: AsyncIterator, schema: type[BaseModel]
+) -> StreamingResponse:
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        content = arrow_ipc_stream(
+            communications, schema, settings.HISTORY_STREAM_BATCH_SIZE
+        )
+    else:
+        content = _ndjson_lines(communications, schema)
+
+    return StreamingResponse(content, media_type=media_type)
+
+
+def _columnar_response(communications: list, schema: type[BaseModel]) -> Response:
+    return Response(
+        columnar_json(communications, schema), media_type=COLUMNAR_JSON_MEDIA_TYPE
+    )
+
 
 # ============================================================================
 # Endpoints de Comunicaciones - Histórico
 # ============================================================================
 
 
-@router.get("/communications", response_model=list[CommunicationResponse])
-async def get_communications_history(  # noqa: B008
+@router.get(
+    "/communications",
+    response_model=list[CommunicationResponse] | CommunicationsPageResponse,
+)
+async def get_communications_history(  # noqa: B008, PLR0913, PLR0917
+    request: Request,
     device_ids: list[str] = Query(
         ...,
         description="Lista de IDs de dispositivos GPS a consultar",
@@ -27,7 +236,31 @@ async def get_communications_history(  # noqa: B008
         max_length=100,
         examples=[["867564050638581", "DEVICE123"]],
     ),
-    db=Depends(get_db),
+    from_dt: datetime | None = Query(
+        None,
+        alias="from",
+        description="Fecha/hora inicial de received_at (ISO 8601, incluida). "
+        "Ejemplo: 2024-12-14T06:00:00Z",
+    ),
+    to_dt: datetime | None = Query(
+        None,
+        alias="to",
+        description="Fecha/hora final de received_at (ISO 8601, excluida). "
+        "Ejemplo: 2024-12-14T18:00:00Z",
+    ),
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Cantidad de registros por página (máximo 1000). "
+        "Si se proporciona, la respuesta es paginada con next_cursor.",
+    ),
+    cursor: str | None = Query(
+        None,
+        description="Cursor opaco para continuar desde una página anterior. "
+        "Obtenido de next_cursor en la respuesta anterior.",
+    ),
+    db=Depends(get_read_db),
 ):
     """
     Obtiene el histórico de comunicaciones de múltiples dispositivos GPS.
@@ -36,23 +269,80 @@ async def get_communications_history(  # noqa: B008
 
     **Query Parameters:**
     - `device_ids`: Lista de IDs de dispositivos (requerido, mínimo 1, máximo 100)
+    - `from`: Inicio del rango de received_at en ISO 8601, incluido (opcional)
+    - `to`: Fin del rango de received_at en ISO 8601, excluido (opcional)
+    - `limit`: Cantidad de registros por página (opcional, 1-1000)
+    - `cursor`: Cursor opaco para paginación (opcional)
+
+    **Headers opcionales:**
+    - `Accept: application/x-ndjson`: Modo streaming. Cada comunicación se envía
+      como una línea JSON conforme se lee del cursor de la base de datos.
+    - `Accept: application/vnd.apache.arrow.stream`: Arrow IPC stream columnar,
+      escrito por lotes conforme se lee del cursor (para analítica masiva).
+    - `Accept: application/vnd.siscom.columnar+json`: JSON columnar
+      `{"count", "columns": {campo: [valores]}}`.
+    Ambos formatos columnares entregan los campos decimales como float64.
+    Los formatos alternativos no aplican en modo paginado.
 
-    **Ejemplo:**
+    **Ejemplos:**
     ```
     GET /api/v1/communications?device_ids=867564050638581&device_ids=DEVICE123
+    GET /api/v1/communications?device_ids=867564050638581&limit=500
+    GET /api/v1/communications?device_ids=867564050638581&from=2024-12-14T06:00:00Z&to=2024-12-14T18:00:00Z
     ```
 
     **Returns:**
-    - Lista de comunicaciones de los dispositivos especificados
+    - Sin `limit` ni `cursor`: Lista de comunicaciones de los dispositivos especificados
+    - Con `limit` o `cursor`: `CommunicationsPageResponse` con la página y next_cursor
     """
-    return await get_communications(db, device_ids)
+    filters = _history_filters(None, from_dt, to_dt)
+    cache_headers = _closed_history_headers(request, filters)
+    if cache_headers and is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+
+    if limit is not None or cursor is not None:
+        page = await _get_page(
+            db,
+            device_ids,
+            limit=limit,
+            cursor=cursor,
+            schema=CommunicationResponse,
+            filters=filters,
+        )
+        return _with_headers(page, cache_headers)
+
+    media_type = _history_format(request)
+    if media_type in STREAMING_MEDIA_TYPES:
+        response = _streaming_response(
+            media_type,
+            stream_communications(
+                db, device_ids, schema=CommunicationResponse, **filters
+            ),
+            CommunicationResponse,
+        )
+        return _with_headers(response, cache_headers)
+
+    results = await get_communications(
+        db, device_ids, schema=CommunicationResponse, **filters
+    )
+
+    if media_type == COLUMNAR_JSON_MEDIA_TYPE:
+        response = _columnar_response(results, CommunicationResponse)
+    else:
+        response = _json_response(dump_rows(results, CommunicationResponse))
+
+    return _with_headers(response, cache_headers)
 
 
 @router.get(
     "/devices/{device_id}/communications",
-    response_model=list[CommunicationFullResponse] | list[CommunicationResponse],
+    response_model=list[CommunicationFullResponse]
+    | list[CommunicationResponse]
+    | CommunicationsFullPageResponse
+    | CommunicationsPageResponse,
 )
-async def get_device_communications(
+async def get_device_communications(  # noqa: PLR0913, PLR0917
+    request: Request,
     device_id: str,
     received_at: date | None = Query(
         None,
@@ -60,7 +350,42 @@ async def get_device_communications(
         "Si se proporciona, devuelve TODOS los campos disponibles.",
         examples=["2024-12-14"],
     ),
-    db=Depends(get_db),
+    from_dt: datetime | None = Query(
+        None,
+        alias="from",
+        description="Fecha/hora inicial de received_at (ISO 8601, incluida).",
+    ),
+    to_dt: datetime | None = Query(
+        None,
+        alias="to",
+        description="Fecha/hora final de received_at (ISO 8601, excluida).",
+    ),
+    limit: int | None = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Cantidad de registros por página (máximo 1000). "
+        "Si se proporciona, la respuesta es paginada con next_cursor.",
+    ),
+    cursor: str | None = Query(
+        None,
+        description="Cursor opaco para continuar desde una página anterior.",
+    ),
+    simplify_tolerance_m: float | None = Query(
+        None,
+        gt=0,
+        le=10000,
+        description="Simplifica la trayectoria con Douglas–Peucker usando esta "
+        "tolerancia en metros. Conserva la forma de la ruta con menos puntos.",
+    ),
+    bucket_seconds: int | None = Query(
+        None,
+        ge=1,
+        le=86400,
+        description="Devuelve como máximo un punto (el más reciente) por cada "
+        "ventana de tiempo de este tamaño en segundos.",
+    ),
+    db=Depends(get_read_db),
 ):
     """
     Obtiene el histórico de comunicaciones de UN solo dispositivo GPS.
@@ -73,25 +398,174 @@ async def get_device_communications(
     **Query Parameters:**
     - `received_at`: Fecha opcional para filtrar (YYYY-MM-DD).
       Si se proporciona, devuelve todos los registros de esa fecha con **todos los campos**.
+    - `from`: Inicio del rango de received_at en ISO 8601, incluido (opcional)
+    - `to`: Fin del rango de received_at en ISO 8601, excluido (opcional)
+    - `limit`: Cantidad de registros por página (opcional, 1-1000)
+    - `cursor`: Cursor opaco para paginación (opcional)
+    - `simplify_tolerance_m`: Tolerancia en metros para simplificar la trayectoria
+      con Douglas–Peucker (opcional, no combinable con `limit`/`cursor`)
+    - `bucket_seconds`: Un punto por ventana de tiempo en segundos
+      (opcional, no combinable con `limit`/`cursor`)
+
+    **Headers opcionales:**
+    - `Accept: application/x-ndjson`: Modo streaming (una comunicación por línea).
+    - `Accept: application/vnd.apache.arrow.stream`: Arrow IPC stream columnar.
+    - `Accept: application/vnd.siscom.columnar+json`: JSON columnar.
 
     **Ejemplos:**
     ```
     GET /api/v1/devices/867564050638581/communications
     GET /api/v1/devices/867564050638581/communications?received_at=2024-12-14
+    GET /api/v1/devices/867564050638581/communications?received_at=2024-12-14&limit=500
+    GET /api/v1/devices/867564050638581/communications?from=2024-12-14T06:00:00Z&to=2024-12-14T09:00:00Z
+    GET /api/v1/devices/867564050638581/communications?received_at=2024-12-14&simplify_tolerance_m=10
     ```
 
     **Returns:**
     - Sin filtro de fecha: Lista con campos básicos (CommunicationResponse)
     - Con filtro de fecha: Lista con TODOS los campos (CommunicationFullResponse)
+    - Con `limit` o `cursor`: la misma lista envuelta en `{data, next_cursor}`
+    - Con `simplify_tolerance_m` o `bucket_seconds`: solo los puntos conservados
+      (se omiten los registros sin coordenadas)
     """
-    results = await get_communications(db, [device_id], received_at=received_at)
+    filters = _history_filters(received_at, from_dt, to_dt)
+    simplify = simplify_tolerance_m is not None or bucket_seconds is not None
 
     # Si hay filtro de fecha, devolver respuesta completa
-    if received_at is not None:
-        return [CommunicationFullResponse.model_validate(r) for r in results]
+    schema = (
+        CommunicationFullResponse if received_at is not None else CommunicationResponse
+    )
+
+    if simplify and (limit is not None or cursor is not None):
+        raise HTTPException(
+            status_code=400,
+            detail="La simplificación no se puede combinar con limit/cursor",
+        )
 
-    # Sin filtro, devolver respuesta básica (comportamiento original)
-    return [CommunicationResponse.model_validate(r) for r in results]
+    cache_headers = _closed_history_headers(request, filters)
+    if cache_headers and is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+
+    if limit is not None or cursor is not None:
+        page = await _get_page(
+            db,
+            [device_id],
+            limit=limit,
+            cursor=cursor,
+            schema=schema,
+            filters=filters,
+        )
+        return _with_headers(page, cache_headers)
+
+    # Un día cerrado completo se sirve desde la caché en disco
+    closed_day = (
+        received_at is not None
+        and from_dt is None
+        and to_dt is None
+        and is_cacheable_day(received_at)
+    )
+
+    media_type = _history_format(request)
+    if media_type in STREAMING_MEDIA_TYPES and not simplify and not closed_day:
+        response = _streaming_response(
+            media_type,
+            stream_communications(db, [device_id], schema=schema, **filters),
+            schema,
+        )
+        return _with_headers(response, cache_headers)
+
+    if closed_day:
+        table = await get_closed_day_history(db, device_id, received_at, schema)
+        # Los formatos columnares salen directo de la tabla mapeada en memoria
+        if media_type == ARROW_STREAM_MEDIA_TYPE and not simplify:
+            response = StreamingResponse(
+                arrow_ipc_stream_table(
+                    table, schema, settings.HISTORY_STREAM_BATCH_SIZE
+                ),
+                media_type=media_type,
+            )
+            return _with_headers(response, cache_headers)
+        if media_type == COLUMNAR_JSON_MEDIA_TYPE and not simplify:
+            response = Response(
+                columnar_json_table(table, schema), media_type=media_type
+            )
+            return _with_headers(response, cache_headers)
+        results = table_rows(table)
+    else:
+        results = await get_communications(db, [device_id], schema=schema, **filters)
+
+    if simplify:
+        results = simplify_track(
+            results, tolerance_m=simplify_tolerance_m, bucket_seconds=bucket_seconds
+        )
+
+    if media_type in STREAMING_MEDIA_TYPES:
+        response = _streaming_response(media_type, _iterate(results), schema)
+    elif media_type == COLUMNAR_JSON_MEDIA_TYPE:
+        response = _columnar_response(results, schema)
+    else:
+        response = _json_response(dump_rows(results, schema))
+
+    return _with_headers(response, cache_headers)
+
+
+@router.post(
+    "/communications/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Archivo CSV o Parquet con el histórico",
+            "content": {media_type: {} for media_type, _, _ in EXPORT_FORMATS.values()},
+        }
+    },
+)
+async def export_communications_history(  # noqa: B008
+    body: ExportRequest,
+    db=Depends(get_read_db),
+):
+    """
+    Exporta el histórico de comunicaciones de una flota a CSV o Parquet.
+
+    **Método REST:** POST con body JSON
+
+    **Body:**
+    - `device_ids`: Lista de IDs de dispositivos (requerido, máximo 1000)
+    - `from`: Inicio del rango de received_at en ISO 8601, incluido (requerido)
+    - `to`: Fin del rango de received_at en ISO 8601, excluido (requerido)
+    - `format`: `csv` (default) o `parquet`
+
+    Los IDs van en el body y no en la URL: 1000 `device_ids` repetidos como
+    query parameters exceden el límite de la línea de petición (16 KB).
+
+    **Ejemplo:**
+    ```
+    POST /api/v1/communications/export
+    {"device_ids": ["867564050638581", "DEVICE123"], "from": "2024-12-14T00:00:00Z", "to": "2024-12-15T00:00:00Z", "format": "parquet"}
+    ```
+
+    El archivo se genera mientras se lee el cursor de la base de datos y se
+    escribe por bloques (row groups en Parquet), con **todos los campos**.
+    Los campos decimales se exportan como float64.
+
+    **Returns:**
+    - Archivo adjunto (`Content-Disposition: attachment`)
+    """
+    from_dt, to_dt, export_format = body.from_dt, body.to_dt, body.export_format
+    filters = _history_filters(None, from_dt, to_dt)
+    media_type, extension, _ = EXPORT_FORMATS[export_format]
+    filename = (
+        f"communications_{from_dt:%Y%m%dT%H%M%S}_{to_dt:%Y%m%dT%H%M%S}.{extension}"
+    )
+
+    return StreamingResponse(
+        export_communications(
+            stream_communications(db, body.device_ids, schema=EXPORT_SCHEMA, **filters),
+            export_format,
+            settings.EXPORT_ROW_GROUP_SIZE,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 # ============================================================================
@@ -101,6 +575,8 @@ async def get_device_communications(
 
 @router.get("/communications/latest", response_model=list[CommunicationLatestResponse])
 async def get_latest_communications_endpoint(  # noqa: B008
+    request: Request,
+    response: Response,
     device_ids: list[str] = Query(
         ...,
         description="Lista de IDs de dispositivos GPS a consultar",
@@ -131,10 +607,183 @@ async def get_latest_communications_endpoint(  # noqa: B008
     **Caso de uso:** Ideal para dashboards que necesitan mostrar la posición/estado
     actual de múltiples dispositivos sin cargar todo el histórico.
 
+    Responde con `ETag` derivado del `received_epoch` de cada dispositivo; con
+    `If-None-Match` devuelve `304 Not Modified` sin serializar si nada cambió.
+
     **Returns:**
     - Lista con la última comunicación de cada dispositivo especificado
     """
-    return await get_latest_communications(db, device_ids)
+    results = await get_latest_communications(db, device_ids)
+
+    cache_headers = _latest_headers(results, "latest")
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+
+    response.headers.update(cache_headers)
+    return results
+
+
+@router.post(
+    "/communications/latest/bulk",
+    response_model=list[CommunicationLatestResponse],
+    responses={
+        200: {
+            "description": "Estado actual de los dispositivos",
+            "content": {media_type: {} for media_type in HISTORY_MEDIA_TYPES},
+        }
+    },
+)
+async def get_latest_communications_bulk(  # noqa: B008
+    request: Request,
+    body: LatestBulkRequest,
+    db=Depends(get_db),
+):
+    """
+    Obtiene la última comunicación de muchos dispositivos (flota completa).
+
+    **Método REST:** POST con body JSON (`{"device_ids": [...]}`, hasta 50 000)
+
+    A diferencia de `GET /communications/latest` (máximo 100 IDs en la URL),
+    una sola petición cubre toda la flota. Los dispositivos en la caché de
+    estado actual se entregan de inmediato y el resto se consulta con un solo
+    parámetro arreglo (`device_id = ANY($1)`), de modo que el plan de la
+    consulta se reutiliza sin importar cuántos IDs se envíen. La respuesta se
+    escribe conforme se obtienen las filas.
+
+    **Headers opcionales:**
+    - `Accept: application/x-ndjson`: Una comunicación por línea.
+    - `Accept: application/vnd.apache.arrow.stream`: Arrow IPC stream columnar.
+    - `Accept: application/vnd.siscom.columnar+json`: JSON columnar.
+
+    **Ejemplo:**
+    ```
+    POST /api/v1/communications/latest/bulk
+    {"device_ids": ["867564050638581", "DEVICE123", "..."]}
+    ```
+
+    **Returns:**
+    - Lista con la última comunicación con coordenadas de cada dispositivo
+      encontrado (los IDs sin estado se omiten)
+    """
+    schema = CommunicationLatestResponse
+    communications = stream_latest_communications(db, body.device_ids)
+
+    media_type = _history_format(request)
+    if media_type in STREAMING_MEDIA_TYPES:
+        return _streaming_response(media_type, communications, schema)
+    if media_type == COLUMNAR_JSON_MEDIA_TYPE:
+        return _columnar_response([c async for c in communications], schema)
+
+    return StreamingResponse(
+        dump_rows_stream(communications, schema, settings.HISTORY_STREAM_BATCH_SIZE),
+        media_type="application/json",
+    )
+
+
+@router.get("/communications/latest/changes", response_model=LatestChangesResponse)
+async def get_latest_changes_endpoint(  # noqa: B008
+    since: int = Query(
+        ...,
+        ge=0,
+        description="Marca de la consulta anterior (epoch en segundos); 0 = todo",
+        examples=[1705318201],
+    ),
+    db=Depends(get_db),
+):
+    """
+    Obtiene solo los dispositivos cuyo estado cambió después de una marca.
+
+    **Método REST:** GET con query parameters
+
+    **Query Parameters:**
+    - `since`: `watermark` devuelto por la consulta anterior (epoch en segundos).
+      Con `since=0` se obtiene el estado de todos los dispositivos.
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/communications/latest/changes?since=0
+    GET /api/v1/communications/latest/changes?since=1705318201
+    ```
+
+    **Caso de uso:** Dashboards que refrescan la flota completa por polling:
+    en lugar de pedir el estado de todos los dispositivos en cada ciclo, piden
+    solo lo que cambió, y el costo depende de la actividad y no del tamaño de
+    la flota.
+
+    La marca se queda unos segundos detrás del reloj, por lo que un
+    dispositivo puede repetirse en dos consultas seguidas; aplicar los
+    cambios por `device_id` es idempotente.
+
+    **Returns:**
+    - `data`: última comunicación con coordenadas de cada dispositivo que cambió,
+      ordenada por `received_epoch`
+    - `watermark`: valor de `since` para la siguiente consulta
+    """
+    results, watermark = await get_latest_changes(db, since)
+    return _json_response(dump_changes(results, watermark, CommunicationLatestResponse))
+
+
+@router.get(
+    "/communications/latest/snapshot/{group}",
+    response_model=list[CommunicationLatestResponse],
+)
+async def get_fleet_snapshot(  # noqa: B008
+    request: Request,
+    group: str,
+    db=Depends(get_db),
+):
+    """
+    Obtiene el estado actual de un grupo de dispositivos pre-calculado.
+
+    **Método REST:** GET con path parameter
+
+    **Path Parameters:**
+    - `group`: Nombre del grupo (definido en `FLEET_SNAPSHOT_GROUPS_FILE`)
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/communications/latest/snapshot/flota-norte
+    ```
+
+    **Caso de uso:** Mapas de "todos mis vehículos" que piden una y otra vez el
+    estado de los mismos miles de dispositivos. Una tarea en segundo plano
+    construye la respuesta ya serializada y comprimida; la petición no hace
+    consultas ni serialización.
+
+    **Headers de respuesta:**
+    - `X-Snapshot-Generation`: Sube cada vez que el contenido del grupo cambia.
+    - `Age`: Segundos desde que se construyó (a lo más
+      `FLEET_SNAPSHOT_MAX_STALENESS_SECS`).
+    - `ETag`: Con `If-None-Match` devuelve `304 Not Modified`.
+
+    **Returns:**
+    - Lista con la última comunicación con coordenadas de cada dispositivo del grupo
+    - Error 404 si el grupo no existe
+    """
+    store = fleet_snapshot.fleet_snapshots
+    if store is None or group not in store.groups:
+        raise HTTPException(status_code=404, detail=f"Grupo no encontrado: {group}")
+
+    snapshot = store.get(group) or await store.refresh(db, group)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    etag = snapshot.etag if encoding is None else f'{snapshot.etag[:-1]}-{encoding}"'
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(snapshot.last_modified),
+        "Cache-Control": "no-cache",
+        "Age": str(int(snapshot.age)),
+        "X-Snapshot-Generation": str(snapshot.generation),
+        "Vary": "Accept-Encoding",
+    }
+    if is_not_modified(request, headers):
+        return not_modified_response(headers)
+
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return Response(
+        snapshot.content(encoding), media_type="application/json", headers=headers
+    )
 
 
 @router.get(
@@ -142,6 +791,8 @@ async def get_latest_communications_endpoint(  # noqa: B008
     response_model=CommunicationLatestResponse,
 )
 async def get_device_latest_communication(  # noqa: B008
+    request: Request,
+    response: Response,
     device_id: str,
     class_: str = Query(
         "STATUS",
@@ -160,7 +811,9 @@ async def get_device_latest_communication(  # noqa: B008
     - `device_id`: ID del dispositivo GPS
 
     **Query Parameters:**
-    - `class`: Tipo de clase de mensaje para filtrar (ALERT o STATUS). Default: STATUS
+    - `class`: Tipo de clase de mensaje para filtrar (ALERT o STATUS). Default: STATUS.
+      Devuelve la última comunicación de esa clase aunque después hayan llegado
+      mensajes de otra clase.
 
     **Ejemplos:**
     ```
@@ -177,7 +830,8 @@ async def get_device_latest_communication(  # noqa: B008
     **Caso de uso:** Ideal para consultar el estado actual de un dispositivo específico.
 
     **Returns:**
-    - Última comunicación del dispositivo especificado
+    - Última comunicación del dispositivo especificado (con `ETag`; `304` si
+      coincide con `If-None-Match`)
     - Error 404 si el dispositivo no existe o no tiene comunicaciones
     """
     result = await get_latest_communications(db, [device_id], msg_class=class_)
@@ -188,4 +842,9 @@ async def get_device_latest_communication(  # noqa: B008
             detail=f"No se encontró comunicación para el dispositivo {device_id}",
         )
 
+    cache_headers = _latest_headers(result, "device-latest", class_)
+    if is_not_modified(request, cache_headers):
+        return not_modified_response(cache_headers)
+
+    response.headers.update(cache_headers)
     return result[0]
@@ -8,7 +8,7 @@ from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 
-from app.core.database import get_db
+from app.core.database import get_read_db
 from app.schemas.events import EventsPageResponse
 from app.services.events_repository import get_events
 
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/api/v1", tags=["Events"])
 
 
 @router.get("/events", response_model=EventsPageResponse)
-async def get_events_handler(  # noqa: PLR0913
+async def get_events_handler(  # noqa: PLR0913, PLR0917
     unit_id: list[UUID] = Query(
         ...,
         description="Lista de UUIDs de unidades a filtrar",
@@ -52,7 +52,13 @@ async def get_events_handler(  # noqa: PLR0913
         description="Cursor opaco para continuar desde una página anterior. "
         "Obtenido de next_cursor en la respuesta anterior.",
     ),
-    db=Depends(get_db),
+    event_type: list[str] | None = Query(
+        None,
+        description="Códigos de tipo de evento a incluir (opcional)",
+        max_length=50,
+        examples=[["ignition_on", "speed_alert"]],
+    ),
+    db=Depends(get_read_db),
 ):
     """
     Obtiene eventos para múltiples unidades en un rango de fechas.
@@ -64,6 +70,7 @@ async def get_events_handler(  # noqa: PLR0913
     - `limit`: Cantidad de registros por página (1-200, default 20)
     - `order`: Orden ascendente o descendente (default "desc")
     - `cursor`: Cursor opaco para paginación (opcional)
+    - `event_type`: Códigos de tipo de evento a incluir (opcional, repetible)
 
     **Ejemplo:**
     ```
@@ -87,6 +94,7 @@ async def get_events_handler(  # noqa: PLR0913
             limit=limit,
             order=order,
             cursor=cursor,
+            event_type_codes=event_type,
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
@@ -0,0 +1,147 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.schemas.geo import (
+    DevicePositionResponse,
+    NearestDeviceResponse,
+    PolygonQueryRequest,
+)
+from app.services.geo_index import geo_index
+from app.utils.geo import MAX_LATITUDE, MAX_LONGITUDE
+
+router = APIRouter(prefix="/api/v1", tags=["Geo"])
+
+
+@router.get("/devices/within/bbox", response_model=list[DevicePositionResponse])
+async def get_devices_in_bbox(
+    min_lat: float = Query(
+        ..., ge=-MAX_LATITUDE, le=MAX_LATITUDE, description="Latitud sur"
+    ),
+    min_lon: float = Query(
+        ..., ge=-MAX_LONGITUDE, le=MAX_LONGITUDE, description="Longitud oeste"
+    ),
+    max_lat: float = Query(
+        ..., ge=-MAX_LATITUDE, le=MAX_LATITUDE, description="Latitud norte"
+    ),
+    max_lon: float = Query(
+        ..., ge=-MAX_LONGITUDE, le=MAX_LONGITUDE, description="Longitud este"
+    ),
+):
+    """
+    Obtiene los dispositivos cuya posición actual está dentro de un rectángulo.
+
+    **Método REST:** GET con query parameters
+
+    **Query Parameters:**
+    - `min_lat`, `max_lat`: Latitudes sur y norte del viewport
+    - `min_lon`, `max_lon`: Longitudes oeste y este del viewport
+      (si `min_lon > max_lon` el rectángulo cruza el antimeridiano)
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/devices/within/bbox?min_lat=19.3&min_lon=-99.2&max_lat=19.5&max_lon=-99.0
+    ```
+
+    Se responde desde el índice espacial en memoria, que se carga al arrancar
+    desde `communications_current_state` y se mantiene al día con el stream de
+    posiciones de Kafka; no consulta la base de datos.
+
+    **Returns:**
+    - Posición actual de cada dispositivo dentro del rectángulo, ordenada por
+      device_id
+    """
+    if min_lat > max_lat:
+        raise HTTPException(
+            status_code=400, detail="'min_lat' debe ser menor o igual que 'max_lat'"
+        )
+
+    return geo_index.query_bbox(min_lat, min_lon, max_lat, max_lon)
+
+
+@router.post("/devices/within/polygon", response_model=list[DevicePositionResponse])
+async def get_devices_in_polygon(request: PolygonQueryRequest):
+    """
+    Obtiene los dispositivos cuya posición actual está dentro de un polígono.
+
+    **Método REST:** POST con JSON body
+
+    **Body:**
+    ```json
+    {
+        "points": [
+            {"latitude": 19.40, "longitude": -99.20},
+            {"latitude": 19.50, "longitude": -99.20},
+            {"latitude": 19.50, "longitude": -99.10}
+        ]
+    }
+    ```
+
+    Se filtra primero por el rectángulo envolvente en el índice espacial en
+    memoria y después con ray casting sobre el polígono.
+
+    **Returns:**
+    - Posición actual de cada dispositivo dentro del polígono, ordenada por
+      device_id
+    """
+    polygon = [(p.latitude, p.longitude) for p in request.points]
+    return geo_index.query_polygon(polygon)
+
+
+@router.get("/devices/nearest", response_model=list[NearestDeviceResponse])
+async def get_nearest_devices(  # noqa: PLR0913, PLR0917
+    lat: float = Query(
+        ..., ge=-MAX_LATITUDE, le=MAX_LATITUDE, description="Latitud del punto"
+    ),
+    lon: float = Query(
+        ..., ge=-MAX_LONGITUDE, le=MAX_LONGITUDE, description="Longitud del punto"
+    ),
+    k: int = Query(10, ge=1, le=100, description="Número de dispositivos"),
+    engine_status: str | None = Query(
+        None, description="Filtro por estado del motor (ej: ON, OFF)"
+    ),
+    fix_status: str | None = Query(None, description="Filtro por estado del GPS"),
+    max_distance_m: float | None = Query(
+        None, gt=0, description="Radio máximo de búsqueda en metros"
+    ),
+):
+    """
+    Obtiene los k dispositivos más cercanos a un punto (ej: un incidente).
+
+    **Método REST:** GET con query parameters
+
+    **Query Parameters:**
+    - `lat`, `lon`: Punto de referencia
+    - `k`: Número de dispositivos (1 a 100, por defecto 10)
+    - `engine_status`: Filtro opcional por estado del motor (sin distinguir
+      mayúsculas)
+    - `fix_status`: Filtro opcional por estado del GPS
+    - `max_distance_m`: Radio máximo opcional en metros
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/devices/nearest?lat=19.4326&lon=-99.1332&k=10&engine_status=ON
+    ```
+
+    La búsqueda se hace sobre el índice espacial en memoria con distancia de
+    gran círculo (haversine); no consulta la base de datos.
+
+    **Returns:**
+    - Posición actual y distancia en metros de cada dispositivo, del más
+      cercano al más lejano
+    """
+    engine = engine_status.upper() if engine_status is not None else None
+
+    def matches(position: dict) -> bool:
+        if engine is not None and (position["engine_status"] or "").upper() != engine:
+            return False
+        return fix_status is None or position["fix_status"] == fix_status
+
+    nearest = geo_index.nearest(
+        lat,
+        lon,
+        k,
+        predicate=matches if engine_status or fix_status else None,
+        max_distance_m=max_distance_m,
+    )
+    return [
+        {**position, "distance_m": round(distance, 1)} for distance, position in nearest
+    ]
@@ -0,0 +1,71 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.core.database import get_db
+from app.schemas.summaries import DailySummaryResponse
+from app.services.summaries import get_daily_summaries, summary_to_dict
+
+router = APIRouter(prefix="/api/v1", tags=["Summaries"])
+
+# Límites del reporte
+SUMMARY_MAX_DEVICES = 1000
+SUMMARY_MAX_DAYS = 93
+
+
+@router.get("/summaries/daily", response_model=list[DailySummaryResponse])
+async def get_daily_summaries_endpoint(  # noqa: B008
+    device_ids: list[str] = Query(
+        ...,
+        description="Lista de IDs de dispositivos GPS",
+        min_length=1,
+        max_length=SUMMARY_MAX_DEVICES,
+        examples=[["867564050638581", "DEVICE123"]],
+    ),
+    from_day: date = Query(
+        ...,
+        alias="from",
+        description="Primer día del reporte (YYYY-MM-DD, incluido)",
+    ),
+    to_day: date = Query(
+        ...,
+        alias="to",
+        description="Último día del reporte (YYYY-MM-DD, incluido)",
+    ),
+    db=Depends(get_db),
+):
+    """
+    Obtiene el resumen diario (distancia, velocidad, ralentí, motor) por dispositivo.
+
+    **Método REST:** GET con query parameters
+
+    **Query Parameters:**
+    - `device_ids`: Lista de IDs de dispositivos (requerido, máximo 1000)
+    - `from`: Primer día del reporte (YYYY-MM-DD, incluido)
+    - `to`: Último día del reporte (YYYY-MM-DD, incluido, máximo 93 días)
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/summaries/daily?device_ids=867564050638581&from=2024-12-01&to=2024-12-31
+    ```
+
+    Los resúmenes se leen de la tabla materializada `device_daily_summary`:
+    los días pasados se calculan una sola vez y el día en curso se actualiza
+    de forma incremental con las comunicaciones nuevas.
+
+    **Returns:**
+    - Un registro por dispositivo y día con comunicaciones, ordenado por
+      device_id y día
+    """
+    if from_day > to_day:
+        raise HTTPException(status_code=400, detail="'from' debe ser anterior a 'to'")
+
+    if (to_day - from_day).days >= SUMMARY_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"El rango máximo es de {SUMMARY_MAX_DAYS} días",
+        )
+
+    summaries = await get_daily_summaries(db, device_ids, from_day, to_day)
+
+    return [summary_to_dict(s) for s in summaries]
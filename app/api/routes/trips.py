@@ -0,0 +1,52 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.database import get_read_db
+from app.schemas.trips import DeviceTripsResponse
+from app.services.trips import get_device_trips
+
+router = APIRouter(prefix="/api/v1", tags=["Trips"])
+
+
+@router.get("/devices/{device_id}/trips", response_model=DeviceTripsResponse)
+async def get_device_trips_endpoint(  # noqa: B008
+    device_id: str,
+    received_at: date = Query(
+        ...,
+        description="Día a segmentar (formato: YYYY-MM-DD)",
+        examples=["2024-12-14"],
+    ),
+    db=Depends(get_read_db),
+):
+    """
+    Segmenta el histórico de un día de UN dispositivo en viajes y paradas.
+
+    **Método REST:** GET con path parameter
+
+    **Path Parameters:**
+    - `device_id`: ID del dispositivo GPS
+
+    **Query Parameters:**
+    - `received_at`: Día a segmentar (YYYY-MM-DD, requerido)
+
+    **Ejemplo:**
+    ```
+    GET /api/v1/devices/867564050638581/trips?received_at=2024-12-14
+    ```
+
+    **Reglas:**
+    - Un punto está en movimiento si `engine_status` es ON y la velocidad es
+      al menos `TRIPS_MIN_SPEED_KMH`
+    - Las paradas más cortas que `TRIPS_MIN_STOP_SECONDS` entre dos viajes se
+      consideran parte del viaje
+    - Los segmentos son contiguos; las distancias son de gran círculo (haversine)
+    - Se omiten los registros sin coordenadas
+
+    Los días ya cerrados (anteriores a hoy, UTC) se calculan una sola vez y se
+    sirven desde caché.
+
+    **Returns:**
+    - Conteo de viajes/paradas, distancia total y la lista de segmentos
+    """
+    return await get_device_trips(db, device_id, received_at)
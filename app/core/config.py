@@ -21,6 +21,64 @@ class Settings(BaseSettings):
     DB_CONNECTION_TIMEOUT_SECS: int = 30
     DB_IDLE_TIMEOUT_SECS: int = 300
 
+    # Réplicas de lectura para histórico y eventos ("host" o "host:puerto",
+    # separadas por coma; mismas credenciales y base que el primario)
+    DB_REPLICA_HOSTS: str = ""
+    DB_REPLICA_CONNECT_TIMEOUT_SECS: int = 3
+    DB_REPLICA_COOLDOWN_SECS: int = 30
+
+    # Streaming de histórico (filas leídas por lote del cursor del servidor)
+    HISTORY_STREAM_BATCH_SIZE: int = 1000
+
+    # Exportación CSV/Parquet (filas por row group / bloque escrito)
+    EXPORT_ROW_GROUP_SIZE: int = 50000
+
+    # Segmentación de viajes/paradas
+    TRIPS_MIN_SPEED_KMH: float = 5.0  # Velocidad mínima para considerar movimiento
+    TRIPS_MIN_STOP_SECONDS: int = 180  # Paradas más cortas se unen al viaje
+    TRIPS_CACHE_SIZE: int = 5000  # Días cerrados (device, fecha) en caché
+
+    # Resúmenes diarios: hueco máximo entre comunicaciones contado como motor encendido
+    SUMMARY_MAX_GAP_SECONDS: int = 300
+
+    # Catálogo event_types en memoria para /events (segundos entre recargas)
+    EVENT_TYPES_CACHE_TTL_SECS: int = 300
+
+    # Índice espacial en memoria de la posición actual (tamaño de celda en grados)
+    GEO_INDEX_CELL_DEGREES: float = 0.1
+
+    # Caché en memoria del estado actual (alimentada por Kafka) para /latest
+    CURRENT_STATE_CACHE_ENABLED: bool = True
+    # Sin mensajes de Kafka en este tiempo la caché se considera atrasada y
+    # /latest vuelve a consultar la base de datos
+    CURRENT_STATE_MAX_STALENESS_SECS: float = 60
+    # Segundos que se recuerda que un dispositivo no tiene mensajes de una clase
+    CURRENT_STATE_ABSENT_TTL_SECS: float = 300
+    # Segundos que la marca de /latest/changes se queda detrás del reloj
+    LATEST_CHANGES_SAFETY_SECS: int = 2
+
+    # Snapshots pre-serializados del estado actual por grupo de dispositivos
+    # (JSON {"grupo": ["device_id", ...]}; vacío = deshabilitados)
+    FLEET_SNAPSHOT_GROUPS_FILE: str = ""
+    FLEET_SNAPSHOT_REFRESH_SECS: float = 5
+    FLEET_SNAPSHOT_MAX_STALENESS_SECS: float = 30
+
+    # Compresión HTTP (gzip/br/zstd): tamaño mínimo de respuestas completas
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # Segundos después del fin de un día (UTC) en que aún se aceptan
+    # comunicaciones atrasadas; pasado ese tiempo el día se considera cerrado
+    HISTORY_CLOSED_GRACE_SECS: int = 6 * 3600
+
+    # Cache-Control max-age del histórico de días cerrados (no cambia)
+    HTTP_CACHE_CLOSED_MAX_AGE: int = 31536000
+    # Cache-Control max-age de un día terminado dentro del periodo de gracia
+    HTTP_CACHE_CLOSING_MAX_AGE: int = 60
+
+    # Caché en disco (Arrow) del histórico de días cerrados; vacío = deshabilitada
+    HISTORY_CACHE_DIR: str = ""
+    HISTORY_CACHE_MAX_BYTES: int = 2 * 1024**3
+
     # Seguridad JWT
     JWT_SECRET_KEY: str = ""
     JWT_ALGORITHM: str = "HS256"
@@ -45,6 +103,9 @@ class Settings(BaseSettings):
     KAFKA_TOPIC: str = "tracking/data"
     KAFKA_ALERTS_TOPIC: str = ""
     KAFKA_GROUP_ID: str = "siscom-api-consumer"
+    # Agrega host y pid al group id: cada instancia (con su caché de estado
+    # actual, índice espacial y clientes SSE) recibe todas las particiones
+    KAFKA_GROUP_ID_PER_INSTANCE: bool = True
     KAFKA_AUTO_OFFSET_RESET: str = "latest"
     KAFKA_USERNAME: str = ""
     KAFKA_PASSWORD: str = ""
@@ -56,6 +117,16 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USERNAME}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_DATABASE}"
 
+    @property
+    def REPLICA_DATABASE_URLS(self) -> list[str]:
+        urls = []
+        for entry in filter(None, map(str.strip, self.DB_REPLICA_HOSTS.split(","))):
+            host, _, port = entry.partition(":")
+            urls.append(
+                f"postgresql+asyncpg://{self.DB_USERNAME}:{self.DB_PASSWORD}@{host}:{port or self.DB_PORT}/{self.DB_DATABASE}"
+            )
+        return urls
+
     class Config:
         env_file = ".env"
 
@@ -1,24 +1,172 @@
+import itertools
+import logging
+import time
+
+from sqlalchemy.exc import DBAPIError, OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+def _create_engine(url: str, **kwargs):
+    """Motor con la configuración de pool común a primario y réplicas."""
+    return create_async_engine(
+        url,
+        future=True,
+        echo=False,
+        pool_size=settings.DB_MIN_CONNECTIONS,
+        max_overflow=settings.DB_MAX_CONNECTIONS - settings.DB_MIN_CONNECTIONS,
+        pool_timeout=settings.DB_CONNECTION_TIMEOUT_SECS,
+        pool_recycle=settings.DB_IDLE_TIMEOUT_SECS,
+        pool_pre_ping=True,  # Verifica la conexión antes de usarla
+        **kwargs,
+    )
+
+
 # Motor con configuración de pool
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    future=True,
-    echo=False,
-    pool_size=settings.DB_MIN_CONNECTIONS,
-    max_overflow=settings.DB_MAX_CONNECTIONS - settings.DB_MIN_CONNECTIONS,
-    pool_timeout=settings.DB_CONNECTION_TIMEOUT_SECS,
-    pool_recycle=settings.DB_IDLE_TIMEOUT_SECS,
-    pool_pre_ping=True,  # Verifica la conexión antes de usarla
-)
+engine = _create_engine(settings.DATABASE_URL)
 
 SessionLocal = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+# Errores al obtener una conexión
+_CONNECTION_ERRORS = (OSError, TimeoutError, DBAPIError, OperationalError)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    """Indica si el error es de la conexión (la base no responde) y no de la consulta."""
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated
+    return isinstance(error, OSError | TimeoutError)
+
+
+class ReadReplica:
+    """
+    Réplica de solo lectura con su propio pool.
+
+    Una réplica sana se usa sin verificarla. Si no se puede obtener una
+    conexión queda fuera de rotación durante DB_REPLICA_COOLDOWN_SECS; pasado
+    ese tiempo (y al arrancar, cuando aún no se sabe si responde) se verifica
+    una vez antes de volver a usarla.
+    """
+
+    def __init__(self, url: str):
+        self.engine = _create_engine(
+            url,
+            # Fallar rápido para caer al primario en vez de esperar el timeout
+            connect_args={"timeout": settings.DB_REPLICA_CONNECT_TIMEOUT_SECS},
+        )
+        self.sessionmaker = async_sessionmaker(
+            bind=self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.unavailable_until = 0.0
+        self.needs_probe = True
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.unavailable_until
+
+    def mark_unavailable(self, error: Exception) -> None:
+        self.unavailable_until = time.monotonic() + settings.DB_REPLICA_COOLDOWN_SECS
+        self.needs_probe = True
+        logger.warning(
+            f"Réplica {self.engine.url.host} no disponible, "
+            f"fuera de rotación {settings.DB_REPLICA_COOLDOWN_SECS}s: {error}"
+        )
+
+    async def probe(self) -> bool:
+        """
+        Verifica la réplica con una conexión que se devuelve al pool en cuanto
+        responde (la sesión no retiene ninguna conexión hasta su primera
+        consulta).
+        """
+        try:
+            async with self.engine.connect():
+                pass
+        except _CONNECTION_ERRORS as e:
+            self.mark_unavailable(e)
+            return False
+        self.needs_probe = False
+        return True
+
+
+replicas = [ReadReplica(url) for url in settings.REPLICA_DATABASE_URLS]
+_replica_cycle = itertools.cycle(replicas)
+
+
+def _next_replica() -> ReadReplica | None:
+    """Siguiente réplica disponible (round-robin), sin verificarla."""
+    for _ in range(len(replicas)):
+        replica = next(_replica_cycle)
+        if replica.available:
+            return replica
+    return None
+
+
+async def _open_replica_session() -> tuple[ReadReplica, AsyncSession] | None:
+    """
+    Abre una sesión en la siguiente réplica disponible (round-robin).
+
+    Solo se verifica la réplica si falló antes o aún no se ha usado (ver
+    `ReadReplica`): en una réplica sana la petición no paga una ida y vuelta
+    extra antes de su consulta.
+
+    Returns:
+        (réplica, sesión), o None si ninguna réplica responde
+    """
+    for _ in range(len(replicas)):
+        replica = _next_replica()
+        if replica is None:
+            return None
+        if replica.needs_probe and not await replica.probe():
+            continue
+        return replica, replica.sessionmaker()
+    return None
+
+
+async def run_in_new_session(session: AsyncSession, fn, *args, **kwargs):
+    """
+    Ejecuta fn(sesión, *args, **kwargs) con una sesión propia sobre el mismo
+    engine que `session` (réplica o primario) y la cierra al terminar.
+
+    Para el trabajo que SingleFlight comparte entre peticiones: la sesión del
+    primer llamador se cierra cuando termina (o se cancela) su petición, y una
+    AsyncSession no se puede usar desde dos tareas a la vez.
+    """
+    async with AsyncSession(bind=session.bind, expire_on_commit=False) as own:
+        return await fn(own, *args, **kwargs)
+
+
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+
+async def get_read_db():
+    """
+    Sesión para consultas pesadas de solo lectura (histórico, eventos).
+
+    Usa una réplica si hay configuradas (DB_REPLICA_HOSTS) y alguna responde;
+    si no, el primario. Así los escaneos largos no compiten por el pool del
+    primario con las consultas rápidas del estado actual. Si la réplica deja
+    de responder durante la petición, queda fuera de rotación para las
+    siguientes.
+    """
+    opened = await _open_replica_session() if replicas else None
+    if opened is None:
+        async with SessionLocal() as session:
+            yield session
+        return
+
+    replica, session = opened
+    async with session:
+        try:
+            yield session
+        except Exception as e:
+            if _is_connection_error(e):
+                replica.mark_unavailable(e)
+            raise
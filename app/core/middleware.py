@@ -1,8 +1,13 @@
 import logging
 import time
+import zlib
 
+import brotli
+import zstandard
 from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.utils.metrics import metrics_client
 
@@ -61,3 +66,191 @@ class MetricsMiddleware(BaseHTTPMiddleware):
             await metrics_client.timing_latency("stream", duration_ms)
 
         return response
+
+
+# ============================================================================
+# Compresión de respuestas
+# ============================================================================
+
+# Tipos que se comprimen (el JSON del histórico comprime ~10x); Parquet ya va
+# comprimido y los event-stream no se tocan
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.siscom.columnar+json",
+    "application/vnd.apache.arrow.stream",
+    "text/csv",
+    "text/plain",
+    "text/html",
+)
+
+
+class _GzipEncoder:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+# Codificaciones soportadas, en orden de preferencia ante empates de q
+ENCODERS = {"zstd": _ZstdEncoder, "br": _BrotliEncoder, "gzip": _GzipEncoder}
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """
+    Elige la codificación a partir del header Accept-Encoding.
+
+    Se respeta el q de cada codificación (q=0 la descarta) y, a igual q, se
+    prefiere zstd, luego br y luego gzip. `*` aplica a las no listadas.
+    """
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip()] = quality
+
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(encoding, wildcard), -preference, encoding)
+        for preference, encoding in enumerate(ENCODERS)
+    ]
+    quality, _, encoding = max(candidates)
+    return encoding if quality > 0 else None
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime las respuestas HTTP según Accept-Encoding.
+
+    - Respuestas completas: se comprimen solo si superan minimum_size.
+    - Respuestas en streaming (NDJSON, Arrow, CSV): cada bloque se comprime y
+      se vacía al cliente, sin esperar al final de la respuesta.
+
+    Las conexiones WebSocket y las respuestas que ya traen Content-Encoding
+    pasan sin cambios.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Envoltura de `send` que comprime el cuerpo de una respuesta."""
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start_message: Message | None = None
+        self.encoder = None
+        self.passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        return "content-encoding" not in headers and content_type in (
+            COMPRESSIBLE_TYPES
+        )
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._compressible(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            headers = MutableHeaders(raw=self.start_message["headers"])
+
+            # Respuesta completa y pequeña: no vale la pena comprimir
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+
+            self.encoder = ENCODERS[self.encoding]()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            # Cada codificación es otra representación: su ETag fuerte cambia
+            etag = headers.get("etag")
+            if etag is not None and etag.endswith('"'):
+                headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+
+            if not more_body:
+                body = self.encoder.chunk(body) + self.encoder.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            await self.send(self.start_message)
+
+        if more_body:
+            body = self.encoder.chunk(body) if body else b""
+        else:
+            body = self.encoder.chunk(body) + self.encoder.finish()
+
+        await self.send(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
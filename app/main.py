@@ -7,11 +7,26 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
-from app.api.routes import communications, events, public, stream
+from app.api.routes import (
+    communications,
+    events,
+    geo,
+    public,
+    stream,
+    summaries,
+    trips,
+)
 from app.api.routes.stream import start_kafka_broker_bridge
 from app.core.config import settings
-from app.core.database import engine
-from app.core.middleware import MetricsMiddleware
+from app.core.database import SessionLocal, engine
+from app.core.middleware import CompressionMiddleware, MetricsMiddleware
+from app.services.current_state import (
+    load_current_state,
+    start_current_state_bridge,
+)
+from app.services.event_types import event_types
+from app.services.fleet_snapshot import fleet_snapshots, refresh_fleet_snapshots
+from app.services.geo_index import load_geo_index, start_geo_index_bridge
 from app.services.kafka_client import kafka_client
 from app.utils.metrics import metrics_client
 
@@ -41,6 +56,42 @@ uvicorn_access_logger = logging.getLogger("uvicorn.access")
 uvicorn_access_logger.addFilter(_HealthAccessFilter())
 
 
+async def _load_in_memory_state():
+    """
+    Carga el catálogo de tipos de evento e inicia las estructuras en memoria
+    alimentadas por Kafka.
+
+    El callback de Kafka se registra antes de la carga desde la base de datos
+    para no perder posiciones mientras tanto. Si una carga falla, los
+    endpoints que dependen de ella consultan la base de datos (el catálogo
+    se vuelve a intentar cargar en la primera petición a /events).
+    """
+    try:
+        async with SessionLocal() as session:
+            loaded = await event_types.load(session)
+        logging.info(f"✓ Catálogo de tipos de evento cargado con {loaded} tipos")
+    except Exception as e:
+        logging.error(f"Error al cargar el catálogo de tipos de evento: {e}")
+
+    try:
+        start_geo_index_bridge()
+        async with SessionLocal() as session:
+            loaded = await load_geo_index(session)
+        logging.info(f"✓ Índice espacial cargado con {loaded} dispositivos")
+    except Exception as e:
+        logging.error(f"Error al cargar el índice espacial: {e}")
+
+    if not settings.CURRENT_STATE_CACHE_ENABLED:
+        return
+    try:
+        start_current_state_bridge()
+        async with SessionLocal() as session:
+            loaded = await load_current_state(session)
+        logging.info(f"✓ Caché de estado actual cargada con {loaded} dispositivos")
+    except Exception as e:
+        logging.error(f"Error al cargar la caché de estado actual: {e}")
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     """Manejo del ciclo de vida de la aplicación."""
@@ -70,6 +121,9 @@ async def lifespan(_app: FastAPI):
     except Exception as e:
         logging.error(f"Error al iniciar Kafka bridge: {e}")
 
+    # Startup: Índice espacial y caché de estado actual en memoria
+    await _load_in_memory_state()
+
     # Tarea periódica para reportar el estado del circuit breaker de Kafka como métrica
     async def report_kafka_circuit_breaker():
         while True:
@@ -78,15 +132,19 @@ async def lifespan(_app: FastAPI):
             )
             await asyncio.sleep(10)
 
-    task = None
+    tasks = []
     if settings.STATSD_ENABLED:
-        task = asyncio.create_task(report_kafka_circuit_breaker())
+        tasks.append(asyncio.create_task(report_kafka_circuit_breaker()))
+
+    # Tarea periódica que reconstruye los snapshots de flota pre-serializados
+    if fleet_snapshots is not None:
+        tasks.append(asyncio.create_task(refresh_fleet_snapshots(SessionLocal)))
 
     yield
 
-    if task:
+    for task in tasks:
         task.cancel()
-        with contextlib.suppress(Exception):
+        with contextlib.suppress(asyncio.CancelledError, Exception):
             await task
 
     # Shutdown: Cerrar cliente Kafka
@@ -109,6 +167,11 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Configurar compresión de respuestas (Accept-Encoding: zstd, br, gzip)
+app.add_middleware(
+    CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE
+)
+
 # Configurar middleware de métricas
 app.add_middleware(MetricsMiddleware)
 
@@ -138,6 +201,9 @@ async def health_check():
 
 # Incluir routers API v1
 app.include_router(communications.router)
+app.include_router(trips.router)
+app.include_router(summaries.router)
+app.include_router(geo.router)
 app.include_router(events.router)
 app.include_router(stream.router)
 
@@ -1,6 +1,8 @@
 from sqlalchemy import (
     BigInteger,
+    Boolean,
     Column,
+    Date,
     DateTime,
     Integer,
     Numeric,
@@ -132,5 +134,46 @@ class CommunicationCurrentState(Base):
     rx_lvl = Column(Integer)
     satellites = Column(Integer)
     speed = Column(Numeric)
-    received_epoch = Column(BigInteger)
+    received_epoch = Column(BigInteger, index=True)
     received_at = Column(DateTime)
+
+
+class DeviceDailySummary(Base):
+    """
+    Tabla materializada con agregados diarios por dispositivo.
+
+    Cada fila guarda agregados combinables (mínimos, máximos, sumas y
+    conteos) de un dispositivo en un día, de modo que el día en curso se
+    actualiza sumando solo las comunicaciones recibidas después de
+    last_received_at. Los días pasados se marcan como closed y ya no se
+    recalculan.
+    """
+
+    __tablename__ = "device_daily_summary"
+
+    device_id = Column(String(100), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    points = Column(Integer, nullable=False, default=0)
+
+    # Contadores del dispositivo (primer y último valor del día)
+    odometer_start = Column(BigInteger)
+    odometer_end = Column(BigInteger)
+    idle_time_start = Column(Integer)
+    idle_time_end = Column(Integer)
+
+    # Velocidad
+    max_speed = Column(Numeric(8, 2))
+    speed_sum = Column(Numeric(14, 2), nullable=False, default=0)
+    speed_count = Column(Integer, nullable=False, default=0)
+
+    # Tiempo con motor encendido (segundos)
+    engine_on_seconds = Column(Integer, nullable=False, default=0)
+
+    # Marca de agua para la actualización incremental
+    first_received_at = Column(DateTime)
+    last_received_at = Column(DateTime)
+    last_engine_on = Column(Boolean)
+
+    closed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime)
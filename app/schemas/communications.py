@@ -2,6 +2,7 @@
 
 from datetime import datetime
 from decimal import Decimal
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -27,6 +28,76 @@ class DeviceHistoryRequest(BaseModel):
         }
 
 
+# Máximo de dispositivos por consulta masiva del estado actual (flota completa)
+LATEST_BULK_MAX_DEVICES = 50000
+
+
+class LatestBulkRequest(BaseModel):
+    """
+    Schema para la consulta masiva del estado actual (POST).
+
+    Admite la flota completa en una sola petición, sin el límite de longitud
+    de URL de los query parameters.
+    """
+
+    device_ids: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=LATEST_BULK_MAX_DEVICES,
+        description="Lista de IDs de dispositivos GPS",
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {"device_ids": ["867564050638581", "DEVICE123", "GPS001"]}
+        }
+
+
+# Máximo de dispositivos por exportación (flota completa)
+EXPORT_MAX_DEVICES = 1000
+
+
+class ExportRequest(BaseModel):
+    """
+    Schema para la exportación del histórico de una flota (POST).
+
+    Los IDs van en el body: 1000 IDs repetidos como query parameters exceden
+    el límite de tamaño de la línea de petición del servidor HTTP.
+    """
+
+    device_ids: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=EXPORT_MAX_DEVICES,
+        description="Lista de IDs de dispositivos GPS a exportar",
+    )
+    from_dt: datetime = Field(
+        ...,
+        alias="from",
+        description="Fecha/hora inicial de received_at (ISO 8601, incluida)",
+    )
+    to_dt: datetime = Field(
+        ...,
+        alias="to",
+        description="Fecha/hora final de received_at (ISO 8601, excluida)",
+    )
+    export_format: Literal["csv", "parquet"] = Field(
+        "csv",
+        alias="format",
+        description="Formato del archivo: csv o parquet",
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_ids": ["867564050638581", "DEVICE123"],
+                "from": "2024-12-14T00:00:00Z",
+                "to": "2024-12-15T00:00:00Z",
+                "format": "parquet",
+            }
+        }
+
+
 class CommunicationResponse(BaseModel):
     """
     Schema para la respuesta de comunicaciones GPS (histórico básico).
@@ -191,6 +262,50 @@ class CommunicationFullResponse(BaseModel):
         }
 
 
+class CommunicationsPageResponse(BaseModel):
+    """
+    Schema para la respuesta paginada del histórico de comunicaciones.
+
+    Contiene:
+    - data: lista de comunicaciones (campos básicos) en la página actual
+    - next_cursor: cursor opaco para obtener la siguiente página (None si no hay más)
+    """
+
+    data: list[CommunicationResponse]
+    next_cursor: str | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "data": [
+                    {
+                        "id": 1,
+                        "device_id": "867564050638581",
+                        "latitude": 19.4326,
+                        "longitude": -99.1332,
+                        "speed": 45.5,
+                        "course": 180.0,
+                        "gps_datetime": "2024-01-15T10:30:00",
+                        "engine_status": "ON",
+                        "fix_status": "VALID",
+                    }
+                ],
+                "next_cursor": "eyJyYSI6IjIwMjQtMDEtMTVUMTA6MzA6MDEiLCJzcmMiOiJzdW50ZWNoIiwiaWQiOjF9",
+            }
+        }
+
+
+class CommunicationsFullPageResponse(BaseModel):
+    """
+    Schema para la respuesta paginada del histórico con todos los campos.
+
+    Se usa cuando se consulta por fecha específica (received_at) con paginación.
+    """
+
+    data: list[CommunicationFullResponse]
+    next_cursor: str | None = None
+
+
 class CommunicationLatestResponse(BaseModel):
     """
     Schema para la respuesta de última comunicación (current_state).
@@ -244,3 +359,16 @@ class CommunicationLatestResponse(BaseModel):
                 "received_at": "2024-01-15T10:30:01",
             }
         }
+
+
+class LatestChangesResponse(BaseModel):
+    """
+    Schema para los cambios del estado actual desde una marca.
+
+    Contiene:
+    - data: estado actual de los dispositivos que cambiaron después de `since`
+    - watermark: valor de `since` para la siguiente consulta
+    """
+
+    data: list[CommunicationLatestResponse]
+    watermark: int
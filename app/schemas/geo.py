@@ -0,0 +1,92 @@
+"""
+Schemas Pydantic para las consultas espaciales sobre la posición actual.
+"""
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.utils.geo import MAX_LATITUDE, MAX_LONGITUDE
+
+
+class GeoPoint(BaseModel):
+    """Vértice de un polígono."""
+
+    latitude: float = Field(..., ge=-MAX_LATITUDE, le=MAX_LATITUDE)
+    longitude: float = Field(..., ge=-MAX_LONGITUDE, le=MAX_LONGITUDE)
+
+
+class PolygonQueryRequest(BaseModel):
+    """
+    Schema para la consulta de dispositivos dentro de un polígono (geocerca).
+
+    El polígono puede venir abierto o cerrado (último vértice igual al primero).
+    """
+
+    points: list[GeoPoint] = Field(
+        ...,
+        min_length=3,
+        max_length=1000,
+        description="Vértices del polígono en orden",
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "points": [
+                    {"latitude": 19.40, "longitude": -99.20},
+                    {"latitude": 19.50, "longitude": -99.20},
+                    {"latitude": 19.50, "longitude": -99.10},
+                    {"latitude": 19.40, "longitude": -99.10},
+                ]
+            }
+        }
+
+
+class DevicePositionResponse(BaseModel):
+    """
+    Schema de la posición actual de un dispositivo en el índice espacial.
+    """
+
+    device_id: str
+    latitude: float
+    longitude: float
+    speed: float | None = None
+    engine_status: str | None = None
+    fix_status: str | None = None
+    received_at: datetime | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_id": "867564050638581",
+                "latitude": 19.4326,
+                "longitude": -99.1332,
+                "speed": 45.5,
+                "engine_status": "ON",
+                "fix_status": "1",
+                "received_at": "2024-12-14T15:35:05",
+            }
+        }
+
+
+class NearestDeviceResponse(DevicePositionResponse):
+    """
+    Schema de un dispositivo en la búsqueda de los más cercanos a un punto.
+    """
+
+    distance_m: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_id": "867564050638581",
+                "latitude": 19.4326,
+                "longitude": -99.1332,
+                "speed": 45.5,
+                "engine_status": "ON",
+                "fix_status": "1",
+                "received_at": "2024-12-14T15:35:05",
+                "distance_m": 1250.4,
+            }
+        }
@@ -0,0 +1,45 @@
+"""
+Schemas Pydantic para los resúmenes diarios por dispositivo.
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+
+class DailySummaryResponse(BaseModel):
+    """
+    Schema del resumen de un dispositivo en un día.
+
+    - distance: diferencia del odómetro del día (mismas unidades que `odometer`)
+    - idle_seconds: diferencia del contador `idle_time` del día
+    - engine_on_seconds: tiempo entre comunicaciones con motor encendido
+    """
+
+    device_id: str
+    day: date
+    points: int
+    distance: int | None = None
+    max_speed: Decimal | None = None
+    avg_speed: Decimal | None = None
+    idle_seconds: int | None = None
+    engine_on_seconds: int
+    first_received_at: datetime | None = None
+    last_received_at: datetime | None = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_id": "867564050638581",
+                "day": "2024-12-14",
+                "points": 2870,
+                "distance": 184250,
+                "max_speed": "96.40",
+                "avg_speed": "31.75",
+                "idle_seconds": 3120,
+                "engine_on_seconds": 28340,
+                "first_received_at": "2024-12-14T00:00:21",
+                "last_received_at": "2024-12-14T23:59:48",
+            }
+        }
@@ -0,0 +1,83 @@
+"""
+Schemas Pydantic para la segmentación de viajes y paradas.
+"""
+
+from datetime import date, datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class TripSegmentResponse(BaseModel):
+    """
+    Schema de un segmento del recorrido diario: un viaje o una parada.
+
+    Los segmentos son contiguos: cada uno termina cuando empieza el siguiente.
+    """
+
+    kind: Literal["trip", "stop"]
+    start_time: datetime
+    end_time: datetime
+    duration_seconds: int
+    distance_m: float
+    max_speed: float | None = None
+    avg_speed: float | None = None
+    start_latitude: float
+    start_longitude: float
+    end_latitude: float
+    end_longitude: float
+    points: int
+
+
+class DeviceTripsResponse(BaseModel):
+    """
+    Schema de la respuesta de viajes y paradas de un dispositivo en un día.
+    """
+
+    device_id: str
+    received_at: date
+    trips: int
+    stops: int
+    total_distance_m: float
+    segments: list[TripSegmentResponse]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "device_id": "867564050638581",
+                "received_at": "2024-12-14",
+                "trips": 1,
+                "stops": 1,
+                "total_distance_m": 12450.3,
+                "segments": [
+                    {
+                        "kind": "stop",
+                        "start_time": "2024-12-14T06:00:12",
+                        "end_time": "2024-12-14T07:15:40",
+                        "duration_seconds": 4528,
+                        "distance_m": 8.2,
+                        "max_speed": 0.0,
+                        "avg_speed": 0.0,
+                        "start_latitude": 19.4326,
+                        "start_longitude": -99.1332,
+                        "end_latitude": 19.43261,
+                        "end_longitude": -99.13319,
+                        "points": 151,
+                    },
+                    {
+                        "kind": "trip",
+                        "start_time": "2024-12-14T07:15:40",
+                        "end_time": "2024-12-14T07:48:02",
+                        "duration_seconds": 1942,
+                        "distance_m": 12442.1,
+                        "max_speed": 78.5,
+                        "avg_speed": 31.2,
+                        "start_latitude": 19.43261,
+                        "start_longitude": -99.13319,
+                        "end_latitude": 19.5123,
+                        "end_longitude": -99.1801,
+                        "points": 65,
+                    },
+                ],
+            }
+        }
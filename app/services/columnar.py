@@ -0,0 +1,265 @@
+"""
+Formatos columnares para el histórico de comunicaciones.
+
+Los consumidores masivos (jobs de analítica) descargan días completos de
+comunicaciones. En lugar de un objeto JSON por fila, estos formatos entregan
+una lista de valores por columna, construida directamente desde las filas
+del repositorio sin pasar por Pydantic:
+
+- Arrow IPC stream (`application/vnd.apache.arrow.stream`): binario, escrito
+  por lotes (record batches) conforme llegan del cursor del servidor.
+- JSON columnar (`application/vnd.siscom.columnar+json`): `{"count", "columns"}`.
+
+Los campos Decimal (coordenadas, velocidad, voltajes) se entregan como float64.
+Ambos formatos también se generan desde una tabla Arrow (la caché en disco de
+días cerrados) sin reconstruir filas.
+"""
+
+import io
+import types
+from collections.abc import AsyncIterator, Callable, Iterator, Sequence
+from datetime import datetime
+from decimal import Decimal
+from functools import cache
+from typing import Union, get_args, get_origin
+
+import orjson
+import pyarrow as pa
+from pydantic import BaseModel
+
+from app.services.serialization import response_fields, row_to_dict
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_JSON_MEDIA_TYPE = "application/vnd.siscom.columnar+json"
+
+# Tipo Python del schema -> tipo Arrow
+_ARROW_TYPES = {
+    int: pa.int64(),
+    str: pa.string(),
+    Decimal: pa.float64(),
+    datetime: pa.timestamp("us"),
+}
+
+
+def _as_float(value):
+    return None if value is None else float(value)
+
+
+def _identity(value):
+    return value
+
+
+def _field_type(annotation) -> type:
+    """Obtiene el tipo base de una anotación `X | None`."""
+    if get_origin(annotation) in (Union, types.UnionType):
+        return next(arg for arg in get_args(annotation) if arg is not type(None))
+    return annotation
+
+
+@cache
+def column_layout(
+    schema: type[BaseModel],
+) -> tuple[tuple[str, pa.DataType, Callable], ...]:
+    """
+    Describe las columnas del formato columnar para un schema de respuesta.
+
+    Args:
+        schema: Schema Pydantic de la respuesta del histórico
+
+    Returns:
+        Tupla de (nombre, tipo Arrow, conversión del valor de la fila)
+    """
+    layout = []
+    for name, field in schema.model_fields.items():
+        python_type = _field_type(field.annotation)
+        converter = _as_float if python_type is Decimal else _identity
+        layout.append((name, _ARROW_TYPES[python_type], converter))
+    return tuple(layout)
+
+
+@cache
+def arrow_schema(schema: type[BaseModel]) -> pa.Schema:
+    """Schema Arrow equivalente al schema de respuesta."""
+    return pa.schema(
+        [(name, arrow_type) for name, arrow_type, _ in column_layout(schema)]
+    )
+
+
+def build_columns(rows: Sequence, schema: type[BaseModel]) -> dict[str, list]:
+    """
+    Transpone las filas del repositorio a una lista de valores por columna.
+
+    Las columnas que una tabla no tiene (p. ej. alert_type en Suntech) se
+    rellenan con None, igual que en la respuesta por filas.
+
+    Args:
+        rows: Filas del histórico (Row de SQLAlchemy u objetos con atributos)
+        schema: Schema de respuesta; define columnas y orden
+
+    Returns:
+        Diccionario nombre de columna -> lista de valores
+    """
+    fields = response_fields(schema)
+    records = [row_to_dict(row, fields) for row in rows]
+    return {
+        name: [converter(record[name]) for record in records]
+        for name, _, converter in column_layout(schema)
+    }
+
+
+def record_batch(rows: Sequence, schema: type[BaseModel]) -> pa.RecordBatch:
+    """Construye un RecordBatch de Arrow con las filas indicadas."""
+    columns = build_columns(rows, schema)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(columns[name], type=arrow_type)
+            for name, arrow_type, _ in column_layout(schema)
+        ],
+        schema=arrow_schema(schema),
+    )
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destino de escritura que acumula los bytes hasta que se drenan.
+
+    Conserva la posición absoluta (`tell`) aunque se descarten los bytes ya
+    enviados; Parquet la usa para los offsets del footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def write_record_batches(
+    rows: AsyncIterator,
+    schema: type[BaseModel],
+    batch_size: int,
+    open_writer: Callable,
+) -> AsyncIterator[bytes]:
+    """
+    Escribe el histórico por record batches con un writer de pyarrow.
+
+    Solo se mantiene en memoria el lote en curso, por lo que se puede combinar
+    con `stream_communications` para exportar históricos de cualquier tamaño.
+
+    Args:
+        rows: Iterador asíncrono de filas del histórico
+        schema: Schema de respuesta; define columnas y tipos
+        batch_size: Filas por record batch
+        open_writer: Fábrica `(sink, arrow_schema) -> writer` (p. ej.
+            `pa.ipc.new_stream`, `pq.ParquetWriter`, `pa.csv.CSVWriter`)
+
+    Yields:
+        Fragmentos binarios conforme el writer los produce
+    """
+    sink = _ChunkSink()
+    with open_writer(sink, arrow_schema(schema)) as writer:
+        yield sink.drain()
+
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_batch(record_batch(batch, schema))
+                batch.clear()
+                yield sink.drain()
+
+        if batch:
+            writer.write_batch(record_batch(batch, schema))
+
+    yield sink.drain()
+
+
+def arrow_ipc_stream(
+    rows: AsyncIterator, schema: type[BaseModel], batch_size: int
+) -> AsyncIterator[bytes]:
+    """Escribe el histórico como un Arrow IPC stream, un record batch a la vez."""
+    return write_record_batches(rows, schema, batch_size, pa.ipc.new_stream)
+
+
+def _cast_column(column: pa.ChunkedArray, arrow_type: pa.DataType) -> pa.ChunkedArray:
+    """Convierte una columna al tipo de la respuesta (sin copia si ya lo tiene)."""
+    if pa.types.is_decimal(column.type) and pa.types.is_floating(arrow_type):
+        # decimal -> float64 directo no redondea igual que float(Decimal);
+        # pasando por el texto el valor coincide con el de las filas
+        column = column.cast(pa.string())
+    return column.cast(arrow_type)
+
+
+def response_table(table: pa.Table, schema: type[BaseModel]) -> pa.Table:
+    """
+    Columnas del schema de respuesta, con sus tipos, tomadas de una tabla Arrow.
+
+    Args:
+        table: Tabla con al menos las columnas del schema (p. ej. la caché en
+            disco, con Numeric como decimal128)
+        schema: Schema de respuesta; define columnas, orden y tipos
+
+    Returns:
+        Tabla con el mismo schema Arrow que `record_batch`
+    """
+    target = arrow_schema(schema)
+    return pa.Table.from_arrays(
+        [_cast_column(table.column(field.name), field.type) for field in target],
+        schema=target,
+    )
+
+
+def arrow_ipc_stream_table(
+    table: pa.Table, schema: type[BaseModel], batch_size: int
+) -> Iterator[bytes]:
+    """Escribe una tabla Arrow como Arrow IPC stream, un record batch a la vez."""
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, arrow_schema(schema)) as writer:
+        yield sink.drain()
+        for batch in response_table(table, schema).to_batches(batch_size):
+            writer.write_batch(batch)
+            yield sink.drain()
+
+    yield sink.drain()
+
+
+def columnar_json_table(table: pa.Table, schema: type[BaseModel]) -> bytes:
+    """Serializa una tabla Arrow como JSON columnar (igual que `columnar_json`)."""
+    table = response_table(table, schema)
+    document = {
+        "count": table.num_rows,
+        "columns": {
+            name: table.column(name).to_pylist() for name in table.column_names
+        },
+    }
+    return orjson.dumps(document, option=orjson.OPT_UTC_Z)
+
+
+def columnar_json(rows: Sequence, schema: type[BaseModel]) -> bytes:
+    """
+    Serializa el histórico como JSON columnar.
+
+    Args:
+        rows: Filas del histórico
+        schema: Schema de respuesta; define columnas y orden
+
+    Returns:
+        Documento `{"count": n, "columns": {nombre: [valores]}}` en bytes
+    """
+    document = {"count": len(rows), "columns": build_columns(rows, schema)}
+    return orjson.dumps(document, option=orjson.OPT_UTC_Z)
@@ -0,0 +1,397 @@
+"""
+Caché en memoria del estado actual (última comunicación) de cada dispositivo.
+
+`/communications/latest` es el endpoint que más consultan los dashboards y cada
+llamada iba a `communications_current_state`. La caché guarda por device_id la
+misma fila que tiene la tabla, de modo que el estado actual se responde sin
+ir a la base de datos:
+
+- Al arrancar se carga completa desde `communications_current_state`; hasta
+  entonces (o si la carga falla) las consultas van a la base de datos.
+- Después se mantiene al día con el stream de posiciones de Kafka
+  (`KAFKA_TOPIC`). Los mensajes pueden traer solo algunos campos: se combinan
+  con los guardados, y un mensaje más antiguo que el estado guardado se
+  descarta.
+- Un dispositivo que no está en la caché se consulta en la base de datos y se
+  agrega.
+- Solo se sirve mientras está al día (`serving`): con el circuit breaker de
+  Kafka abierto, o si pasan CURRENT_STATE_MAX_STALENESS_SECS sin mensajes
+  (desde la carga o el último mensaje), las consultas vuelven a la base de
+  datos hasta que lleguen mensajes otra vez.
+
+Además guarda la última comunicación de cada (device_id, msg_class): la tabla
+tiene una sola fila por dispositivo, así que `class=ALERT` no encontraba la
+última alerta si después llegó un STATUS. Esas entradas se llenan con los
+mensajes de Kafka que traen msg_class, con los del topic de alertas
+(`KAFKA_ALERTS_TOPIC`, como ALERT si no traen clase) y, si faltan, con una
+consulta al histórico. Que un dispositivo no tiene mensajes de la clase se
+recuerda durante CURRENT_STATE_ABSENT_TTL_SECS, o hasta que llegue uno.
+
+Como el índice espacial, vive en el event loop y no necesita locks.
+"""
+
+import logging
+import time
+from collections.abc import Iterable
+from datetime import UTC
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import BigInteger, DateTime, Integer, Numeric, select
+
+from app.core.config import settings
+from app.models.communications import CommunicationCurrentState
+from app.services.geo_index import kafka_datetime, position_from_kafka_event
+from app.services.kafka_client import kafka_client
+
+logger = logging.getLogger(__name__)
+
+# Clase de los mensajes del topic de alertas que no traen msg_class
+ALERT_MSG_CLASS = "ALERT"
+
+# Columnas de communications_current_state, en el orden de la tabla
+STATE_FIELDS = tuple(c.name for c in CommunicationCurrentState.__table__.c)
+
+_STATE_TYPES = {c.name: c.type for c in CommunicationCurrentState.__table__.c}
+
+
+def _coerce(column_type, value):
+    """
+    Convierte un valor recibido por Kafka al tipo de la columna.
+
+    Returns:
+        El valor convertido, o None si no es válido para la columna
+    """
+    if value is None:
+        return None
+    try:
+        if isinstance(column_type, Integer | BigInteger):
+            return int(value)
+        if isinstance(column_type, Numeric):
+            number = Decimal(str(value))
+            return number if number.is_finite() else None
+        if isinstance(column_type, DateTime):
+            return kafka_datetime(value)
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+    return str(value)
+
+
+def state_from_kafka_event(kafka_event: dict) -> dict | None:
+    """
+    Extrae los campos del estado actual de un mensaje del topic de posiciones.
+
+    Solo se conservan las columnas presentes en el mensaje; received_epoch se
+    deriva de received_at si no viene (el ETag de /latest depende de él).
+    """
+    position = position_from_kafka_event(kafka_event)
+    if position is None or not position.get("device_id"):
+        return None
+
+    state = {
+        name: _coerce(_STATE_TYPES[name], position[name])
+        for name in STATE_FIELDS
+        if name in position
+    }
+    if state.get("received_epoch") is None and state.get("received_at") is not None:
+        state["received_epoch"] = int(
+            state["received_at"].replace(tzinfo=UTC).timestamp()
+        )
+    return state
+
+
+def alert_state_from_kafka_event(kafka_event: dict) -> dict | None:
+    """
+    Extrae los campos del estado actual de un mensaje del topic de alertas.
+
+    Los campos pueden venir en la raíz, en `data` o en `payload` (la posición
+    de la alerta); un mensaje sin msg_class se registra como ALERT.
+    """
+    payload = kafka_event.get("payload")
+    if not isinstance(payload, dict):
+        return None
+
+    inner = payload.get("payload") if isinstance(payload.get("payload"), dict) else {}
+    state = state_from_kafka_event({**kafka_event, "payload": {**inner, **payload}})
+    if state is not None and not state.get("msg_class"):
+        state["msg_class"] = ALERT_MSG_CLASS
+    return state
+
+
+def _is_older(state: dict, current: CommunicationCurrentState) -> bool:
+    received_at = state.get("received_at")
+    return (
+        received_at is not None
+        and current.received_at is not None
+        and received_at < current.received_at
+    )
+
+
+def _is_newer(state: dict, current: CommunicationCurrentState) -> bool:
+    received_at = state.get("received_at")
+    return (
+        received_at is not None
+        and current.received_at is not None
+        and received_at > current.received_at
+    )
+
+
+def _merged(current: CommunicationCurrentState | None, state: dict) -> dict:
+    if current is None:
+        return state
+    return {**{name: getattr(current, name) for name in STATE_FIELDS}, **state}
+
+
+def _build(state: dict) -> CommunicationCurrentState:
+    return CommunicationCurrentState(**{name: state.get(name) for name in STATE_FIELDS})
+
+
+class CurrentStateCache:
+    """Estado actual por device_id y por (device_id, msg_class)."""
+
+    def __init__(self):
+        self._states: dict[str, CommunicationCurrentState] = {}
+        self._by_class: dict[tuple[str, str], CommunicationCurrentState] = {}
+        # (device_id, msg_class) sin mensajes de la clase -> hasta cuándo
+        # (time.monotonic()) se recuerda
+        self._absent_until: dict[tuple[str, str], float] = {}
+        # received_epoch -> dispositivos cuyo estado actual tiene ese epoch
+        self._by_epoch: dict[int, set[str]] = {}
+        self._max_epoch: int | None = None
+        self.ready = False
+        # time.monotonic() de la carga o del último mensaje de Kafka
+        self.updated_at: float | None = None
+
+    def mark_ready(self) -> None:
+        """Marca la caché como cargada y al día."""
+        self.ready = True
+        self.touch()
+
+    def touch(self) -> None:
+        """Registra que llegó un mensaje de Kafka (la caché sigue al día)."""
+        self.updated_at = time.monotonic()
+
+    @property
+    def serving(self) -> bool:
+        """
+        Indica si las consultas se pueden responder desde la caché.
+
+        Requiere la carga inicial, el circuit breaker de Kafka cerrado y un
+        mensaje (o la carga) hace menos de CURRENT_STATE_MAX_STALENESS_SECS;
+        si no, los cambios recientes podrían no estar en la caché.
+        """
+        return (
+            self.ready
+            and self.updated_at is not None
+            and time.monotonic() - self.updated_at
+            <= settings.CURRENT_STATE_MAX_STALENESS_SECS
+            and not kafka_client.circuit_breaker_status()["open"]
+        )
+
+    def upsert(self, state: dict) -> bool:
+        """
+        Combina el estado recibido con el guardado del dispositivo.
+
+        Cada actualización crea una instancia nueva: las que ya se entregaron
+        a una petición no cambian mientras se serializan.
+
+        Returns:
+            True si el estado se guardó; False si es más antiguo que el actual
+        """
+        device_id = state.get("device_id")
+        if not device_id:
+            return False
+
+        current = self._states.get(device_id)
+        if current is not None and _is_older(state, current):
+            # Puede seguir siendo el más reciente de su clase
+            self.upsert_class(state)
+            return False
+
+        instance = _build(_merged(current, state))
+        self._states[device_id] = instance
+        self._index_epoch(current, instance)
+        if state.get("msg_class"):
+            key = (device_id, state["msg_class"])
+            self._by_class[key] = instance
+            self._absent_until.pop(key, None)
+        return True
+
+    def upsert_from_class(self, state: dict) -> None:
+        """
+        Guarda la última comunicación de una clase leída del histórico.
+
+        Una fila filtrada por clase no es la última comunicación del
+        dispositivo: solo actualiza su estado si el dispositivo ya está en la
+        caché y la fila es más reciente que el estado guardado.
+        """
+        current = self._states.get(state.get("device_id"))
+        if current is not None and _is_newer(state, current):
+            self.upsert(state)
+        else:
+            self.upsert_class(state)
+
+    def upsert_class(self, state: dict) -> None:
+        """
+        Actualiza solo la última comunicación de la clase del mensaje (no el
+        estado del dispositivo), si no es más antigua que la guardada.
+        """
+        if not state.get("device_id") or not state.get("msg_class"):
+            return
+        key = (state["device_id"], state["msg_class"])
+        current = self._by_class.get(key)
+        if current is None or not _is_older(state, current):
+            self._by_class[key] = _build(_merged(current, state))
+            self._absent_until.pop(key, None)
+
+    def _index_epoch(
+        self,
+        previous: CommunicationCurrentState | None,
+        state: CommunicationCurrentState,
+    ) -> None:
+        if previous is not None and previous.received_epoch is not None:
+            devices = self._by_epoch.get(previous.received_epoch)
+            if devices is not None:
+                devices.discard(previous.device_id)
+                if not devices:
+                    del self._by_epoch[previous.received_epoch]
+
+        epoch = state.received_epoch
+        if epoch is None:
+            return
+        self._by_epoch.setdefault(epoch, set()).add(state.device_id)
+        if self._max_epoch is None or epoch > self._max_epoch:
+            self._max_epoch = epoch
+
+    def changed_since(self, since: int) -> list[CommunicationCurrentState]:
+        """
+        Estados con received_epoch mayor que since, del más antiguo al más nuevo.
+
+        Recorre los segundos entre since y el epoch más reciente, o los epochs
+        indexados si son menos: el costo depende de la actividad, no del
+        tamaño de la flota.
+        """
+        if self._max_epoch is None or since >= self._max_epoch:
+            return []
+
+        if self._max_epoch - since <= len(self._by_epoch):
+            epochs = range(since + 1, self._max_epoch + 1)
+        else:
+            epochs = sorted(epoch for epoch in self._by_epoch if epoch > since)
+
+        return [
+            self._states[device_id]
+            for epoch in epochs
+            for device_id in self._by_epoch.get(epoch, ())
+        ]
+
+    def get_class(
+        self, device_id: str, msg_class: str
+    ) -> tuple[bool, CommunicationCurrentState | None]:
+        """
+        Busca la última comunicación de una clase de mensaje del dispositivo.
+
+        Returns:
+            (si la caché conoce la respuesta, estado o None si no hay mensajes
+            de la clase)
+        """
+        key = (device_id, msg_class)
+        state = self._by_class.get(key)
+        if state is not None:
+            return True, state
+
+        absent_until = self._absent_until.get(key)
+        if absent_until is None:
+            return False, None
+        if time.monotonic() >= absent_until:
+            del self._absent_until[key]
+            return False, None
+        return True, None
+
+    def set_class_absent(self, device_id: str, msg_class: str) -> None:
+        """
+        Registra que el dispositivo no tiene mensajes de la clase, durante
+        CURRENT_STATE_ABSENT_TTL_SECS (un mensaje de la clase lo reemplaza).
+        """
+        key = (device_id, msg_class)
+        if key not in self._by_class:
+            self._absent_until[key] = (
+                time.monotonic() + settings.CURRENT_STATE_ABSENT_TTL_SECS
+            )
+
+    def get_many(
+        self, device_ids: Iterable[str]
+    ) -> tuple[list[CommunicationCurrentState], list[str]]:
+        """
+        Busca el estado de varios dispositivos.
+
+        Returns:
+            (estados encontrados en el orden pedido, device_ids sin estado)
+        """
+        found, missing = [], []
+        for device_id in dict.fromkeys(device_ids):
+            state = self._states.get(device_id)
+            if state is None:
+                missing.append(device_id)
+            else:
+                found.append(state)
+        return found, missing
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._by_class.clear()
+        self._absent_until.clear()
+        self._by_epoch.clear()
+        self._max_epoch = None
+        self.ready = False
+        self.updated_at = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
+current_state = CurrentStateCache()
+
+
+async def load_current_state(session) -> int:
+    """
+    Carga la caché desde `communications_current_state` y la marca lista.
+
+    Args:
+        session: Sesión de base de datos
+
+    Returns:
+        Número de dispositivos cargados
+    """
+    columns = [getattr(CommunicationCurrentState, name) for name in STATE_FIELDS]
+    result = await session.stream(select(*columns))
+    loaded = 0
+    async for row in result:
+        loaded += current_state.upsert(dict(zip(STATE_FIELDS, row, strict=True)))
+    current_state.mark_ready()
+    return loaded
+
+
+async def current_state_message_handler(kafka_event: dict):
+    """
+    Actualiza la caché con cada posición recibida de Kafka; las alertas
+    (KAFKA_ALERTS_TOPIC) solo actualizan la última comunicación de su clase.
+    """
+    topic = kafka_event.get("topic")
+    if topic == settings.KAFKA_TOPIC:
+        current_state.touch()
+        state = state_from_kafka_event(kafka_event)
+        if state is not None:
+            current_state.upsert(state)
+    elif settings.KAFKA_ALERTS_TOPIC and topic == settings.KAFKA_ALERTS_TOPIC:
+        current_state.touch()
+        state = alert_state_from_kafka_event(kafka_event)
+        if state is not None:
+            current_state.upsert_class(state)
+
+
+def start_current_state_bridge():
+    """Registra el callback Kafka -> caché de estado actual."""
+    kafka_client.register_message_callback(current_state_message_handler)
+    logger.info(
+        f"✅ Kafka -> caché de estado actual iniciado (topic: {settings.KAFKA_TOPIC})"
+    )
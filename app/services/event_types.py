@@ -0,0 +1,120 @@
+"""
+Catálogo en memoria de `event_types` (id -> code).
+
+Cada página de /events hacía JOIN con `event_types` solo para traducir
+event_type_id a su código. El catálogo es pequeño y casi no cambia: se carga
+al arrancar y se traduce en Python, así que la consulta de eventos lee una
+sola tabla.
+
+- Se recarga cuando pasan EVENT_TYPES_CACHE_TTL_SECS desde la última carga.
+- Un id que no está en el catálogo (un tipo agregado después de la carga)
+  provoca una recarga inmediata; las recargas concurrentes se agrupan. Un
+  código desconocido también, pero si sigue sin existir no se vuelve a
+  buscar hasta la siguiente recarga (un filtro con un código inválido no
+  recarga el catálogo en cada petición).
+"""
+
+import time
+from collections.abc import Iterable
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import run_in_new_session
+from app.models.events import EventType
+from app.utils.cache import SingleFlight
+
+
+class EventTypeCatalog:
+    """Tipos de evento por id y por código."""
+
+    def __init__(self):
+        self._by_id: dict[UUID, str] = {}
+        self._ids_by_code: dict[str, UUID] = {}
+        self._unknown_codes: set[str] = set()
+        self.loaded_at: float | None = None
+        self._flight = SingleFlight()
+
+    @property
+    def expired(self) -> bool:
+        return (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at > settings.EVENT_TYPES_CACHE_TTL_SECS
+        )
+
+    async def load(self, session) -> int:
+        """
+        Recarga el catálogo desde `event_types` (una recarga a la vez, con
+        una sesión propia sobre el engine de `session`).
+
+        Returns:
+            Número de tipos de evento cargados
+        """
+        return await self._flight.do("load", run_in_new_session, session, self._load)
+
+    async def _load(self, session) -> int:
+        result = await session.execute(select(EventType.id, EventType.code))
+        by_id = dict(result.fetchall())
+
+        self._by_id = by_id
+        self._ids_by_code = {code: type_id for type_id, code in by_id.items()}
+        self._unknown_codes = set()
+        self.loaded_at = time.monotonic()
+        return len(by_id)
+
+    async def _ensure(self, session, missing: bool) -> None:
+        if missing or self.expired:
+            await self.load(session)
+
+    async def codes(self, session, type_ids: Iterable[UUID]) -> dict[UUID, str]:
+        """
+        Códigos de los tipos de evento indicados.
+
+        Args:
+            session: Sesión de base de datos (solo si hay que recargar)
+            type_ids: ids de event_types
+
+        Returns:
+            Diccionario id -> code (los ids inexistentes se omiten)
+        """
+        type_ids = set(type_ids)
+        await self._ensure(session, not type_ids <= self._by_id.keys())
+        return {
+            type_id: self._by_id[type_id]
+            for type_id in type_ids
+            if type_id in self._by_id
+        }
+
+    async def ids(self, session, codes: Iterable[str]) -> list[UUID]:
+        """
+        ids de los tipos de evento con los códigos indicados.
+
+        Args:
+            session: Sesión de base de datos (solo si hay que recargar)
+            codes: Códigos de tipo de evento
+
+        Returns:
+            ids de los códigos existentes (los desconocidos se omiten)
+        """
+        codes = set(codes)
+        missing = codes - self._ids_by_code.keys() - self._unknown_codes
+        await self._ensure(session, bool(missing))
+        self._unknown_codes |= codes - self._ids_by_code.keys()
+        return [
+            self._ids_by_code[code]
+            for code in sorted(codes)
+            if code in self._ids_by_code
+        ]
+
+    def clear(self) -> None:
+        self._by_id = {}
+        self._ids_by_code = {}
+        self._unknown_codes = set()
+        self.loaded_at = None
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+
+event_types = EventTypeCatalog()
@@ -7,10 +7,18 @@ import json
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import String, and_, asc, cast, desc, or_, select
+from sqlalchemy import asc, bindparam, desc, func, select, true, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.events import Event, EventType
+from app.core.database import run_in_new_session
+from app.models.events import Event
+from app.services.event_types import event_types
+from app.utils.cache import SingleFlight
+
+# Páginas idénticas pedidas al mismo tiempo comparten una sola consulta, con
+# una sesión propia (run_in_new_session) y no la del primer llamador
+single_flight = SingleFlight()
 
 
 def encode_cursor(occurred_at: datetime, event_id: UUID) -> str:
@@ -55,7 +63,76 @@ def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
         raise ValueError(f"Cursor inválido: {e}") from e
 
 
-async def get_events(  # noqa: PLR0913
+def _keyset_clause(is_desc: bool, cursor_oa: datetime, cursor_id: UUID):
+    """
+    Predicado keyset para continuar después del cursor.
+
+    Comparación de fila nativa sobre (occurred_at, id) con el id como UUID:
+    coincide con ORDER BY occurred_at, id y se resuelve como un rango del
+    índice (unit_id, occurred_at, id), así que una página profunda cuesta lo
+    mismo que la primera.
+    - DESC: (occurred_at, id) < (cursor_oa, cursor_id)
+    - ASC: (occurred_at, id) > (cursor_oa, cursor_id)
+    """
+    keyset = tuple_(Event.occurred_at, Event.id)
+    cursor_key = tuple_(cursor_oa, cursor_id)
+    return keyset < cursor_key if is_desc else keyset > cursor_key
+
+
+_EVENT_COLUMNS = (
+    Event.id,
+    Event.unit_id,
+    Event.source_id,
+    Event.event_type_id,
+    Event.occurred_at,
+    Event.received_at,
+    Event.source_epoch,
+)
+
+
+def _ordered(query, columns, is_desc: bool):
+    """Ordena por (occurred_at, id) en la dirección de la página."""
+    direction = desc if is_desc else asc
+    return query.order_by(direction(columns.occurred_at), direction(columns.id))
+
+
+def _page_query(unit_ids: list[UUID], clauses: list, is_desc: bool, limit: int):
+    """
+    Página de eventos de las unidades (sin el filtro por unit_id en `clauses`).
+
+    Con varias unidades, `unit_id IN (...)` no entrega las filas en el orden
+    de (occurred_at, id): Postgres lee y ordena los eventos de todas las
+    unidades en el rango antes del LIMIT, y una unidad con muchos eventos
+    domina la consulta. Como en el histórico de comunicaciones, se usa
+    `unnest(ids) CROSS JOIN LATERAL (... LIMIT n)`: cada unidad es un escaneo
+    acotado del índice (unit_id, occurred_at, id) y solo se ordenan n filas
+    por unidad.
+    """
+    if len(unit_ids) == 1:
+        query = select(*_EVENT_COLUMNS).where(Event.unit_id == unit_ids[0], *clauses)
+        return _ordered(query, Event, is_desc).limit(limit)
+
+    units = (
+        func.unnest(
+            bindparam("unit_ids", list(unit_ids), type_=ARRAY(Event.unit_id.type))
+        )
+        .table_valued("unit_id")
+        .render_derived(name="units")
+    )
+    per_unit = (
+        _ordered(
+            select(*_EVENT_COLUMNS).where(Event.unit_id == units.c.unit_id, *clauses),
+            Event,
+            is_desc,
+        )
+        .limit(limit)
+        .lateral()
+    )
+    query = select(*per_unit.c).select_from(units).join(per_unit, true())
+    return _ordered(query, per_unit.c, is_desc).limit(limit)
+
+
+async def get_events(  # noqa: PLR0913, PLR0917
     session: AsyncSession,
     unit_ids: list[UUID],
     from_dt: datetime,
@@ -63,6 +140,7 @@ async def get_events(  # noqa: PLR0913
     limit: int = 20,
     order: str = "desc",
     cursor: str | None = None,
+    event_type_codes: list[str] | None = None,
 ) -> tuple[list[dict], str | None]:
     """
     Obtiene eventos con paginación por keyset cursor.
@@ -75,18 +153,63 @@ async def get_events(  # noqa: PLR0913
         limit: cantidad de registros a retornar (default 20, max 200)
         order: 'desc' u 'asc' para ordenar por occurred_at
         cursor: cursor opaco para continuar desde un punto anterior
+        event_type_codes: códigos de tipo de evento a filtrar (opcional)
 
     Returns:
         Tupla (eventos, next_cursor):
         - eventos: lista de dicts con unit_id, source_id, event_type, occurred_at, received_at, source_epoch
         - next_cursor: cursor para la siguiente página, None si no hay más
+
+    La consulta lee solo la tabla events: event_type_id se traduce a su
+    código con el catálogo en memoria de event_types, y el filtro por código
+    se convierte en `event_type_id IN (...)`. Los eventos de un tipo que no
+    está en event_types se omiten, como con el JOIN.
+
+    Con varias unidades la página es la unión de una página por unidad (ver
+    `_page_query`).
+
+    Las llamadas concurrentes con los mismos argumentos comparten una sola
+    consulta; el resultado no se debe modificar.
     """
+    key = (
+        tuple(sorted(set(unit_ids))),
+        from_dt,
+        to_dt,
+        limit,
+        order.lower(),
+        cursor,
+        tuple(sorted(set(event_type_codes))) if event_type_codes else None,
+    )
+    return await single_flight.do(
+        key,
+        run_in_new_session,
+        session,
+        _get_events,
+        unit_ids,
+        from_dt,
+        to_dt,
+        limit,
+        order,
+        cursor,
+        event_type_codes,
+    )
+
+
+async def _get_events(  # noqa: PLR0913, PLR0917
+    session: AsyncSession,
+    unit_ids: list[UUID],
+    from_dt: datetime,
+    to_dt: datetime,
+    limit: int,
+    order: str,
+    cursor: str | None,
+    event_type_codes: list[str] | None = None,
+) -> tuple[list[dict], str | None]:
     # Determinar dirección de ordenamiento
     is_desc = order.lower() == "desc"
 
-    # Construir clausula WHERE base
+    # Construir clausula WHERE base (el filtro por unidad va en _page_query)
     where_clauses = [
-        Event.unit_id.in_(unit_ids),
         Event.occurred_at >= from_dt,
         Event.occurred_at <= to_dt,
     ]
@@ -98,53 +221,21 @@ async def get_events(  # noqa: PLR0913
         except ValueError:
             raise ValueError("Cursor inválido") from None
 
-        # Keyset: comparación de tupla (occurred_at, id)
-        # DESC: ir atrás en el tiempo (menor occurred_at o igual con menor id)
-        # ASC: ir adelante en el tiempo (mayor occurred_at o igual con mayor id)
-        if is_desc:
-            where_clauses.append(
-                or_(
-                    Event.occurred_at < cursor_oa,
-                    and_(
-                        Event.occurred_at == cursor_oa,
-                        cast(Event.id, String) < str(cursor_id),
-                    ),
-                )
-            )
-        else:
-            where_clauses.append(
-                or_(
-                    Event.occurred_at > cursor_oa,
-                    and_(
-                        Event.occurred_at == cursor_oa,
-                        cast(Event.id, String) > str(cursor_id),
-                    ),
-                )
-            )
-
-    # Construir query con JOIN
-    query = (
-        select(
-            Event.id,
-            Event.unit_id,
-            Event.source_id,
-            EventType.code,
-            Event.occurred_at,
-            Event.received_at,
-            Event.source_epoch,
-        )
-        .join(EventType, Event.event_type_id == EventType.id)
-        .where(and_(*where_clauses))
-    )
+        where_clauses.append(_keyset_clause(is_desc, cursor_oa, cursor_id))
 
-    # Ordenamiento
-    if is_desc:
-        query = query.order_by(desc(Event.occurred_at), desc(Event.id))
-    else:
-        query = query.order_by(asc(Event.occurred_at), asc(Event.id))
+    # Filtro por código de tipo de evento, resuelto con el catálogo en memoria
+    if event_type_codes:
+        type_ids = await event_types.ids(session, event_type_codes)
+        if not type_ids:
+            return [], None
+        where_clauses.append(Event.event_type_id.in_(type_ids))
 
-    # Fetch limit+1 para detectar si hay página siguiente
-    query = query.limit(limit + 1)
+    # Construir query sobre la tabla events (sin JOIN); una unidad repetida
+    # duplicaría sus eventos en la consulta por unidad. Se piden limit+1
+    # filas para detectar si hay página siguiente
+    query = _page_query(
+        list(dict.fromkeys(unit_ids)), where_clauses, is_desc, limit + 1
+    )
 
     result = await session.execute(query)
     rows = result.fetchall()
@@ -161,13 +252,19 @@ async def get_events(  # noqa: PLR0913
         last_row = rows[-1]
         next_cursor = encode_cursor(last_row[4], last_row[0])  # occurred_at, id
 
-    # Convertir filas a dicts
+    # Convertir filas a dicts; event_type_id -> code con el catálogo. Como con
+    # el JOIN a event_types, se omiten los eventos de un tipo que no está en
+    # el catálogo (el cursor sigue siendo el de la última fila leída)
+    codes = await event_types.codes(session, {row[3] for row in rows})
     for row in rows:
+        if row[3] not in codes:
+            continue
         events.append(
             {
                 "unit_id": row[1],
                 "source_id": row[2],
-                "code": row[3],  # Será mapeado a event_type en Pydantic
+                # Será mapeado a event_type en Pydantic
+                "code": codes[row[3]],
                 "occurred_at": row[4],
                 "received_at": row[5],
                 "source_epoch": row[6],
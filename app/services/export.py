@@ -0,0 +1,48 @@
+"""
+Exportación del histórico de comunicaciones a CSV y Parquet.
+
+Pensado para auditorías de flota completa: las filas se leen con el cursor del
+servidor (`stream_communications`) y se escriben por bloques (row groups en
+Parquet) con los writers de pyarrow, sin trabajo por fila de Pydantic. La
+memoria queda acotada a un bloque sin importar el tamaño de la exportación.
+"""
+
+from collections.abc import AsyncIterator
+
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from app.schemas.communications import CommunicationFullResponse
+from app.services.columnar import write_record_batches
+
+# Schema exportado: todos los campos disponibles
+EXPORT_SCHEMA = CommunicationFullResponse
+
+
+def _parquet_writer(sink, schema) -> pq.ParquetWriter:
+    return pq.ParquetWriter(sink, schema, compression="zstd")
+
+
+# formato -> (media type, extensión, fábrica del writer)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv", pa_csv.CSVWriter),
+    "parquet": ("application/vnd.apache.parquet", "parquet", _parquet_writer),
+}
+
+
+def export_communications(
+    rows: AsyncIterator, export_format: str, row_group_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Escribe el histórico en el formato de exportación indicado.
+
+    Args:
+        rows: Iterador asíncrono de filas (p. ej. `stream_communications`)
+        export_format: Clave de EXPORT_FORMATS ("csv" o "parquet")
+        row_group_size: Filas por bloque escrito (row group en Parquet)
+
+    Returns:
+        Iterador asíncrono con los fragmentos binarios del archivo
+    """
+    _, _, open_writer = EXPORT_FORMATS[export_format]
+    return write_record_batches(rows, EXPORT_SCHEMA, row_group_size, open_writer)
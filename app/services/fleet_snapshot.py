@@ -0,0 +1,151 @@
+"""
+Snapshots pre-serializados del estado actual por grupo de dispositivos.
+
+El mapa "todos mis vehículos" pide una y otra vez el estado actual de los
+mismos miles de dispositivos. Para esos grupos (configurados en
+FLEET_SNAPSHOT_GROUPS_FILE, un JSON `{"grupo": ["device_id", ...]}`) una
+tarea en segundo plano construye cada FLEET_SNAPSHOT_REFRESH_SECS el JSON de
+la respuesta ya comprimido en cada codificación soportada; la petición solo
+elige los bytes, sin consultas ni serialización.
+
+- Cada snapshot tiene un número de generación que sube cuando su contenido
+  cambia; si el contenido es el mismo no se vuelve a comprimir.
+- Un snapshot con más de FLEET_SNAPSHOT_MAX_STALENESS_SECS (la tarea se
+  atrasó o falló) no se sirve: la petición lo reconstruye, y las peticiones
+  concurrentes del mismo grupo comparten esa reconstrucción.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import UTC, datetime
+
+from app.core.config import settings
+from app.core.middleware import ENCODERS
+from app.schemas.communications import CommunicationLatestResponse
+from app.services.repository import get_latest_communications
+from app.services.serialization import dump_rows
+from app.utils.cache import SingleFlight
+from app.utils.http_cache import make_etag
+
+logger = logging.getLogger(__name__)
+
+
+class FleetSnapshot:
+    """Respuesta de un grupo, serializada y comprimida."""
+
+    def __init__(self, generation: int, body: bytes):
+        self.generation = generation
+        self.body = body
+        self.etag = make_etag(settings.APP_VERSION, body)
+        self.encoded = {encoding: _compress(encoding, body) for encoding in ENCODERS}
+        self.built_at = time.monotonic()
+        self.last_modified = datetime.now(UTC)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def content(self, encoding: str | None) -> bytes:
+        """Bytes en la codificación pedida (None = sin comprimir)."""
+        return self.body if encoding is None else self.encoded[encoding]
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    encoder = ENCODERS[encoding]()
+    return encoder.chunk(body) + encoder.finish()
+
+
+class FleetSnapshotStore:
+    """Snapshots de los grupos configurados y su reconstrucción."""
+
+    def __init__(self, groups: dict[str, list[str]]):
+        self.groups = groups
+        self._snapshots: dict[str, FleetSnapshot] = {}
+        self._flight = SingleFlight()
+
+    def get(self, group: str) -> FleetSnapshot | None:
+        """Snapshot del grupo si existe y no supera la antigüedad máxima."""
+        snapshot = self._snapshots.get(group)
+        if (
+            snapshot is None
+            or snapshot.age > settings.FLEET_SNAPSHOT_MAX_STALENESS_SECS
+        ):
+            return None
+        return snapshot
+
+    async def refresh(self, session, group: str) -> FleetSnapshot:
+        """
+        Reconstruye el snapshot de un grupo.
+
+        Args:
+            session: Sesión de base de datos (solo para dispositivos que no
+                están en la caché de estado actual)
+            group: Nombre del grupo
+
+        Returns:
+            El snapshot nuevo (con la misma generación si no cambió)
+        """
+        return await self._flight.do(group, self._refresh, session, group)
+
+    async def _refresh(self, session, group: str) -> FleetSnapshot:
+        states = await get_latest_communications(session, self.groups[group])
+        body = dump_rows(states, CommunicationLatestResponse)
+
+        previous = self._snapshots.get(group)
+        if previous is not None and previous.body == body:
+            previous.built_at = time.monotonic()
+            return previous
+
+        generation = previous.generation + 1 if previous is not None else 1
+        snapshot = FleetSnapshot(generation, body)
+        self._snapshots[group] = snapshot
+        return snapshot
+
+    async def refresh_all(self, session) -> None:
+        for group in self.groups:
+            await self.refresh(session, group)
+
+
+def load_groups(path: str) -> dict[str, list[str]]:
+    """
+    Lee los grupos de dispositivos de un archivo JSON.
+
+    Raises:
+        ValueError: si el archivo no es un objeto de listas de device_ids
+    """
+    with open(path, encoding="utf-8") as file:
+        groups = json.load(file)
+
+    if not isinstance(groups, dict) or not all(
+        isinstance(device_ids, list) for device_ids in groups.values()
+    ):
+        raise ValueError(f"{path}: se esperaba {{'grupo': ['device_id', ...]}}")
+    return {
+        str(group): list(dict.fromkeys(map(str, device_ids)))
+        for group, device_ids in groups.items()
+    }
+
+
+fleet_snapshots = (
+    FleetSnapshotStore(load_groups(settings.FLEET_SNAPSHOT_GROUPS_FILE))
+    if settings.FLEET_SNAPSHOT_GROUPS_FILE
+    else None
+)
+
+
+async def refresh_fleet_snapshots(session_factory) -> None:
+    """
+    Tarea en segundo plano: reconstruye todos los snapshots periódicamente.
+
+    Args:
+        session_factory: Fábrica de sesiones de base de datos
+    """
+    while True:
+        try:
+            async with session_factory() as session:
+                await fleet_snapshots.refresh_all(session)
+        except Exception as e:
+            logger.error(f"Error al reconstruir los snapshots de flota: {e}")
+        await asyncio.sleep(settings.FLEET_SNAPSHOT_REFRESH_SECS)
@@ -0,0 +1,427 @@
+"""
+Índice espacial en memoria sobre la posición actual de cada dispositivo.
+
+Las consolas de despacho preguntan "qué unidades están dentro de este
+viewport/geocerca"; responderlo desde `communications_current_state` obliga a
+recorrer toda la flota en Postgres. El índice mantiene la última posición de
+cada dispositivo en una rejilla uniforme de celdas de GEO_INDEX_CELL_DEGREES
+grados, de modo que una consulta solo revisa los dispositivos de las celdas
+que toca el rectángulo, o de los anillos de celdas alrededor del punto en la
+búsqueda de los k más cercanos.
+
+- Al arrancar se carga desde `communications_current_state`.
+- Después se mantiene al día con el stream de posiciones de Kafka
+  (`KAFKA_TOPIC`); una posición más antigua que la guardada se descarta.
+
+El índice vive en el event loop (los callbacks de Kafka se ejecutan en él),
+así que no necesita locks.
+"""
+
+import heapq
+import logging
+import math
+from collections.abc import Callable, Iterable, Sequence
+from datetime import UTC, datetime
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.communications import CommunicationCurrentState
+from app.services.kafka_client import kafka_client
+from app.utils.geo import EARTH_RADIUS_M, MAX_LATITUDE, MAX_LONGITUDE, haversine_m
+
+logger = logging.getLogger(__name__)
+
+# Columnas guardadas por dispositivo
+POSITION_FIELDS = (
+    "device_id",
+    "latitude",
+    "longitude",
+    "speed",
+    "engine_status",
+    "fix_status",
+    "received_at",
+)
+
+
+def _to_float(value) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def kafka_datetime(value) -> datetime | None:
+    """
+    Normaliza una fecha recibida por Kafka (datetime o ISO 8601) a datetime
+    naive en UTC, como en la base de datos; None si no es válida.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return value
+
+
+def point_in_polygon(
+    latitude: float, longitude: float, polygon: Sequence[tuple[float, float]]
+) -> bool:
+    """
+    Ray casting: indica si el punto está dentro del polígono (lat, lon).
+
+    El polígono puede venir cerrado o abierto (el último vértice se une con el
+    primero).
+    """
+    inside = False
+    lat_j, lon_j = polygon[-1]
+    for lat_i, lon_i in polygon:
+        if (lat_i > latitude) != (lat_j > latitude) and longitude < (lon_j - lon_i) * (
+            latitude - lat_i
+        ) / (lat_j - lat_i) + lon_i:
+            inside = not inside
+        lat_j, lon_j = lat_i, lon_i
+    return inside
+
+
+class GeoGridIndex:
+    """Rejilla lat/lon con la última posición de cada dispositivo."""
+
+    def __init__(self, cell_degrees: float):
+        self.cell_degrees = cell_degrees
+        self._positions: dict[str, dict] = {}
+        self._cells: dict[tuple[int, int], set[str]] = {}
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / self.cell_degrees),
+            math.floor(longitude / self.cell_degrees),
+        )
+
+    def upsert(self, position: dict) -> bool:
+        """
+        Guarda la posición de un dispositivo, moviéndolo de celda si cambió.
+
+        Args:
+            position: Diccionario con al menos device_id, latitude y longitude
+
+        Returns:
+            False si la posición es inválida o más antigua que la guardada
+        """
+        device_id = position.get("device_id")
+        latitude = _to_float(position.get("latitude"))
+        longitude = _to_float(position.get("longitude"))
+        if (
+            not device_id
+            or latitude is None
+            or longitude is None
+            or not -MAX_LATITUDE <= latitude <= MAX_LATITUDE
+            or not -MAX_LONGITUDE <= longitude <= MAX_LONGITUDE
+        ):
+            return False
+
+        received_at = kafka_datetime(position.get("received_at"))
+        previous = self._positions.get(device_id)
+        if previous is not None:
+            if (
+                received_at is not None
+                and previous["received_at"] is not None
+                and received_at < previous["received_at"]
+            ):
+                return False
+            self._discard_from_cell(previous)
+
+        stored = {field: position.get(field) for field in POSITION_FIELDS}
+        stored.update(latitude=latitude, longitude=longitude, received_at=received_at)
+        stored["speed"] = _to_float(stored["speed"])
+
+        self._positions[device_id] = stored
+        self._cells.setdefault(self._cell(latitude, longitude), set()).add(device_id)
+        return True
+
+    def _discard_from_cell(self, position: dict) -> None:
+        cell = self._cell(position["latitude"], position["longitude"])
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(position["device_id"])
+            if not members:
+                del self._cells[cell]
+
+    def remove(self, device_id: str) -> None:
+        position = self._positions.pop(device_id, None)
+        if position is not None:
+            self._discard_from_cell(position)
+
+    def clear(self) -> None:
+        self._positions.clear()
+        self._cells.clear()
+
+    def get(self, device_id: str) -> dict | None:
+        return self._positions.get(device_id)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _cells_in_range(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> Iterable[set[str]]:
+        """Celdas ocupadas que tocan el rectángulo (sin cruzar el antimeridiano)."""
+        row_min, col_min = self._cell(min_lat, min_lon)
+        row_max, col_max = self._cell(max_lat, max_lon)
+
+        # Rectángulos grandes: es más barato recorrer solo las celdas ocupadas
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self._cells):
+            return [
+                members
+                for (row, col), members in self._cells.items()
+                if row_min <= row <= row_max and col_min <= col <= col_max
+            ]
+
+        cells = self._cells
+        return [
+            cells[(row, col)]
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)
+            if (row, col) in cells
+        ]
+
+    def query_bbox(
+        self, min_lat: float, min_lon: float, max_lat: float, max_lon: float
+    ) -> list[dict]:
+        """
+        Dispositivos dentro del rectángulo (bordes incluidos).
+
+        Si min_lon > max_lon el rectángulo cruza el antimeridiano.
+
+        Args:
+            min_lat: Latitud sur
+            min_lon: Longitud oeste
+            max_lat: Latitud norte
+            max_lon: Longitud este
+
+        Returns:
+            Posiciones ordenadas por device_id
+        """
+        if min_lon > max_lon:
+            ranges = [(min_lon, 180.0), (-180.0, max_lon)]
+        else:
+            ranges = [(min_lon, max_lon)]
+
+        positions = self._positions
+        found = []
+        for west, east in ranges:
+            for members in self._cells_in_range(min_lat, west, max_lat, east):
+                for device_id in members:
+                    position = positions[device_id]
+                    if (
+                        min_lat <= position["latitude"] <= max_lat
+                        and west <= position["longitude"] <= east
+                    ):
+                        found.append(position)
+
+        return sorted(
+            {p["device_id"]: p for p in found}.values(), key=lambda p: p["device_id"]
+        )
+
+    def query_polygon(self, polygon: Sequence[tuple[float, float]]) -> list[dict]:
+        """
+        Dispositivos dentro del polígono (vértices lat, lon).
+
+        Se filtra primero por el rectángulo envolvente y luego con ray casting.
+        """
+        latitudes = [lat for lat, _ in polygon]
+        longitudes = [lon for _, lon in polygon]
+        candidates = self.query_bbox(
+            min(latitudes), min(longitudes), max(latitudes), max(longitudes)
+        )
+        return [
+            p
+            for p in candidates
+            if point_in_polygon(p["latitude"], p["longitude"], polygon)
+        ]
+
+    def _ring(self, row0: int, col0: int, radius: int) -> list[tuple[int, int]]:
+        """Celdas a distancia de Chebyshev `radius` de (row0, col0)."""
+        if radius == 0:
+            return [(row0, col0)]
+        cells = [
+            (row, col)
+            for row in range(row0 - radius, row0 + radius + 1)
+            for col in (col0 - radius, col0 + radius)
+        ]
+        cells += [
+            (row, col)
+            for col in range(col0 - radius + 1, col0 + radius)
+            for row in (row0 - radius, row0 + radius)
+        ]
+        # Las columnas dan la vuelta en el antimeridiano
+        columns = round(360 / self.cell_degrees)
+        half = columns // 2
+        return [(row, (col + half) % columns - half) for row, col in cells]
+
+    def _outside_distance_m(
+        self, latitude: float, longitude: float, row0: int, col0: int, radius: int
+    ) -> float:
+        """
+        Cota inferior de la distancia a cualquier punto fuera de los anillos
+        0..radius: la menor entre el borde norte/sur (meridiano) y la
+        distancia al meridiano del borde este/oeste.
+        """
+        south = (row0 - radius) * self.cell_degrees
+        north = (row0 + radius + 1) * self.cell_degrees
+        west = (col0 - radius) * self.cell_degrees
+        east = (col0 + radius + 1) * self.cell_degrees
+
+        lat_gap = math.radians(min(latitude - south, north - latitude))
+        lon_gap = math.radians(min(longitude - west, east - longitude, 90.0))
+        cross_track = math.asin(
+            min(1.0, math.sin(lon_gap) * math.cos(math.radians(latitude)))
+        )
+        return EARTH_RADIUS_M * min(lat_gap, cross_track)
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        predicate: Callable[[dict], bool] | None = None,
+        max_distance_m: float | None = None,
+    ) -> list[tuple[float, dict]]:
+        """
+        Los k dispositivos más cercanos por distancia de gran círculo.
+
+        Recorre anillos de celdas alrededor del punto hasta tener k candidatos
+        y que ninguna celda sin revisar pueda contener uno más cercano.
+
+        Args:
+            latitude: Latitud del punto de referencia
+            longitude: Longitud del punto de referencia
+            k: Número máximo de dispositivos a devolver
+            predicate: Filtro opcional sobre la posición guardada
+            max_distance_m: Radio máximo de búsqueda en metros
+
+        Returns:
+            Lista de (distancia en metros, posición) ordenada por distancia
+        """
+        limit = math.inf if max_distance_m is None else max_distance_m
+        row0, col0 = self._cell(latitude, longitude)
+        # Celdas ocupadas ya revisadas
+        visited: set[tuple[int, int]] = set()
+        best: list[tuple[float, str, dict]] = []
+        radius = 0
+
+        while len(visited) < len(self._cells):
+            # Si los anillos ya cubren más celdas de las que hay ocupadas (punto
+            # lejos de la flota), es más barato revisar las ocupadas restantes
+            exhaustive = (2 * radius + 1) ** 2 > len(self._cells)
+            ring = list(self._cells) if exhaustive else self._ring(row0, col0, radius)
+
+            occupied = list(
+                dict.fromkeys(
+                    cell for cell in ring if cell in self._cells and cell not in visited
+                )
+            )
+            visited.update(occupied)
+            candidates = [
+                self._positions[device_id]
+                for cell in occupied
+                for device_id in self._cells[cell]
+            ]
+            if predicate is not None:
+                candidates = [p for p in candidates if predicate(p)]
+
+            if candidates:
+                distances = haversine_m(
+                    latitude,
+                    longitude,
+                    np.fromiter((p["latitude"] for p in candidates), dtype=float),
+                    np.fromiter((p["longitude"] for p in candidates), dtype=float),
+                )
+                keep = np.flatnonzero(distances <= limit)
+                if len(keep) > k:
+                    keep = keep[np.argpartition(distances[keep], k - 1)[:k]]
+                best = heapq.nsmallest(
+                    k,
+                    best
+                    + [
+                        (float(distances[i]), candidates[i]["device_id"], candidates[i])
+                        for i in keep
+                    ],
+                )
+
+            if exhaustive:
+                break
+            bound = self._outside_distance_m(latitude, longitude, row0, col0, radius)
+            if bound > limit or (len(best) == k and bound >= best[-1][0]):
+                break
+            radius += 1
+
+        return [(distance, position) for distance, _, position in best]
+
+
+geo_index = GeoGridIndex(settings.GEO_INDEX_CELL_DEGREES)
+
+
+async def load_geo_index(session) -> int:
+    """
+    Carga en el índice la posición de `communications_current_state`.
+
+    Args:
+        session: Sesión de base de datos
+
+    Returns:
+        Número de dispositivos indexados
+    """
+    columns = [getattr(CommunicationCurrentState, f) for f in POSITION_FIELDS]
+    result = await session.stream(
+        select(*columns).where(
+            CommunicationCurrentState.latitude.isnot(None),
+            CommunicationCurrentState.longitude.isnot(None),
+        )
+    )
+    loaded = 0
+    async for row in result:
+        loaded += geo_index.upsert(dict(zip(POSITION_FIELDS, row, strict=True)))
+    return loaded
+
+
+def position_from_kafka_event(kafka_event: dict) -> dict | None:
+    """
+    Extrae la posición de un mensaje del topic de posiciones.
+
+    Los campos pueden venir en `data` o en la raíz del payload; si el mensaje
+    no trae received_at se usa el timestamp de Kafka.
+    """
+    payload = kafka_event.get("payload")
+    if not isinstance(payload, dict):
+        return None
+
+    data = payload.get("data") if isinstance(payload.get("data"), dict) else {}
+    position = {**payload, **data}
+    if position.get("received_at") is None and kafka_event.get("timestamp"):
+        position["received_at"] = datetime.fromtimestamp(
+            kafka_event["timestamp"] / 1000, UTC
+        )
+    return position
+
+
+async def geo_index_message_handler(kafka_event: dict):
+    """Actualiza el índice con cada posición recibida de Kafka."""
+    if kafka_event.get("topic") != settings.KAFKA_TOPIC:
+        return
+
+    position = position_from_kafka_event(kafka_event)
+    if position is not None:
+        geo_index.upsert(position)
+
+
+def start_geo_index_bridge():
+    """Registra el callback Kafka -> índice espacial."""
+    kafka_client.register_message_callback(geo_index_message_handler)
+    logger.info(f"✅ Kafka -> índice espacial iniciado (topic: {settings.KAFKA_TOPIC})")
@@ -0,0 +1,254 @@
+"""
+Caché en disco del histórico de días cerrados por dispositivo.
+
+El histórico de un dispositivo en un día cerrado (terminado hace más de
+HISTORY_CLOSED_GRACE_SECS, ver `is_closed_day`) ya no cambia, pero cada
+consulta repetía el mismo `get_communications`. La primera consulta de un
+(device_id, día) se guarda como archivo Arrow IPC (formato file) en
+HISTORY_CACHE_DIR; las siguientes lo abren con memory map, de modo que las
+columnas se leen directo del page cache del sistema, sin copias intermedias
+ni consultas a Postgres.
+
+- Los tipos se guardan exactos (Numeric(p, s) como decimal128(p, s)), así las
+  filas reconstruidas serializan igual que las leídas de la base de datos.
+- El directorio se acota a HISTORY_CACHE_MAX_BYTES descartando los archivos
+  usados hace más tiempo (LRU por mtime, que se conserva entre reinicios).
+- La lectura y la escritura de archivos corren en un hilo (`asyncio.to_thread`)
+  para no bloquear el event loop.
+- Arrow IPC y JSON columnar se generan directo de la tabla mapeada; JSON por
+  filas, NDJSON y la simplificación de trayectoria necesitan filas y las
+  reconstruyen con `table_rows`.
+- Sin HISTORY_CACHE_DIR la caché queda deshabilitada.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import cache
+from pathlib import Path
+
+import pyarrow as pa
+from pydantic import BaseModel
+from sqlalchemy import BigInteger, DateTime, Integer, Numeric
+from sqlalchemy.engine.result import result_tuple
+
+from app.core.config import settings
+from app.services.repository import (
+    HISTORY_SOURCES,
+    get_communications,
+    is_closed_day,
+)
+from app.services.serialization import response_fields, row_to_dict
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".arrow"
+
+
+def _arrow_type(column_type) -> pa.DataType:
+    """Tipo Arrow exacto para el tipo de una columna del histórico."""
+    if isinstance(column_type, BigInteger):
+        return pa.int64()
+    if isinstance(column_type, Integer):
+        return pa.int32()
+    if isinstance(column_type, Numeric) and column_type.scale is not None:
+        return pa.decimal128(column_type.precision, column_type.scale)
+    if isinstance(column_type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+@cache
+def cache_layout(schema: type[BaseModel]) -> pa.Schema:
+    """
+    Columnas guardadas para un schema de respuesta: las del schema más id y
+    received_at (como las filas del repositorio), con el tipo de la tabla.
+    """
+    names = dict.fromkeys(("id", *response_fields(schema), "received_at"))
+    fields = []
+    for name in names:
+        column = next(
+            (
+                model.__table__.c[name]
+                for _, model in HISTORY_SOURCES
+                if name in model.__table__.c
+            ),
+            None,
+        )
+        fields.append(
+            pa.field(name, pa.string() if column is None else _arrow_type(column.type))
+        )
+    return pa.schema(fields)
+
+
+class HistoryDiskCache:
+    """Archivos Arrow por (schema, device_id, día) con desalojo LRU por tamaño."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Ruta -> tamaño, del menos al más recientemente usado
+        files = sorted(
+            self.directory.rglob(f"*{_SUFFIX}"), key=lambda p: p.stat().st_mtime
+        )
+        self._entries: OrderedDict[Path, int] = OrderedDict(
+            (path, path.stat().st_size) for path in files
+        )
+        self._size = sum(self._entries.values())
+        # get/put corren en hilos (asyncio.to_thread)
+        self._lock = threading.Lock()
+
+    def _path(self, device_id: str, day: date, schema: type[BaseModel]) -> Path:
+        digest = hashlib.blake2b(device_id.encode(), digest_size=12).hexdigest()
+        return self.directory / schema.__name__ / f"{day.isoformat()}_{digest}{_SUFFIX}"
+
+    def get(
+        self, device_id: str, day: date, schema: type[BaseModel]
+    ) -> pa.Table | None:
+        """
+        Lee el histórico guardado de un (dispositivo, día).
+
+        La tabla queda respaldada por el archivo mapeado en memoria: sus
+        columnas no se copian al leerla.
+
+        Returns:
+            Tabla con las columnas de `cache_layout(schema)` en el orden
+            original de las filas, o None si no está en caché
+        """
+        path = self._path(device_id, day, schema)
+        with self._lock:
+            if path not in self._entries:
+                return None
+
+        try:
+            table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+            if not table.schema.equals(cache_layout(schema)):
+                raise ValueError("layout distinto al del schema actual")
+            os.utime(path)
+        except (OSError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"Archivo de caché descartado {path}: {e}")
+            self._discard(path)
+            return None
+
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+        return table
+
+    def put(
+        self, device_id: str, day: date, schema: type[BaseModel], rows: list
+    ) -> pa.Table:
+        """
+        Guarda el histórico de un (dispositivo, día) y aplica el límite de tamaño.
+
+        Returns:
+            La tabla guardada (en memoria), aunque no se haya podido escribir
+        """
+        path = self._path(device_id, day, schema)
+        layout = cache_layout(schema)
+        table = pa.Table.from_pylist(
+            [row_to_dict(row, tuple(layout.names)) for row in rows], schema=layout
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with (
+                pa.OSFile(str(tmp_path), "wb") as sink,
+                pa.ipc.new_file(sink, layout) as writer,
+            ):
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+        except OSError as e:
+            logger.warning(f"No se pudo guardar {path} en la caché: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return table
+
+        with self._lock:
+            self._discard_entry(path)
+            self._entries[path] = size
+            self._size += size
+
+            evicted = []
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._discard_entry(oldest)
+                evicted.append(oldest)
+
+        for oldest in evicted:
+            oldest.unlink(missing_ok=True)
+        return table
+
+    def _discard_entry(self, path: Path) -> None:
+        self._size -= self._entries.pop(path, 0)
+
+    def _discard(self, path: Path) -> None:
+        with self._lock:
+            self._discard_entry(path)
+        path.unlink(missing_ok=True)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+history_cache = (
+    HistoryDiskCache(settings.HISTORY_CACHE_DIR, settings.HISTORY_CACHE_MAX_BYTES)
+    if settings.HISTORY_CACHE_DIR
+    else None
+)
+
+
+def is_cacheable_day(day: date) -> bool:
+    """
+    Indica si el histórico del día se sirve desde la caché en disco: nada
+    invalida los archivos, así que un día que aún puede recibir comunicaciones
+    atrasadas se consulta en la base de datos.
+    """
+    return history_cache is not None and is_closed_day(day)
+
+
+def table_rows(table: pa.Table) -> list:
+    """Filas (como las del repositorio) de una tabla de la caché en disco."""
+    make_row = result_tuple(table.column_names)
+    columns = [column.to_pylist() for column in table.columns]
+    return [make_row(values) for values in zip(*columns, strict=True)]
+
+
+async def get_closed_day_history(
+    session, device_id: str, day: date, schema: type[BaseModel]
+) -> pa.Table:
+    """
+    Obtiene el histórico de un dispositivo en un día cerrado.
+
+    Se lee de la caché en disco si existe; si no, se consulta la base de datos
+    y el resultado se guarda para las siguientes consultas. El acceso al disco
+    corre fuera del event loop.
+
+    Args:
+        session: Sesión de base de datos
+        device_id: ID del dispositivo
+        day: Día cerrado (UTC)
+        schema: Schema de respuesta; define las columnas guardadas
+
+    Returns:
+        Tabla Arrow con las filas del día ordenadas como en get_communications
+        (`table_rows` las convierte en filas)
+    """
+    table = await asyncio.to_thread(history_cache.get, device_id, day, schema)
+    if table is None:
+        rows = await get_communications(
+            session, [device_id], received_at=day, schema=schema
+        )
+        table = await asyncio.to_thread(history_cache.put, device_id, day, schema, rows)
+    return table
@@ -1,6 +1,8 @@
 import asyncio
 import json
 import logging
+import os
+import socket
 import threading
 import time
 from contextlib import suppress
@@ -48,14 +50,31 @@ class KafkaClient:
 
         return topics
 
+    def _group_id(self) -> str:
+        """
+        Group id del consumidor.
+
+        Cada instancia mantiene su propia caché de estado actual, índice
+        espacial y clientes SSE, así que necesita todas las particiones: con un
+        group id compartido las réplicas se las reparten y cada una vería solo
+        parte de la flota. Por eso se agrega el host y el pid, salvo con
+        KAFKA_GROUP_ID_PER_INSTANCE=false.
+        """
+        if not settings.KAFKA_GROUP_ID_PER_INSTANCE:
+            return settings.KAFKA_GROUP_ID
+        return f"{settings.KAFKA_GROUP_ID}-{socket.gethostname()}-{os.getpid()}"
+
     def _create_consumer(self) -> KafkaConsumer:
         """Crear una nueva instancia del consumidor Kafka."""
         # Configuración básica del consumidor
         consumer_config = {
             "bootstrap_servers": settings.KAFKA_BOOTSTRAP_SERVERS,
-            "group_id": settings.KAFKA_GROUP_ID,
+            "group_id": self._group_id(),
             "auto_offset_reset": settings.KAFKA_AUTO_OFFSET_RESET,
-            "enable_auto_commit": True,
+            # Con un group id por instancia los offsets no se reutilizan (las
+            # cachés se recargan de la base de datos al arrancar): sin commits
+            # el broker no acumula offsets de grupos que ya no existen
+            "enable_auto_commit": not settings.KAFKA_GROUP_ID_PER_INSTANCE,
             "auto_commit_interval_ms": 1000,
             "session_timeout_ms": 30000,
             "heartbeat_interval_ms": 3000,
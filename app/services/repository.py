@@ -1,53 +1,539 @@
-from datetime import date
+import asyncio
+import base64
+import heapq
+import json
+from collections.abc import AsyncIterator, Iterator
+from datetime import UTC, date, datetime, time, timedelta
+from functools import cache
+from itertools import islice
+from operator import itemgetter
 
-from sqlalchemy import func
+from pydantic import BaseModel
+from sqlalchemy import String, any_, bindparam, func, true, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.config import settings
+from app.core.database import run_in_new_session
 from app.models.communications import (
     CommunicationCurrentState,
     CommunicationQueclink,
     CommunicationSuntech,
 )
+from app.schemas.communications import CommunicationResponse
+from app.services.current_state import STATE_FIELDS, current_state
+from app.utils.cache import SingleFlight
+
+# Tablas de histórico por fabricante. El orden define el desempate entre
+# registros con el mismo received_at: primero Suntech.
+HISTORY_SOURCES = (
+    ("suntech", CommunicationSuntech),
+    ("queclink", CommunicationQueclink),
+)
+_SOURCE_PRIORITY = {name: i for i, (name, _) in enumerate(HISTORY_SOURCES)}
+
+# Consultas idénticas concurrentes (mismos argumentos normalizados) comparten
+# una sola ejecución, con una sesión propia (run_in_new_session) y no la del
+# primer llamador
+single_flight = SingleFlight()
+
+
+def _ids_key(device_ids) -> tuple:
+    """Clave de una lista de dispositivos sin importar orden ni repetidos."""
+    return tuple(sorted(set(device_ids)))
+
+
+def encode_history_cursor(received_at: datetime, source: str, comm_id: int) -> str:
+    """
+    Codifica un cursor opaco basado en (received_at, source, id).
+
+    Args:
+        received_at: fecha/hora de recepción de la comunicación
+        source: tabla de origen ("suntech" o "queclink")
+        comm_id: id de la comunicación dentro de su tabla
+
+    Returns:
+        String Base64-encoded con JSON {ra: ISO datetime, src: source, id: int}
+    """
+    cursor_data = {"ra": received_at.isoformat(), "src": source, "id": comm_id}
+    json_str = json.dumps(cursor_data, separators=(",", ":"))
+    return base64.b64encode(json_str.encode()).decode("ascii")
+
+
+def decode_history_cursor(cursor: str) -> tuple[datetime, str, int]:
+    """
+    Decodifica un cursor opaco de histórico.
+
+    Args:
+        cursor: String Base64-encoded
+
+    Returns:
+        Tupla (received_at datetime, source, id)
+
+    Raises:
+        ValueError: si el cursor es inválido
+    """
+    try:
+        json_str = base64.b64decode(cursor.encode()).decode()
+        data = json.loads(json_str)
+        received_at = datetime.fromisoformat(data["ra"])
+        source = data["src"]
+        comm_id = int(data["id"])
+    except (ValueError, KeyError, TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cursor inválido: {e}") from e
+
+    if source not in _SOURCE_PRIORITY:
+        raise ValueError(f"Cursor inválido: origen desconocido {source}")
+
+    return received_at, source, comm_id
+
+
+def _history_keyset_clause(model, source: str, cursor: tuple[datetime, str, int]):
+    """
+    Predicado keyset de una tabla para continuar después del cursor.
+
+    El orden global es (received_at DESC, prioridad de tabla, id DESC), así que
+    para cada tabla la condición se reduce a un rango sobre el índice
+    (device_id, received_at, id):
+    - misma tabla del cursor: (received_at, id) < (cursor_ra, cursor_id)
+    - tabla que va antes en el desempate: received_at < cursor_ra
+    - tabla que va después en el desempate: received_at <= cursor_ra
+    """
+    cursor_ra, cursor_source, cursor_id = cursor
+    priority = _SOURCE_PRIORITY[source]
+    cursor_priority = _SOURCE_PRIORITY[cursor_source]
+
+    if priority == cursor_priority:
+        return tuple_(model.received_at, model.id) < tuple_(cursor_ra, cursor_id)
+    if priority < cursor_priority:
+        return model.received_at < cursor_ra
+    return model.received_at <= cursor_ra
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """received_at se almacena como timestamp sin zona horaria (UTC)."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def received_range(
+    received_at: date | None = None,
+    from_dt: datetime | None = None,
+    to_dt: datetime | None = None,
+) -> tuple[datetime | None, datetime | None]:
+    """
+    Traduce los filtros de fecha a un rango semiabierto [inicio, fin).
+
+    Una fecha se convierte en [00:00 del día, 00:00 del día siguiente) para que
+    el filtro compare directamente la columna received_at y pueda usar el índice
+    (en lugar de date(received_at) = fecha, que obliga a un escaneo secuencial).
+    Si además se envían from/to, se usa la intersección de ambos rangos.
+
+    Args:
+        received_at: Fecha opcional (día completo)
+        from_dt: Inicio opcional del rango (incluido)
+        to_dt: Fin opcional del rango (excluido)
+
+    Returns:
+        Tupla (inicio, fin) en UTC sin zona horaria; None si no hay límite
+    """
+    start = _as_naive_utc(from_dt) if from_dt is not None else None
+    end = _as_naive_utc(to_dt) if to_dt is not None else None
+
+    if received_at is not None:
+        day_start = datetime.combine(received_at, time.min)
+        day_end = day_start + timedelta(days=1)
+        start = day_start if start is None else max(start, day_start)
+        end = day_end if end is None else min(end, day_end)
+
+    return start, end
+
+
+def closed_history_cutoff() -> datetime:
+    """
+    Fin (UTC sin zona horaria) del histórico que ya se considera cerrado.
+
+    Un día no queda cerrado a las 00:00 del siguiente: las comunicaciones
+    que llegan tarde (equipos que reconectan y vacían su buffer) se siguen
+    insertando, así que se espera HISTORY_CLOSED_GRACE_SECS antes de
+    cachearlo sin revalidar.
+    """
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return now - timedelta(seconds=settings.HISTORY_CLOSED_GRACE_SECS)
+
+
+def is_closed_day(day: date) -> bool:
+    """Indica si el día (UTC) terminó hace más que el periodo de gracia."""
+    return datetime.combine(day, time.min) + timedelta(days=1) <= (
+        closed_history_cutoff()
+    )
 
 
-async def get_communications(
-    session, device_ids: list[str], received_at: date | None = None
+@cache
+def history_columns(model, schema: type[BaseModel]) -> tuple:
+    """
+    Columnas a seleccionar de una tabla de histórico para un schema de respuesta.
+
+    Solo se leen las columnas que el schema expone (más id y received_at, que se
+    necesitan para ordenar, mezclar y paginar), evitando transferir y decodificar
+    campos pesados como raw_message o client_ip cuando no se devuelven.
+    """
+    table_columns = model.__table__.c
+    names = dict.fromkeys(("id", "received_at", *schema.model_fields))
+    return tuple(table_columns[name] for name in names if name in table_columns)
+
+
+def _received_range_clauses(
+    model, time_range: tuple[datetime | None, datetime | None]
+) -> list:
+    """Condiciones sobre received_at para un rango semiabierto [inicio, fin)."""
+    start, end = time_range
+    clauses = []
+    if start is not None:
+        clauses.append(model.received_at >= start)
+    if end is not None:
+        clauses.append(model.received_at < end)
+    return clauses
+
+
+def _build_history_query(
+    model,
+    device_ids: list[str],
+    time_range: tuple[datetime | None, datetime | None],
+    schema: type[BaseModel],
+):
+    """
+    Construye la consulta de histórico para una tabla de fabricante.
+
+    Args:
+        model: Modelo SQLAlchemy (CommunicationSuntech o CommunicationQueclink)
+        device_ids: Lista de IDs de dispositivos
+        time_range: Rango semiabierto [inicio, fin) sobre received_at
+        schema: Schema de respuesta que define las columnas a seleccionar
+
+    Returns:
+        Select ordenado por (received_at, id) descendente, nulos al final
+    """
+    query = select(*history_columns(model, schema)).where(
+        model.device_id.in_(device_ids), *_received_range_clauses(model, time_range)
+    )
+
+    # Ordenar por received_at descendente para obtener los más recientes primero.
+    # Debe coincidir con _history_sort_key para poder mezclar ambas tablas.
+    return query.order_by(model.received_at.desc().nulls_last(), model.id.desc())
+
+
+def _history_sort_key(received_at: datetime | None, source: str, comm_id: int):
+    """Clave del orden global del histórico (mayor = más reciente)."""
+    return (
+        received_at is not None,
+        received_at or datetime.min,
+        -_SOURCE_PRIORITY[source],
+        comm_id,
+    )
+
+
+def _tag_communication(source: str, communication) -> tuple:
+    return (
+        _history_sort_key(communication.received_at, source, communication.id),
+        source,
+        communication,
+    )
+
+
+class _Descending:
+    """Invierte la comparación para usar heapq (min-heap) en orden descendente."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return self.key > other.key
+
+
+async def _merge_history_streams(streams: list[AsyncIterator]) -> AsyncIterator:
+    """
+    Mezcla k streams ya ordenados de forma descendente (k-way merge con heap).
+
+    Cada stream produce tuplas etiquetadas (sort_key, source, comunicación). El
+    primer elemento de todos los streams se obtiene de forma concurrente; después
+    solo se avanza el stream del que salió el último elemento emitido.
+    """
+    try:
+        firsts = await asyncio.gather(*(anext(stream, None) for stream in streams))
+        heap = [
+            (_Descending(item[0]), index, item)
+            for index, item in enumerate(firsts)
+            if item is not None
+        ]
+        heapq.heapify(heap)
+
+        while heap:
+            _, index, item = heap[0]
+            yield item
+
+            following = await anext(streams[index], None)
+            if following is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (_Descending(following[0]), index, following))
+    finally:
+        for stream in streams:
+            await stream.aclose()
+
+
+def _source_session(session) -> AsyncSession:
+    """Sesión independiente sobre el mismo engine (conexión propia del pool)."""
+    return AsyncSession(bind=session.bind, expire_on_commit=False)
+
+
+async def _fetch_history_source(session, source: str, query) -> list[tuple]:
+    async with _source_session(session) as source_session:
+        result = await source_session.execute(query)
+        return [_tag_communication(source, row) for row in result]
+
+
+async def _stream_history_source(session, source: str, query) -> AsyncIterator:
+    async with _source_session(session) as source_session:
+        result = await source_session.stream(
+            query.execution_options(yield_per=settings.HISTORY_STREAM_BATCH_SIZE)
+        )
+        async for row in result:
+            yield _tag_communication(source, row)
+
+
+async def _fetch_history(session, queries: list[tuple[str, object]]) -> Iterator:
+    """
+    Ejecuta la consulta de cada tabla en paralelo y mezcla los resultados.
+
+    Cada tabla usa su propia conexión del pool, por lo que la latencia total es
+    la de la tabla más lenta y no la suma de ambas.
+    """
+    results = await asyncio.gather(
+        *(_fetch_history_source(session, source, query) for source, query in queries)
+    )
+    return heapq.merge(*results, key=itemgetter(0), reverse=True)
+
+
+async def get_communications(  # noqa: PLR0913, PLR0917
+    session,
+    device_ids: list[str],
+    received_at: date | None = None,
+    from_dt: datetime | None = None,
+    to_dt: datetime | None = None,
+    schema: type[BaseModel] = CommunicationResponse,
 ):
     """
     Obtiene el histórico completo de comunicaciones de los dispositivos especificados.
 
+    Las tablas Suntech y Queclink se consultan en paralelo y se mezclan en una
+    sola línea de tiempo ordenada por received_at descendente.
+
     Args:
         session: Sesión de base de datos
         device_ids: Lista de IDs de dispositivos
         received_at: Fecha opcional para filtrar por received_at (solo fecha, sin hora)
+        from_dt: Inicio opcional del rango de received_at (incluido)
+        to_dt: Fin opcional del rango de received_at (excluido)
+        schema: Schema de respuesta; define las columnas que se leen
+
+    Las llamadas concurrentes con los mismos dispositivos, rango y schema
+    comparten una sola consulta; la lista devuelta no se debe modificar.
 
     Returns:
-        Lista con todas las comunicaciones (Suntech + Queclink)
+        Lista de filas (Suntech + Queclink) con las columnas del schema
     """
-    query_suntech = select(CommunicationSuntech).where(
-        CommunicationSuntech.device_id.in_(device_ids)
-    )
-    query_queclink = select(CommunicationQueclink).where(
-        CommunicationQueclink.device_id.in_(device_ids)
+    time_range = received_range(received_at, from_dt, to_dt)
+    return await single_flight.do(
+        ("communications", _ids_key(device_ids), time_range, schema),
+        run_in_new_session,
+        session,
+        _get_communications,
+        device_ids,
+        time_range,
+        schema,
     )
 
-    # Si se proporciona received_at, filtrar por esa fecha
-    if received_at is not None:
-        query_suntech = query_suntech.where(
-            func.date(CommunicationSuntech.received_at) == received_at
+
+async def _get_communications(
+    session, device_ids: list[str], time_range: tuple, schema: type[BaseModel]
+) -> list:
+    queries = [
+        (source, _build_history_query(model, device_ids, time_range, schema))
+        for source, model in HISTORY_SOURCES
+    ]
+
+    return [
+        communication for _, _, communication in await _fetch_history(session, queries)
+    ]
+
+
+async def stream_communications(  # noqa: PLR0913, PLR0917
+    session,
+    device_ids: list[str],
+    received_at: date | None = None,
+    from_dt: datetime | None = None,
+    to_dt: datetime | None = None,
+    schema: type[BaseModel] = CommunicationResponse,
+) -> AsyncIterator:
+    """
+    Itera el histórico de comunicaciones usando un cursor del lado del servidor.
+
+    A diferencia de get_communications, no materializa el resultado completo:
+    las filas se leen de PostgreSQL en lotes de HISTORY_STREAM_BATCH_SIZE
+    (stream_results + yield_per), por lo que la memoria se mantiene constante
+    sin importar el tamaño del histórico. Cada tabla se lee con su propio cursor
+    y ambas se mezclan al vuelo.
+
+    Args:
+        session: Sesión de base de datos
+        device_ids: Lista de IDs de dispositivos
+        received_at: Fecha opcional para filtrar por received_at (solo fecha, sin hora)
+        from_dt: Inicio opcional del rango de received_at (incluido)
+        to_dt: Fin opcional del rango de received_at (excluido)
+        schema: Schema de respuesta; define las columnas que se leen
+
+    Yields:
+        Filas Suntech y Queclink en orden descendente por received_at
+    """
+    time_range = received_range(received_at, from_dt, to_dt)
+    streams = [
+        _stream_history_source(
+            session,
+            source,
+            _build_history_query(model, device_ids, time_range, schema),
         )
-        query_queclink = query_queclink.where(
-            func.date(CommunicationQueclink.received_at) == received_at
+        for source, model in HISTORY_SOURCES
+    ]
+
+    async for _, _, communication in _merge_history_streams(streams):
+        yield communication
+
+
+def _per_device_page_query(  # noqa: PLR0913, PLR0917
+    model,
+    device_ids: list[str],
+    time_range: tuple[datetime | None, datetime | None],
+    schema: type[BaseModel],
+    clauses: list,
+    limit: int,
+):
+    """
+    Página de varios dispositivos como la unión de una página por dispositivo.
+
+    Con `device_id IN (...)` el índice (device_id, received_at, id) no entrega
+    las filas en el orden global, y Postgres lee y ordena el histórico completo
+    de todos los dispositivos antes de aplicar el LIMIT. Con
+    `unnest(ids) CROSS JOIN LATERAL (... LIMIT n)` cada dispositivo es un
+    escaneo acotado del índice y solo se ordenan n filas por dispositivo.
+
+    Returns:
+        Select ordenado por (received_at, id) descendente con LIMIT `limit`
+    """
+    devices = (
+        func.unnest(bindparam("device_ids", list(device_ids), type_=ARRAY(String)))
+        .table_valued("device_id")
+        .render_derived(name="devices")
+    )
+    per_device = (
+        select(*history_columns(model, schema))
+        .where(
+            model.device_id == devices.c.device_id,
+            *_received_range_clauses(model, time_range),
+            *clauses,
         )
+        .order_by(model.received_at.desc().nulls_last(), model.id.desc())
+        .limit(limit)
+        .lateral()
+    )
+    return (
+        select(*per_device.c)
+        .select_from(devices)
+        .join(per_device, true())
+        .order_by(per_device.c.received_at.desc(), per_device.c.id.desc())
+        .limit(limit)
+    )
 
-    # Ordenar por received_at descendente para obtener los más recientes primero
-    query_suntech = query_suntech.order_by(CommunicationSuntech.received_at.desc())
-    query_queclink = query_queclink.order_by(CommunicationQueclink.received_at.desc())
 
-    suntech = (await session.execute(query_suntech)).scalars().all()
-    queclink = (await session.execute(query_queclink)).scalars().all()
+async def get_communications_page(  # noqa: PLR0913, PLR0917
+    session,
+    device_ids: list[str],
+    received_at: date | None = None,
+    from_dt: datetime | None = None,
+    to_dt: datetime | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    schema: type[BaseModel] = CommunicationResponse,
+) -> tuple[list, str | None]:
+    """
+    Obtiene una página del histórico de comunicaciones con keyset cursor.
+
+    Cada tabla se consulta con LIMIT limit+1 sobre el rango del cursor, por lo
+    que cada página es un escaneo acotado del índice y nunca se materializa el
+    histórico completo; con varios dispositivos, uno por dispositivo (ver
+    `_per_device_page_query`), así el costo es O(dispositivos × página). Los
+    registros sin received_at no son paginables.
+
+    Args:
+        session: Sesión de base de datos
+        device_ids: Lista de IDs de dispositivos
+        received_at: Fecha opcional para filtrar por received_at
+        from_dt: Inicio opcional del rango de received_at (incluido)
+        to_dt: Fin opcional del rango de received_at (excluido)
+        limit: Cantidad de registros por página
+        cursor: Cursor opaco para continuar desde una página anterior
+        schema: Schema de respuesta; define las columnas que se leen
+
+    Returns:
+        Tupla (comunicaciones, next_cursor):
+        - comunicaciones: Suntech + Queclink ordenadas por received_at descendente
+        - next_cursor: cursor para la siguiente página, None si no hay más
+
+    Raises:
+        ValueError: si el cursor es inválido
+    """
+    decoded_cursor = decode_history_cursor(cursor) if cursor else None
+    time_range = received_range(received_at, from_dt, to_dt)
+    # Un id repetido duplicaría sus filas en la consulta por dispositivo
+    device_ids = list(dict.fromkeys(device_ids))
+
+    queries = []
+    for source, model in HISTORY_SOURCES:
+        clauses = [model.received_at.isnot(None)]
+        if decoded_cursor is not None:
+            clauses.append(_history_keyset_clause(model, source, decoded_cursor))
 
-    return suntech + queclink
+        if len(device_ids) == 1:
+            query = _build_history_query(model, device_ids, time_range, schema)
+            query = query.where(*clauses).limit(limit + 1)
+        else:
+            query = _per_device_page_query(
+                model, device_ids, time_range, schema, clauses, limit + 1
+            )
+        queries.append((source, query))
+
+    # Mezclar ambas tablas en el orden global y cortar la página
+    page = list(islice(await _fetch_history(session, queries), limit + 1))
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        _, last_source, last = page[-1]
+        next_cursor = encode_history_cursor(last.received_at, last_source, last.id)
+
+    return [communication for _, _, communication in page], next_cursor
+
+
+def _has_position(state: CommunicationCurrentState, msg_class: str | None) -> bool:
+    return (
+        state.latitude is not None
+        and state.longitude is not None
+        and (msg_class is None or state.msg_class == msg_class)
+    )
 
 
 async def get_latest_communications(
@@ -58,7 +544,15 @@ async def get_latest_communications(
 
     Devuelve un único registro por device_id: el más reciente que tenga
     coordenadas válidas (latitude y longitude no nulos), independientemente
-    de la clase de mensaje, a menos que se especifique msg_class.
+    de la clase de mensaje, a menos que se especifique msg_class; en ese caso
+    es la última comunicación de esa clase, aunque después hayan llegado
+    mensajes de otras clases.
+
+    Se responde desde la caché de estado actual (alimentada por Kafka); solo
+    los dispositivos (o pares dispositivo/clase) que no están en ella se
+    consultan en la base de datos, y se agregan a la caché. Mientras la caché
+    no se haya cargado, o si no está al día (`CurrentStateCache.serving`), se
+    consulta siempre la base de datos.
 
     Args:
         session: Sesión de base de datos
@@ -68,61 +562,212 @@ async def get_latest_communications(
     Returns:
         Lista con la última comunicación con coordenadas válidas de cada dispositivo
     """
-    # Crear subconsulta con ROW_NUMBER para obtener el registro más reciente por device_id
-    row_number_col = (
-        func.row_number()
-        .over(
-            partition_by=CommunicationCurrentState.device_id,
-            order_by=CommunicationCurrentState.received_at.desc(),
+    if msg_class is not None:
+        # Los dispositivos que no están en la caché se consultan en paralelo
+        states = await asyncio.gather(
+            *(
+                _get_latest_by_class(session, device_id, msg_class)
+                for device_id in dict.fromkeys(device_ids)
+            )
         )
-        .label("row_num")
+        return [state for state in states if state is not None]
+
+    if not current_state.serving:
+        return await _coalesced_latest(session, device_ids)
+
+    states, missing = current_state.get_many(device_ids)
+    if missing:
+        for state in await _coalesced_latest(session, missing):
+            current_state.upsert({name: getattr(state, name) for name in STATE_FIELDS})
+        states, _ = current_state.get_many(device_ids)
+
+    return [state for state in states if _has_position(state, msg_class)]
+
+
+async def _coalesced_latest(session, device_ids: list[str]) -> list:
+    """Consulta el estado actual en la base compartiendo llamadas idénticas."""
+    return await single_flight.do(
+        ("latest", _ids_key(device_ids)),
+        run_in_new_session,
+        session,
+        _query_latest_communications,
+        device_ids,
     )
 
-    # Seleccionar explícitamente solo las columnas que existen en la tabla física
-    subquery = select(
-        CommunicationCurrentState.device_id,
-        CommunicationCurrentState.backup_battery_voltage,
-        CommunicationCurrentState.course,
-        CommunicationCurrentState.delivery_type,
-        CommunicationCurrentState.engine_status,
-        CommunicationCurrentState.fix_status,
-        CommunicationCurrentState.gps_datetime,
-        CommunicationCurrentState.gps_epoch,
-        CommunicationCurrentState.latitude,
-        CommunicationCurrentState.longitude,
-        CommunicationCurrentState.main_battery_voltage,
-        CommunicationCurrentState.msg_class,
-        CommunicationCurrentState.network_status,
-        CommunicationCurrentState.odometer,
-        CommunicationCurrentState.rx_lvl,
-        CommunicationCurrentState.satellites,
-        CommunicationCurrentState.speed,
-        CommunicationCurrentState.received_epoch,
-        CommunicationCurrentState.received_at,
-        row_number_col,
-    ).where(
-        CommunicationCurrentState.device_id.in_(device_ids),
+
+async def _get_latest_by_class(
+    session, device_id: str, msg_class: str
+) -> CommunicationCurrentState | None:
+    """Última comunicación con coordenadas de una clase de mensaje del dispositivo."""
+    if current_state.serving:
+        known, state = current_state.get_class(device_id, msg_class)
+        if known:
+            return state if state is not None and _has_position(state, None) else None
+
+    state = await single_flight.do(
+        ("latest_by_class", device_id, msg_class),
+        run_in_new_session,
+        session,
+        _query_latest_by_class,
+        device_id,
+        msg_class,
+    )
+    if current_state.ready:
+        if state is None:
+            current_state.set_class_absent(device_id, msg_class)
+        else:
+            current_state.upsert_from_class(state)
+    return None if state is None else CommunicationCurrentState(**state)
+
+
+async def _query_latest_by_class(
+    session, device_id: str, msg_class: str
+) -> dict | None:
+    """
+    Consulta en el histórico la última comunicación de una clase de mensaje.
+
+    Cada tabla resuelve un LIMIT 1 sobre el índice
+    (device_id, msg_class, received_at); ver
+    migrations/003_communications_latest_by_class_index.sql.
+
+    Returns:
+        Columnas de communications_current_state, o None si no hay mensajes
+    """
+    columns = ("id", *STATE_FIELDS)
+    queries = [
+        (
+            source,
+            select(*(getattr(model, name) for name in columns))
+            .where(
+                model.device_id == device_id,
+                model.msg_class == msg_class,
+                model.latitude.isnot(None),
+                model.longitude.isnot(None),
+            )
+            .order_by(model.received_at.desc().nulls_last(), model.id.desc())
+            .limit(1),
+        )
+        for source, model in HISTORY_SOURCES
+    ]
+
+    latest = next(await _fetch_history(session, queries), None)
+    if latest is None:
+        return None
+    return {name: getattr(latest[2], name) for name in STATE_FIELDS}
+
+
+def _latest_query(device_ids: list[str]):
+    """
+    Estado actual con coordenadas de los dispositivos.
+
+    Los IDs se envían como un solo parámetro arreglo (`device_id = ANY($1)`)
+    en lugar de un IN expandido: el texto SQL es el mismo para cualquier
+    cantidad de dispositivos, así que asyncpg reutiliza el statement
+    preparado. device_id es la clave primaria, así que hay una fila por
+    dispositivo.
+    """
+    columns = [getattr(CommunicationCurrentState, name) for name in STATE_FIELDS]
+    return select(*columns).where(
+        CommunicationCurrentState.device_id
+        == any_(bindparam("device_ids", list(device_ids), type_=ARRAY(String))),
         CommunicationCurrentState.latitude.isnot(None),
         CommunicationCurrentState.longitude.isnot(None),
     )
 
-    # Agregar filtro por msg_class si se proporciona
-    if msg_class is not None:
-        subquery = subquery.where(CommunicationCurrentState.msg_class == msg_class)
 
-    subquery = subquery.subquery()
+async def _query_latest_communications(session, device_ids: list[str]):
+    """
+    Consulta la última comunicación de cada dispositivo en la base de datos.
 
-    # Query final: seleccionar directamente del subquery y filtrar row_num = 1
-    query = select(subquery).where(subquery.c.row_num == 1)
+    Args:
+        session: Sesión de base de datos
+        device_ids: Lista de IDs de dispositivos
 
-    result = await session.execute(query)
+    Returns:
+        Lista con la última comunicación con coordenadas válidas de cada dispositivo
+    """
+    result = await session.execute(_latest_query(device_ids))
+    return [
+        CommunicationCurrentState(**dict(zip(STATE_FIELDS, row, strict=True)))
+        for row in result
+    ]
 
-    # Reconstruir instancias de CommunicationCurrentState desde el row mapping
-    # Excluir row_num que es solo para el filtro
-    communications = []
-    for row in result:
-        row_dict = dict(row._mapping)
-        row_dict.pop("row_num", None)  # Eliminar row_num antes de crear la instancia
-        communications.append(CommunicationCurrentState(**row_dict))
 
-    return communications
+async def get_latest_changes(session, since: int) -> tuple[list, int]:
+    """
+    Dispositivos cuyo estado actual cambió después de un received_epoch.
+
+    Con la caché de estado actual al día se responde desde su índice por
+    received_epoch; si no, con `received_epoch > since` en
+    `communications_current_state` (índice de la migración 004). En ambos
+    casos el costo es proporcional a los cambios y no al tamaño de la flota.
+
+    La marca devuelta se queda LATEST_CHANGES_SAFETY_SECS detrás del reloj:
+    received_epoch tiene resolución de segundos y un mensaje del segundo en
+    curso (o con poco retraso en Kafka) todavía puede llegar. Esos
+    dispositivos se vuelven a entregar en la siguiente consulta en lugar de
+    perderse.
+
+    Args:
+        session: Sesión de base de datos
+        since: Marca (epoch en segundos) devuelta por la consulta anterior
+
+    Returns:
+        Tupla (comunicaciones con coordenadas ordenadas por received_epoch,
+        nueva marca)
+    """
+    if current_state.serving:
+        states = current_state.changed_since(since)
+    else:
+        columns = [getattr(CommunicationCurrentState, name) for name in STATE_FIELDS]
+        result = await session.execute(
+            select(*columns)
+            .where(CommunicationCurrentState.received_epoch > since)
+            .order_by(CommunicationCurrentState.received_epoch)
+        )
+        states = [
+            CommunicationCurrentState(**dict(zip(STATE_FIELDS, row, strict=True)))
+            for row in result
+        ]
+
+    latest = max((state.received_epoch for state in states), default=since)
+    settled = int(datetime.now(UTC).timestamp()) - settings.LATEST_CHANGES_SAFETY_SECS
+    watermark = max(since, min(latest, settled))
+    return [state for state in states if _has_position(state, None)], watermark
+
+
+async def stream_latest_communications(session, device_ids: list[str]) -> AsyncIterator:
+    """
+    Estado actual de muchos dispositivos (flota completa) conforme se obtiene.
+
+    Los dispositivos que están en la caché de estado actual (si está al día)
+    se entregan de inmediato; el resto se lee de la base de datos en una sola
+    consulta con cursor del servidor (yield_per) y se agrega a la caché.
+
+    Args:
+        session: Sesión de base de datos
+        device_ids: IDs de dispositivos (pueden ser decenas de miles)
+
+    Returns:
+        Iterador asíncrono de comunicaciones con coordenadas válidas
+    """
+    if current_state.serving:
+        states, missing = current_state.get_many(device_ids)
+        for state in states:
+            if _has_position(state, None):
+                yield state
+    else:
+        missing = list(dict.fromkeys(device_ids))
+
+    if not missing:
+        return
+
+    result = await session.stream(
+        _latest_query(missing).execution_options(
+            yield_per=settings.HISTORY_STREAM_BATCH_SIZE
+        )
+    )
+    async for row in result:
+        if current_state.ready:
+            current_state.upsert(dict(zip(STATE_FIELDS, row, strict=True)))
+        yield row
@@ -0,0 +1,176 @@
+"""
+Serialización rápida de filas del histórico a JSON.
+
+Las rutas de histórico devuelven filas ligeras del repositorio. Validarlas con
+Pydantic y después dejar que FastAPI las vuelva a validar contra
+`response_model` convierte cada fila dos veces. Este módulo escribe las filas
+directo a bytes JSON con orjson, usando la lista de campos del schema
+precalculada. La salida es idéntica a la de Pydantic (Decimal como string,
+datetime en ISO 8601), y el schema OpenAPI se sigue generando desde los
+modelos Pydantic declarados en cada ruta.
+"""
+
+from collections.abc import AsyncIterator, Sequence
+from decimal import Decimal
+from functools import cache
+
+import orjson
+from pydantic import BaseModel
+
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def _default(value):
+    # Pydantic serializa Decimal como string para no perder precisión
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+@cache
+def response_fields(schema: type[BaseModel]) -> tuple[str, ...]:
+    """Campos del schema de respuesta, en el orden en que se serializan."""
+    return tuple(schema.model_fields)
+
+
+@cache
+def _row_positions(
+    fields: tuple[str, ...], row_fields: tuple[str, ...]
+) -> tuple[tuple[str, int | None], ...]:
+    """Posición de cada campo del schema dentro de una fila (None si no existe)."""
+    index = {name: i for i, name in enumerate(row_fields)}
+    return tuple((name, index.get(name)) for name in fields)
+
+
+def row_to_dict(row, fields: tuple[str, ...]) -> dict:
+    """
+    Construye el dict de salida de una fila; los campos ausentes son None.
+
+    Para filas Row de SQLAlchemy las posiciones se resuelven una sola vez por
+    forma de fila (Suntech y Queclink tienen columnas distintas); acceder por
+    atributo a un campo inexistente es mucho más costoso que por posición.
+    """
+    row_fields = getattr(row, "_fields", None)
+    if row_fields is None:
+        return {name: getattr(row, name, None) for name in fields}
+
+    return {
+        name: None if position is None else row[position]
+        for name, position in _row_positions(fields, row_fields)
+    }
+
+
+def dump_row(row, schema: type[BaseModel]) -> bytes:
+    """
+    Serializa una fila del histórico.
+
+    Args:
+        row: Fila del repositorio (Row de SQLAlchemy u objeto con atributos)
+        schema: Schema de respuesta; define los campos y su orden
+
+    Returns:
+        Objeto JSON en bytes
+    """
+    return orjson.dumps(
+        row_to_dict(row, response_fields(schema)),
+        default=_default,
+        option=_ORJSON_OPTIONS,
+    )
+
+
+def dump_rows(rows: Sequence, schema: type[BaseModel]) -> bytes:
+    """
+    Serializa una lista de filas del histórico como arreglo JSON.
+
+    Args:
+        rows: Filas del repositorio
+        schema: Schema de respuesta; define los campos y su orden
+
+    Returns:
+        Arreglo JSON en bytes
+    """
+    fields = response_fields(schema)
+    return orjson.dumps(
+        [row_to_dict(row, fields) for row in rows],
+        default=_default,
+        option=_ORJSON_OPTIONS,
+    )
+
+
+async def dump_rows_stream(
+    rows: AsyncIterator, schema: type[BaseModel], batch_size: int
+) -> AsyncIterator[bytes]:
+    """
+    Serializa filas como un arreglo JSON conforme llegan, por bloques.
+
+    Args:
+        rows: Iterador asíncrono de filas
+        schema: Schema de respuesta; define los campos y su orden
+        batch_size: Filas serializadas por bloque
+
+    Returns:
+        Fragmentos del arreglo JSON en bytes
+    """
+    fields = response_fields(schema)
+    separator = b"["
+    batch = []
+    async for row in rows:
+        batch.append(row_to_dict(row, fields))
+        if len(batch) >= batch_size:
+            yield separator + _dump_items(batch)
+            separator = b","
+            batch = []
+    if batch:
+        yield separator + _dump_items(batch)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def _dump_items(items: list[dict]) -> bytes:
+    """Elementos de un arreglo JSON, sin los corchetes."""
+    return orjson.dumps(items, default=_default, option=_ORJSON_OPTIONS)[1:-1]
+
+
+def dump_page(
+    rows: Sequence, next_cursor: str | None, schema: type[BaseModel]
+) -> bytes:
+    """
+    Serializa una página del histórico (`{data, next_cursor}`).
+
+    Args:
+        rows: Filas de la página
+        next_cursor: Cursor de la siguiente página o None
+        schema: Schema de respuesta de cada fila
+
+    Returns:
+        Objeto JSON en bytes
+    """
+    fields = response_fields(schema)
+    return orjson.dumps(
+        {
+            "data": [row_to_dict(row, fields) for row in rows],
+            "next_cursor": next_cursor,
+        },
+        default=_default,
+        option=_ORJSON_OPTIONS,
+    )
+
+
+def dump_changes(rows: Sequence, watermark: int, schema: type[BaseModel]) -> bytes:
+    """
+    Serializa los cambios del estado actual (`{data, watermark}`).
+
+    Args:
+        rows: Estados que cambiaron
+        watermark: Marca para la siguiente consulta
+        schema: Schema de respuesta de cada fila
+
+    Returns:
+        Objeto JSON en bytes
+    """
+    fields = response_fields(schema)
+    return orjson.dumps(
+        {"data": [row_to_dict(row, fields) for row in rows], "watermark": watermark},
+        default=_default,
+        option=_ORJSON_OPTIONS,
+    )
@@ -0,0 +1,337 @@
+"""
+Resúmenes diarios por dispositivo (distancia, velocidad, ralentí, motor).
+
+Los reportes de flota leen la tabla materializada `device_daily_summary` en
+lugar del histórico crudo. La tabla se llena bajo demanda:
+
+- Cada (dispositivo, día) pendiente se agrega en Postgres solo con las
+  comunicaciones posteriores a su last_received_at (todo el día si aún no
+  existe), y el resultado parcial se combina con la fila guardada en un
+  INSERT ... ON CONFLICT DO UPDATE.
+- Los días cerrados (terminados hace más de HISTORY_CLOSED_GRACE_SECS, ver
+  `is_closed_day`) quedan closed tras su última actualización y ya no se
+  vuelven a consultar; el día en curso y los que aún pueden recibir
+  comunicaciones atrasadas se actualizan en cada lectura.
+
+El tiempo con motor encendido suma los intervalos entre comunicaciones
+consecutivas cuyo primer punto tiene engine_status ON, acotados a
+SUMMARY_MAX_GAP_SECONDS para no contar huecos sin señal.
+"""
+
+from datetime import UTC, date, datetime, time, timedelta
+
+from sqlalchemy import (
+    Date,
+    DateTime,
+    Integer,
+    String,
+    case,
+    cast,
+    column,
+    func,
+    select,
+    union_all,
+    values,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
+
+from app.core.config import settings
+from app.models.communications import DeviceDailySummary
+from app.services.repository import HISTORY_SOURCES, is_closed_day
+
+ENGINE_ON = "ON"
+
+# Límite de parámetros por sentencia (asyncpg admite 32767)
+_WINDOWS_PER_QUERY = 5000
+_ROWS_PER_UPSERT = 1000
+
+# Agregado parcial de una ventana sin comunicaciones
+_EMPTY_PARTIAL = {
+    "points": 0,
+    "odometer_start": None,
+    "odometer_end": None,
+    "idle_time_start": None,
+    "idle_time_end": None,
+    "max_speed": None,
+    "speed_sum": 0,
+    "speed_count": 0,
+    "engine_on_seconds": 0,
+    "first_received_at": None,
+    "last_received_at": None,
+    "last_engine_on": None,
+}
+
+
+def _seconds_between(later, earlier):
+    """Segundos entre dos timestamps, acotados a SUMMARY_MAX_GAP_SECONDS."""
+    return cast(
+        func.least(
+            func.extract("epoch", later - earlier), settings.SUMMARY_MAX_GAP_SECONDS
+        ),
+        Integer,
+    )
+
+
+def _partial_aggregates_query(windows: list[tuple[str, datetime, datetime]]):
+    """
+    Agrega las comunicaciones de cada ventana (device_id, since, until).
+
+    Solo se leen las filas con since < received_at < until de cada
+    dispositivo, en Suntech y Queclink, y se agrupan por (device_id, día).
+    """
+    window_values = values(
+        column("device_id", String),
+        column("since", DateTime),
+        column("until", DateTime),
+        name="windows",
+    ).data(windows)
+
+    points = union_all(
+        *(
+            select(
+                model.device_id,
+                model.received_at,
+                model.odometer,
+                model.speed,
+                model.idle_time,
+                model.engine_status,
+                window_values.c.until,
+            ).join(
+                window_values,
+                (model.device_id == window_values.c.device_id)
+                & (model.received_at > window_values.c.since)
+                & (model.received_at < window_values.c.until),
+            )
+            for _, model in HISTORY_SOURCES
+        )
+    ).subquery("points")
+
+    next_at = func.lead(points.c.received_at).over(
+        partition_by=(points.c.device_id, points.c.until),
+        order_by=points.c.received_at,
+    )
+    ordered = select(
+        points,
+        next_at.label("next_at"),
+        (func.upper(points.c.engine_status) == ENGINE_ON).label("engine_on"),
+    ).subquery("ordered")
+
+    day = cast(ordered.c.received_at, Date)
+    engine_interval = case(
+        (
+            ordered.c.engine_on & ordered.c.next_at.is_not(None),
+            _seconds_between(ordered.c.next_at, ordered.c.received_at),
+        ),
+        else_=0,
+    )
+
+    return select(
+        ordered.c.device_id,
+        day.label("day"),
+        func.count().label("points"),
+        func.min(ordered.c.odometer).label("odometer_start"),
+        func.max(ordered.c.odometer).label("odometer_end"),
+        func.min(ordered.c.idle_time).label("idle_time_start"),
+        func.max(ordered.c.idle_time).label("idle_time_end"),
+        func.max(ordered.c.speed).label("max_speed"),
+        func.coalesce(func.sum(ordered.c.speed), 0).label("speed_sum"),
+        func.count(ordered.c.speed).label("speed_count"),
+        func.coalesce(func.sum(engine_interval), 0).label("engine_on_seconds"),
+        func.min(ordered.c.received_at).label("first_received_at"),
+        func.max(ordered.c.received_at).label("last_received_at"),
+        array_agg(
+            aggregate_order_by(ordered.c.engine_on, ordered.c.received_at.desc())
+        )[1].label("last_engine_on"),
+    ).group_by(ordered.c.device_id, day)
+
+
+def _merge_statement(rows: list[dict]):
+    """
+    INSERT que combina los agregados parciales con la fila guardada.
+
+    La condición del ON CONFLICT evita sumar dos veces el mismo tramo si dos
+    peticiones actualizan el día en curso al mismo tiempo.
+    """
+    stmt = insert(DeviceDailySummary).values(rows)
+    stored, partial = DeviceDailySummary, stmt.excluded
+
+    bridge = case(
+        (
+            stored.last_engine_on & partial.first_received_at.is_not(None),
+            _seconds_between(partial.first_received_at, stored.last_received_at),
+        ),
+        else_=0,
+    )
+
+    return stmt.on_conflict_do_update(
+        index_elements=[stored.device_id, stored.day],
+        set_={
+            "points": stored.points + partial.points,
+            "odometer_start": func.least(stored.odometer_start, partial.odometer_start),
+            "odometer_end": func.greatest(stored.odometer_end, partial.odometer_end),
+            "idle_time_start": func.least(
+                stored.idle_time_start, partial.idle_time_start
+            ),
+            "idle_time_end": func.greatest(stored.idle_time_end, partial.idle_time_end),
+            "max_speed": func.greatest(stored.max_speed, partial.max_speed),
+            "speed_sum": stored.speed_sum + partial.speed_sum,
+            "speed_count": stored.speed_count + partial.speed_count,
+            "engine_on_seconds": stored.engine_on_seconds
+            + partial.engine_on_seconds
+            + bridge,
+            "first_received_at": func.least(
+                stored.first_received_at, partial.first_received_at
+            ),
+            "last_received_at": func.greatest(
+                stored.last_received_at, partial.last_received_at
+            ),
+            "last_engine_on": case(
+                (partial.last_received_at.is_not(None), partial.last_engine_on),
+                else_=stored.last_engine_on,
+            ),
+            "closed": partial.closed,
+            "updated_at": partial.updated_at,
+        },
+        where=stored.last_received_at.is_(None)
+        | partial.first_received_at.is_(None)
+        | (stored.last_received_at < partial.first_received_at),
+    )
+
+
+def _day_window(
+    device_id: str, day: date, stored: DeviceDailySummary | None
+) -> tuple[str, datetime, datetime]:
+    """Ventana de comunicaciones aún no agregadas de un (dispositivo, día)."""
+    day_start = datetime.combine(day, time.min)
+    if stored is not None and stored.last_received_at is not None:
+        since = stored.last_received_at
+    else:
+        since = day_start - timedelta(microseconds=1)
+    return device_id, since, day_start + timedelta(days=1)
+
+
+async def _refresh_summaries(
+    session, pending: list[tuple[str, date]], stored: dict
+) -> None:
+    """Agrega los (dispositivo, día) pendientes y los guarda en la tabla."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    partials = {}
+
+    for i in range(0, len(pending), _WINDOWS_PER_QUERY):
+        windows = [
+            _day_window(device_id, day, stored.get((device_id, day)))
+            for device_id, day in pending[i : i + _WINDOWS_PER_QUERY]
+        ]
+        result = await session.execute(_partial_aggregates_query(windows))
+        for row in result.mappings():
+            partials[(row["device_id"], row["day"])] = dict(row)
+
+    # Los días sin comunicaciones nuevas también se guardan, para cerrarlos
+    rows = [
+        {
+            **_EMPTY_PARTIAL,
+            "device_id": device_id,
+            "day": day,
+            **partials.get((device_id, day), {}),
+            "closed": is_closed_day(day),
+            "updated_at": now,
+        }
+        for device_id, day in pending
+    ]
+
+    for i in range(0, len(rows), _ROWS_PER_UPSERT):
+        await session.execute(_merge_statement(rows[i : i + _ROWS_PER_UPSERT]))
+
+    await session.commit()
+
+
+async def _load_summaries(
+    session, device_ids: list[str], start_day: date, end_day: date
+) -> dict:
+    query = (
+        select(DeviceDailySummary)
+        .where(
+            DeviceDailySummary.device_id.in_(device_ids),
+            DeviceDailySummary.day >= start_day,
+            DeviceDailySummary.day <= end_day,
+        )
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(query)
+    return {(s.device_id, s.day): s for s in result.scalars()}
+
+
+async def get_daily_summaries(
+    session, device_ids: list[str], start_day: date, end_day: date
+) -> list[DeviceDailySummary]:
+    """
+    Obtiene los resúmenes diarios de los dispositivos en el rango de días.
+
+    Los (dispositivo, día) que aún no están cerrados se actualizan antes de
+    responder; los días futuros se ignoran.
+
+    Args:
+        session: Sesión de base de datos
+        device_ids: Lista de IDs de dispositivos
+        start_day: Primer día del rango (incluido)
+        end_day: Último día del rango (incluido)
+
+    Returns:
+        Filas de device_daily_summary ordenadas por device_id y día; solo se
+        incluyen los días con comunicaciones
+    """
+    today = datetime.now(UTC).date()
+    end_day = min(end_day, today)
+    days = [
+        start_day + timedelta(days=offset)
+        for offset in range((end_day - start_day).days + 1)
+    ]
+
+    stored = await _load_summaries(session, device_ids, start_day, end_day)
+    pending = [
+        (device_id, day)
+        for device_id in dict.fromkeys(device_ids)
+        for day in days
+        if not (stored.get((device_id, day)) and stored[(device_id, day)].closed)
+    ]
+
+    if pending:
+        await _refresh_summaries(session, pending, stored)
+        stored = await _load_summaries(session, device_ids, start_day, end_day)
+
+    return sorted(
+        (s for s in stored.values() if s.points),
+        key=lambda s: (s.device_id, s.day),
+    )
+
+
+def _delta(start, end):
+    return None if start is None or end is None else end - start
+
+
+def summary_to_dict(summary: DeviceDailySummary) -> dict:
+    """
+    Convierte una fila de device_daily_summary al formato de respuesta.
+
+    Args:
+        summary: Fila de la tabla de resúmenes
+
+    Returns:
+        Diccionario compatible con DailySummaryResponse
+    """
+    return {
+        "device_id": summary.device_id,
+        "day": summary.day,
+        "points": summary.points,
+        "distance": _delta(summary.odometer_start, summary.odometer_end),
+        "max_speed": summary.max_speed,
+        "avg_speed": (
+            round(summary.speed_sum / summary.speed_count, 2)
+            if summary.speed_count
+            else None
+        ),
+        "idle_seconds": _delta(summary.idle_time_start, summary.idle_time_end),
+        "engine_on_seconds": summary.engine_on_seconds,
+        "first_received_at": summary.first_received_at,
+        "last_received_at": summary.last_received_at,
+    }
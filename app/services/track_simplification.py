@@ -0,0 +1,181 @@
+"""
+Simplificación de trayectorias para el histórico de comunicaciones.
+
+Los mapas dibujan el recorrido como una polilínea a resolución de pantalla;
+enviar cada punto crudo de un día completo es innecesario. Este módulo reduce
+la trayectoria en memoria con operaciones vectorizadas sobre las columnas
+latitude/longitude/received_at:
+
+- Muestreo por ventana de tiempo (`bucket_seconds`): un punto por ventana.
+- Douglas–Peucker (`tolerance_m`): conserva la forma de la ruta descartando
+  los puntos que se desvían menos de la tolerancia (en metros).
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from app.utils.geo import EARTH_RADIUS_M
+
+
+def track_columns(
+    rows: Sequence,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Extrae latitude, longitude y received_at (epoch en segundos) como arrays,
+    junto con la máscara de filas que tienen los tres valores.
+    """
+    count = len(rows)
+    latitudes = np.fromiter(
+        (np.nan if r.latitude is None else r.latitude for r in rows),
+        dtype=np.float64,
+        count=count,
+    )
+    longitudes = np.fromiter(
+        (np.nan if r.longitude is None else r.longitude for r in rows),
+        dtype=np.float64,
+        count=count,
+    )
+    received = np.array([r.received_at for r in rows], dtype="datetime64[s]").astype(
+        np.int64, copy=False
+    )
+    valid = np.isfinite(latitudes) & np.isfinite(longitudes)
+    valid &= np.array([r.received_at is not None for r in rows], dtype=bool)
+
+    return latitudes, longitudes, np.where(valid, received, 0), valid
+
+
+def project_to_meters(
+    latitudes: np.ndarray, longitudes: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Proyecta coordenadas geográficas a un plano local en metros.
+
+    Usa una proyección equirectangular centrada en la latitud media del
+    recorrido, suficiente para distancias de una trayectoria vehicular.
+
+    Args:
+        latitudes: Latitudes en grados
+        longitudes: Longitudes en grados
+
+    Returns:
+        Tupla (x, y) en metros
+    """
+    lat_rad = np.radians(latitudes)
+    cos_lat0 = np.cos(lat_rad.mean()) if len(lat_rad) else 1.0
+    x = EARTH_RADIUS_M * np.radians(longitudes) * cos_lat0
+    y = EARTH_RADIUS_M * lat_rad
+    return x, y
+
+
+def _segment_distances(
+    x: np.ndarray, y: np.ndarray, start: int, end: int
+) -> np.ndarray:
+    """Distancia de los puntos internos (start, end) al segmento start→end."""
+    px, py = x[start + 1 : end], y[start + 1 : end]
+    ax, ay = x[start], y[start]
+    dx, dy = x[end] - ax, y[end] - ay
+    length_sq = dx * dx + dy * dy
+
+    if length_sq == 0.0:
+        return np.hypot(px - ax, py - ay)
+
+    t = np.clip(((px - ax) * dx + (py - ay) * dy) / length_sq, 0.0, 1.0)
+    return np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def douglas_peucker_mask(x: np.ndarray, y: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Calcula qué puntos conserva Douglas–Peucker.
+
+    Implementación iterativa (sin recursión) en la que cada segmento se evalúa
+    con una sola operación vectorizada sobre sus puntos internos.
+
+    Args:
+        x: Coordenadas x en metros
+        y: Coordenadas y en metros
+        tolerance: Desviación máxima permitida en metros
+
+    Returns:
+        Máscara booleana con los puntos a conservar (extremos siempre incluidos)
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start <= 1:
+            continue
+
+        distances = _segment_distances(x, y, start, end)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
+
+
+def bucket_mask(epochs: np.ndarray, bucket_seconds: int) -> np.ndarray:
+    """
+    Conserva un punto por ventana de tiempo.
+
+    Se queda con la primera aparición de cada ventana; como el histórico viene
+    ordenado por received_at descendente, es el punto más reciente de la ventana.
+
+    Args:
+        epochs: received_at en segundos desde epoch
+        bucket_seconds: Tamaño de la ventana en segundos
+
+    Returns:
+        Máscara booleana con los puntos a conservar
+    """
+    keep = np.zeros(len(epochs), dtype=bool)
+    _, first = np.unique(epochs // bucket_seconds, return_index=True)
+    keep[first] = True
+    return keep
+
+
+def simplify_track(
+    rows: Sequence,
+    tolerance_m: float | None = None,
+    bucket_seconds: int | None = None,
+) -> list:
+    """
+    Simplifica una trayectoria conservando su orden original.
+
+    Las filas sin coordenadas o sin received_at no se pueden dibujar y se
+    descartan. Si se indican ambos parámetros, primero se aplica el muestreo
+    por tiempo y después Douglas–Peucker sobre los puntos resultantes.
+
+    Args:
+        rows: Filas del histórico con latitude, longitude y received_at
+        tolerance_m: Tolerancia de Douglas–Peucker en metros (opcional)
+        bucket_seconds: Tamaño de la ventana de muestreo en segundos (opcional)
+
+    Returns:
+        Lista con las filas conservadas
+    """
+    if tolerance_m is None and bucket_seconds is None:
+        return list(rows)
+
+    if not rows:
+        return []
+
+    latitudes, longitudes, epochs, valid = track_columns(rows)
+    indices = np.flatnonzero(valid)
+
+    if bucket_seconds is not None:
+        indices = indices[bucket_mask(epochs[indices], bucket_seconds)]
+
+    if tolerance_m is not None:
+        x, y = project_to_meters(latitudes[indices], longitudes[indices])
+        indices = indices[douglas_peucker_mask(x, y, tolerance_m)]
+
+    return [rows[i] for i in indices]
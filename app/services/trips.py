@@ -0,0 +1,217 @@
+"""
+Segmentación del histórico diario de un dispositivo en viajes y paradas.
+
+Un punto está "en movimiento" si el motor está encendido (`engine_status`)
+y la velocidad alcanza TRIPS_MIN_SPEED_KMH. Las corridas consecutivas de
+puntos en movimiento forman viajes y el resto paradas; las paradas más cortas
+que TRIPS_MIN_STOP_SECONDS entre dos viajes (semáforos, tráfico) se unen al
+viaje. Distancias (haversine) y duraciones se calculan con numpy sobre las
+columnas completas del día.
+
+Los días cerrados (ver `is_closed_day`) no cambian, así que su resultado se
+guarda en una caché LRU por (device_id, fecha) y las consultas repetidas no
+tocan la base de datos.
+"""
+
+from collections.abc import Sequence
+from datetime import date
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.communications import CommunicationResponse
+from app.services.repository import get_communications, is_closed_day
+from app.services.track_simplification import track_columns
+from app.utils.cache import LRUCache
+from app.utils.geo import haversine_m
+
+ENGINE_ON = "ON"
+
+# (device_id, fecha) -> resultado de días cerrados
+trips_cache = LRUCache(settings.TRIPS_CACHE_SIZE)
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Índice inicial y estado de cada corrida de valores iguales."""
+    starts = np.r_[0, np.flatnonzero(mask[1:] != mask[:-1]) + 1]
+    return starts, mask[starts]
+
+
+def _run_bounds(
+    starts: np.ndarray, states: np.ndarray, n: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Punto inicial y final de cada segmento, compartidos entre vecinos.
+
+    Un viaje empieza en el último punto detenido (el tramo hacia el primer
+    punto en movimiento ya es desplazamiento) y una parada empieza en su
+    primer punto.
+    """
+    bounds = starts[1:] - states[1:]
+    return np.r_[0, bounds], np.r_[bounds, n - 1]
+
+
+def segment_track(  # noqa: PLR0913, PLR0917
+    epochs: np.ndarray,
+    latitudes: np.ndarray,
+    longitudes: np.ndarray,
+    speeds: np.ndarray,
+    engine_on: np.ndarray,
+    min_speed_kmh: float,
+    min_stop_seconds: int,
+) -> list[dict]:
+    """
+    Divide una trayectoria ordenada por tiempo en viajes y paradas.
+
+    Los segmentos son contiguos (cada uno termina en el punto donde empieza el
+    siguiente), de modo que la suma de distancias y duraciones de los
+    segmentos es la del día completo.
+
+    Args:
+        epochs: received_at en segundos, ascendente
+        latitudes: Latitudes en grados
+        longitudes: Longitudes en grados
+        speeds: Velocidades en km/h (sin nulos)
+        engine_on: Máscara de motor encendido
+        min_speed_kmh: Velocidad mínima para considerar movimiento
+        min_stop_seconds: Duración mínima de una parada entre dos viajes
+
+    Returns:
+        Lista de segmentos con índices, duración, distancia y velocidades
+    """
+    n = len(epochs)
+    if n == 0:
+        return []
+
+    moving = engine_on & (speeds >= min_speed_kmh)
+    starts, states = _runs(moving)
+    first, last = _run_bounds(starts, states, n)
+
+    # Paradas cortas entre dos viajes -> parte del viaje
+    interior = np.zeros(len(starts), dtype=bool)
+    interior[1:-1] = True
+    short_stops = ~states & interior & (epochs[last] - epochs[first] < min_stop_seconds)
+    if short_stops.any():
+        moving = np.repeat(states | short_stops, np.diff(np.r_[starts, n]))
+        starts, states = _runs(moving)
+        first, last = _run_bounds(starts, states, n)
+
+    steps = haversine_m(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+    cumulative = np.r_[0.0, np.cumsum(steps)]
+    distances = cumulative[last] - cumulative[first]
+    durations = epochs[last] - epochs[first]
+    points = np.diff(np.r_[starts, n])
+    max_speeds = np.maximum.reduceat(speeds, starts)
+    avg_speeds = np.add.reduceat(speeds, starts) / points
+
+    return [
+        {
+            "kind": "trip" if state else "stop",
+            "start": int(start),
+            "end": int(end),
+            "duration_seconds": int(duration),
+            "distance_m": round(float(distance), 1),
+            "max_speed": round(float(max_speed), 2),
+            "avg_speed": round(float(avg_speed), 2),
+            "points": int(count),
+        }
+        for state, start, end, duration, distance, max_speed, avg_speed, count in zip(
+            states,
+            first,
+            last,
+            durations,
+            distances,
+            max_speeds,
+            avg_speeds,
+            points,
+            strict=True,
+        )
+    ]
+
+
+def build_trips(device_id: str, day: date, rows: Sequence) -> dict:
+    """
+    Calcula viajes y paradas a partir de las filas del histórico de un día.
+
+    Args:
+        device_id: ID del dispositivo
+        day: Fecha consultada
+        rows: Filas del histórico (cualquier orden) con latitude, longitude,
+            speed, engine_status y received_at
+
+    Returns:
+        Diccionario compatible con DeviceTripsResponse
+    """
+    latitudes, longitudes, epochs, valid = track_columns(rows)
+    order = np.flatnonzero(valid)
+    order = order[np.argsort(epochs[order], kind="stable")]
+
+    speeds = np.fromiter(
+        (0.0 if rows[i].speed is None else rows[i].speed for i in order),
+        dtype=np.float64,
+        count=len(order),
+    )
+    engine_on = np.fromiter(
+        ((rows[i].engine_status or "").upper() == ENGINE_ON for i in order),
+        dtype=bool,
+        count=len(order),
+    )
+
+    segments = segment_track(
+        epochs[order],
+        latitudes[order],
+        longitudes[order],
+        speeds,
+        engine_on,
+        settings.TRIPS_MIN_SPEED_KMH,
+        settings.TRIPS_MIN_STOP_SECONDS,
+    )
+
+    for segment in segments:
+        first, last = order[segment.pop("start")], order[segment.pop("end")]
+        segment["start_time"] = rows[first].received_at
+        segment["end_time"] = rows[last].received_at
+        segment["start_latitude"] = latitudes[first]
+        segment["start_longitude"] = longitudes[first]
+        segment["end_latitude"] = latitudes[last]
+        segment["end_longitude"] = longitudes[last]
+
+    return {
+        "device_id": device_id,
+        "received_at": day,
+        "trips": sum(s["kind"] == "trip" for s in segments),
+        "stops": sum(s["kind"] == "stop" for s in segments),
+        "total_distance_m": round(sum(s["distance_m"] for s in segments), 1),
+        "segments": segments,
+    }
+
+
+async def get_device_trips(session, device_id: str, day: date) -> dict:
+    """
+    Obtiene los viajes y paradas de un dispositivo en un día.
+
+    Los días cerrados se sirven desde la caché una vez calculados; un día
+    que aún puede recibir comunicaciones atrasadas se recalcula.
+
+    Args:
+        session: Sesión de base de datos
+        device_id: ID del dispositivo
+        day: Fecha a segmentar
+
+    Returns:
+        Diccionario compatible con DeviceTripsResponse
+    """
+    key = (device_id, day)
+    cached = trips_cache.get(key)
+    if cached is not None:
+        return cached
+
+    rows = await get_communications(
+        session, [device_id], received_at=day, schema=CommunicationResponse
+    )
+    result = build_trips(device_id, day, rows)
+
+    if is_closed_day(day):
+        trips_cache.set(key, result)
+
+    return result
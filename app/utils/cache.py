@@ -0,0 +1,76 @@
+# app/utils/cache.py
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class LRUCache:
+    """Caché en memoria acotada; descarta la entrada usada hace más tiempo."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Devuelve el valor y lo marca como usado recientemente."""
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            return default
+        return self._data[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda el valor, descartando la entrada más antigua si no hay espacio."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas en una sola ejecución.
+
+    La primera llamada con una clave inicia la consulta; las que llegan con la
+    misma clave mientras está en curso esperan ese mismo resultado (u error)
+    en lugar de ejecutarla otra vez. Al terminar la clave se libera: no es una
+    caché, la siguiente llamada vuelve a consultar.
+
+    El resultado es el mismo objeto para todos los que esperan, así que no se
+    debe modificar. Si un llamador se cancela (cliente desconectado) la
+    consulta sigue para los demás.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(
+        self, key: Hashable, fn: Callable[..., Awaitable], *args, **kwargs
+    ) -> Any:
+        """Ejecuta fn(*args, **kwargs) o se une a la ejecución en curso de key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Marca el error como leído aunque todos los llamadores se hayan cancelado
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,24 @@
+# app/utils/geo.py
+import numpy as np
+
+# Radio medio de la Tierra en metros
+EARTH_RADIUS_M = 6_371_008.8
+
+# Rango válido de coordenadas en grados
+MAX_LATITUDE = 90.0
+MAX_LONGITUDE = 180.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Distancia de gran círculo en metros (fórmula de haversine).
+
+    Acepta escalares o arrays de numpy en grados; con arrays el cálculo es
+    vectorizado elemento a elemento.
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
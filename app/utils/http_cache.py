@@ -0,0 +1,70 @@
+# app/utils/http_cache.py
+import hashlib
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Sufijos que CompressionMiddleware agrega al ETag de una respuesta comprimida
+ENCODING_SUFFIXES = ("-zstd", "-br", "-gzip")
+
+
+def make_etag(*parts) -> str:
+    """ETag fuerte a partir de los valores que determinan el contenido."""
+    digest = hashlib.blake2b(
+        "|".join(map(str, parts)).encode(), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value: datetime) -> str:
+    """Formatea un datetime (naive = UTC) como fecha HTTP (RFC 9110)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return format_datetime(value.astimezone(UTC), usegmt=True)
+
+
+def _opaque_tag(tag: str) -> str:
+    """Normaliza un ETag para la comparación débil de If-None-Match."""
+    tag = tag.strip().removeprefix("W/")
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    """
+    Indica si la copia del cliente sigue vigente según los headers de caché
+    (ETag y Last-Modified) que tendría la respuesta.
+
+    If-None-Match tiene prioridad; If-Modified-Since solo se evalúa si el
+    cliente no envía ETags. Una respuesta sin validadores nunca es 304.
+    """
+    if "ETag" not in headers:
+        return False
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        return _opaque_tag(headers["ETag"]) in {
+            _opaque_tag(tag) for tag in if_none_match.split(",")
+        }
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or "Last-Modified" not in headers:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def not_modified_response(headers: dict) -> Response:
+    """Respuesta 304 con los headers de validación y caché."""
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,174 @@
+"""
+Benchmark de la paginación keyset de /events a distintas profundidades.
+
+Carga eventos sintéticos en un schema aparte (`bench_events`, se elimina al
+terminar) con el índice de `migrations/005_events_unit_keyset_index.sql` y
+mide la latencia de una página de `get_events` a la profundidad indicada,
+comparando:
+- row: comparación de fila (occurred_at, id) < (:oa, :id) (la actual)
+- cast: occurred_at < :oa OR (occurred_at = :oa AND id::text < :id)
+  (la anterior)
+
+Usa la base de datos de la configuración (DB_*).
+
+Uso:
+    python -m benchmarks.bench_events_pagination [--events 1000000] [--units 4]
+        [--limit 20] [--depths 1 100 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import String, and_, cast, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.models.events import Base, Event
+from app.services import events_repository
+from app.services.events_repository import encode_cursor
+
+SCHEMA = "bench_events"
+START = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def _cast_keyset_clause(is_desc: bool, cursor_oa: datetime, cursor_id: uuid.UUID):
+    """Predicado anterior: el id se compara como texto."""
+    if is_desc:
+        return or_(
+            Event.occurred_at < cursor_oa,
+            and_(
+                Event.occurred_at == cursor_oa,
+                cast(Event.id, String) < str(cursor_id),
+            ),
+        )
+    return or_(
+        Event.occurred_at > cursor_oa,
+        and_(Event.occurred_at == cursor_oa, cast(Event.id, String) > str(cursor_id)),
+    )
+
+
+KEYSET_CLAUSES = {
+    "row": events_repository._keyset_clause,
+    "cast": _cast_keyset_clause,
+}
+
+
+async def _load(engine, events: int, units: list[uuid.UUID]) -> None:
+    """Crea el schema con los eventos (3 por segundo, para tener empates)."""
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        await conn.run_sync(Base.metadata.create_all)
+
+        type_id = uuid.uuid4()
+        await conn.execute(
+            text(f"INSERT INTO {SCHEMA}.event_types (id, code) VALUES (:id, 'BENCH')"),
+            {"id": type_id},
+        )
+        await conn.execute(
+            text(f"""
+                INSERT INTO {SCHEMA}.events
+                    (id, source_type, source_id, unit_id, event_type_id, occurred_at)
+                SELECT gen_random_uuid(), 'device', 'bench',
+                       (CAST(:units AS uuid[]))[1 + g % :unit_count], :type_id,
+                       CAST(:start AS timestamptz) + (g / 3) * interval '1 second'
+                FROM generate_series(0, CAST(:events AS integer) - 1) AS g
+                """),
+            {
+                "units": units,
+                "unit_count": len(units),
+                "type_id": type_id,
+                "start": START,
+                "events": events,
+            },
+        )
+        await conn.execute(
+            text(
+                f"CREATE INDEX ix_events_unit_occurred_id "
+                f"ON {SCHEMA}.events (unit_id, occurred_at, id)"
+            )
+        )
+        await conn.execute(text(f"ANALYZE {SCHEMA}.events"))
+
+
+async def _cursor_at(session, unit_id: uuid.UUID, offset: int) -> str | None:
+    """Cursor que devuelve la página anterior a la fila `offset` (orden DESC)."""
+    if offset == 0:
+        return None
+    row = (
+        await session.execute(
+            text(
+                f"SELECT occurred_at, id FROM {SCHEMA}.events WHERE unit_id = :unit "
+                "ORDER BY occurred_at DESC, id DESC OFFSET :offset LIMIT 1"
+            ),
+            {"unit": unit_id, "offset": offset - 1},
+        )
+    ).one()
+    return encode_cursor(row.occurred_at, row.id)
+
+
+async def _measure(session, unit_id, cursor, limit: int, repeat: int) -> float:
+    window = (START, START + timedelta(days=365))
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await events_repository._get_events(
+            session, [unit_id], *window, limit, "desc", cursor
+        )
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def run(args) -> None:
+    units = [uuid.uuid4() for _ in range(args.units)]
+    engine = create_async_engine(settings.DATABASE_URL).execution_options(
+        schema_translate_map={None: SCHEMA}
+    )
+    try:
+        await _load(engine, args.events, units)
+        print(
+            f"{args.events:,} eventos en {args.units} unidades, "
+            f"páginas de {args.limit}, mejor de {args.repeat} repeticiones"
+        )
+        print(f"{'página':>8} " + " ".join(f"{name:>10}" for name in KEYSET_CLAUSES))
+
+        async with AsyncSession(engine) as session:
+            for depth in args.depths:
+                cursor = await _cursor_at(session, units[0], (depth - 1) * args.limit)
+                timings = []
+                for clause in KEYSET_CLAUSES.values():
+                    events_repository._keyset_clause = clause
+                    timings.append(
+                        await _measure(
+                            session, units[0], cursor, args.limit, args.repeat
+                        )
+                    )
+                events_repository._keyset_clause = KEYSET_CLAUSES["row"]
+                print(f"{depth:>8,} " + " ".join(f"{t * 1000:8.2f}ms" for t in timings))
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--units", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    needed = max(args.depths) * args.limit
+    if args.events // args.units < needed:
+        parser.error(f"--events debe dar al menos {needed:,} eventos por unidad")
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
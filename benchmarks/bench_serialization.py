@@ -0,0 +1,101 @@
+"""
+Benchmark de serialización del histórico de comunicaciones.
+
+Compara filas/segundo entre:
+- pydantic: model_validate por fila + validación y serialización contra
+  `response_model` (lo que hacía la ruta antes del fast path)
+- orjson: `dump_rows` sobre las filas del repositorio
+
+Uso:
+    python -m benchmarks.bench_serialization [--rows 50000] [--repeat 5]
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+from sqlalchemy.engine.result import result_tuple
+
+from app.schemas.communications import CommunicationResponse
+from app.services.serialization import dump_rows
+
+
+def _sample_rows(count: int) -> list:
+    """Genera filas Row de SQLAlchemy equivalentes a las del repositorio."""
+    make_row = result_tuple(
+        [
+            "id",
+            "device_id",
+            "latitude",
+            "longitude",
+            "speed",
+            "course",
+            "gps_datetime",
+            "main_battery_voltage",
+            "odometer",
+            "engine_status",
+            "received_at",
+        ]
+    )
+    start = datetime(2024, 1, 15)
+    return [
+        make_row(
+            (
+                i,
+                "867564050638581",
+                Decimal("19.43260000") + Decimal(i) / 10**8,
+                Decimal("-99.13320000") - Decimal(i) / 10**8,
+                Decimal("45.50"),
+                Decimal("180.00"),
+                start + timedelta(seconds=i),
+                Decimal("12.50"),
+                150000 + i,
+                "ON",
+                start + timedelta(seconds=i, milliseconds=250),
+            )
+        )
+        for i in range(count)
+    ]
+
+
+def _pydantic_path(rows: list) -> bytes:
+    adapter = TypeAdapter(list[CommunicationResponse])
+    validated = [CommunicationResponse.model_validate(r) for r in rows]
+    return adapter.dump_json(adapter.validate_python(validated))
+
+
+def _orjson_path(rows: list) -> bytes:
+    return dump_rows(rows, CommunicationResponse)
+
+
+def _measure(name: str, func: Callable, rows: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - started)
+
+    rate = len(rows) / best
+    print(f"{name:<10} {best * 1000:9.1f} ms  {rate:12,.0f} filas/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = _sample_rows(args.rows)
+    print(f"{args.rows:,} filas, mejor de {args.repeat} repeticiones")
+
+    before = _measure("pydantic", _pydantic_path, rows, args.repeat)
+    after = _measure("orjson", _orjson_path, rows, args.repeat)
+    print(f"speedup    {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+-- Índices para la paginación keyset del histórico de comunicaciones.
+--
+-- GET /api/v1/communications y /api/v1/devices/{device_id}/communications
+-- ordenan y paginan por (received_at DESC NULLS LAST, id DESC) dentro de cada
+-- dispositivo. Con estos índices cada página es un escaneo acotado del rango
+-- del cursor.
+--
+-- Ejecutar fuera de una transacción (CREATE INDEX CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_communications_suntech_device_received_id
+    ON communications_suntech (device_id, received_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_communications_queclink_device_received_id
+    ON communications_queclink (device_id, received_at DESC NULLS LAST, id DESC);
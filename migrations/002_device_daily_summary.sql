@@ -0,0 +1,25 @@
+-- Agregados diarios por dispositivo para GET /api/v1/summaries/daily.
+--
+-- La API llena esta tabla bajo demanda: los días pasados se calculan una sola
+-- vez (closed = true) y el día en curso se actualiza de forma incremental a
+-- partir de last_received_at. Ver app/services/summaries.py.
+
+CREATE TABLE IF NOT EXISTS device_daily_summary (
+    device_id          VARCHAR(100)  NOT NULL,
+    day                DATE          NOT NULL,
+    points             INTEGER       NOT NULL DEFAULT 0,
+    odometer_start     BIGINT,
+    odometer_end       BIGINT,
+    idle_time_start    INTEGER,
+    idle_time_end      INTEGER,
+    max_speed          NUMERIC(8, 2),
+    speed_sum          NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    speed_count        INTEGER       NOT NULL DEFAULT 0,
+    engine_on_seconds  INTEGER       NOT NULL DEFAULT 0,
+    first_received_at  TIMESTAMP,
+    last_received_at   TIMESTAMP,
+    last_engine_on     BOOLEAN,
+    closed             BOOLEAN       NOT NULL DEFAULT FALSE,
+    updated_at         TIMESTAMP,
+    PRIMARY KEY (device_id, day)
+);
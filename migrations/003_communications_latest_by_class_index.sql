@@ -0,0 +1,14 @@
+-- Índices para la última comunicación por clase de mensaje.
+--
+-- GET /api/v1/devices/{device_id}/communications/latest?class=ALERT busca la
+-- última comunicación de esa clase en el histórico cuando no está en la caché
+-- de estado actual. Con estos índices cada tabla lo resuelve con un LIMIT 1
+-- sobre el índice, sin recorrer los mensajes de otras clases.
+--
+-- Ejecutar fuera de una transacción (CREATE INDEX CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_communications_suntech_device_class_received
+    ON communications_suntech (device_id, msg_class, received_at DESC NULLS LAST, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_communications_queclink_device_class_received
+    ON communications_queclink (device_id, msg_class, received_at DESC NULLS LAST, id DESC);
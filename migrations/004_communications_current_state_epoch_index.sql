@@ -0,0 +1,11 @@
+-- Índice para los cambios del estado actual desde una marca.
+--
+-- GET /api/v1/communications/latest/changes?since=<epoch> busca
+-- `received_epoch > since` en communications_current_state cuando la caché de
+-- estado actual no está cargada. Con este índice la consulta recorre solo los
+-- dispositivos que cambiaron, no la flota completa.
+--
+-- Ejecutar fuera de una transacción (CREATE INDEX CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_communications_current_state_received_epoch
+    ON communications_current_state (received_epoch);
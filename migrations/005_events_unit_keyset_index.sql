@@ -0,0 +1,11 @@
+-- Índice para la paginación keyset de eventos.
+--
+-- GET /api/v1/events filtra por unit_id y pagina con la comparación de fila
+-- (occurred_at, id) < (:oa, :id) (o > en orden ascendente), ordenando por
+-- occurred_at, id. Con este índice cada página es un escaneo acotado del
+-- rango del cursor, sin importar qué tan profunda sea.
+--
+-- Ejecutar fuera de una transacción (CREATE INDEX CONCURRENTLY).
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_events_unit_occurred_id
+    ON events (unit_id, occurred_at, id);
@@ -17,7 +17,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.security import create_access_token
 from app.main import app
 from app.models.communications import Base, CommunicationQueclink, CommunicationSuntech
@@ -116,6 +116,7 @@ def client(override_get_db) -> Generator:
     Cliente de test síncrono con TestClient.
     """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
@@ -129,6 +130,7 @@ async def async_client(override_get_db) -> AsyncGenerator:
     Cliente de test asíncrono con httpx.AsyncClient.
     """
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     async with AsyncClient(app=app, base_url="http://test") as ac:
         yield ac
@@ -0,0 +1,116 @@
+"""Tests unitarios para los formatos columnares del histórico."""
+
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pytest
+
+from app.schemas.communications import (
+    CommunicationFullResponse,
+    CommunicationResponse,
+)
+from app.services.columnar import (
+    arrow_ipc_stream,
+    arrow_schema,
+    build_columns,
+    columnar_json,
+)
+
+
+def _row(comm_id: int, **fields):
+    values = {
+        "id": comm_id,
+        "device_id": "867564050638581",
+        "latitude": Decimal("19.43260000"),
+        "longitude": Decimal("-99.13320000"),
+        "speed": Decimal("45.50"),
+        "gps_datetime": datetime(2024, 1, 15, 10, 30),
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+async def _iterate(rows):
+    for row in rows:
+        yield row
+
+
+@pytest.mark.unit
+class TestBuildColumns:
+    """Valida la transposición de filas a columnas."""
+
+    def test_columns_follow_schema_order(self):
+        columns = build_columns([_row(1)], CommunicationResponse)
+
+        assert list(columns) == list(CommunicationResponse.model_fields)
+
+    def test_decimals_as_float_and_missing_as_none(self):
+        columns = build_columns(
+            [_row(1), _row(2, latitude=None)], CommunicationResponse
+        )
+
+        assert columns["latitude"] == [19.4326, None]
+        assert columns["alert_type"] == [None, None]
+
+    def test_arrow_schema_types(self):
+        schema = arrow_schema(CommunicationFullResponse)
+
+        assert schema.field("id").type == pa.int64()
+        assert schema.field("latitude").type == pa.float64()
+        assert schema.field("received_at").type == pa.timestamp("us")
+        assert schema.field("raw_message").type == pa.string()
+
+
+@pytest.mark.unit
+class TestArrowIpcStream:
+    """Valida el stream Arrow IPC escrito por lotes."""
+
+    def test_round_trip_in_batches(self):
+        rows = [_row(i) for i in range(7)]
+
+        async def collect():
+            return [
+                chunk
+                async for chunk in arrow_ipc_stream(
+                    _iterate(rows), CommunicationResponse, batch_size=3
+                )
+            ]
+
+        chunks = asyncio.run(collect())
+        table = pa.ipc.open_stream(b"".join(chunks)).read_all()
+
+        assert table.num_rows == 7
+        assert len(table.to_batches()) == 3
+        assert table.column("id").to_pylist() == list(range(7))
+        assert table.column("longitude")[0].as_py() == -99.1332
+
+    def test_empty_stream_has_schema(self):
+        async def collect():
+            return [
+                chunk
+                async for chunk in arrow_ipc_stream(
+                    _iterate([]), CommunicationResponse, batch_size=3
+                )
+            ]
+
+        table = pa.ipc.open_stream(b"".join(asyncio.run(collect()))).read_all()
+
+        assert table.num_rows == 0
+        assert table.schema == arrow_schema(CommunicationResponse)
+
+
+@pytest.mark.unit
+class TestColumnarJson:
+    """Valida el documento JSON columnar."""
+
+    def test_document_layout(self):
+        document = json.loads(columnar_json([_row(1), _row(2)], CommunicationResponse))
+
+        assert document["count"] == 2
+        assert document["columns"]["id"] == [1, 2]
+        assert document["columns"]["speed"] == [45.5, 45.5]
+        assert document["columns"]["gps_datetime"][0] == "2024-01-15T10:30:00"
@@ -0,0 +1,116 @@
+"""Tests unitarios para la compresión de respuestas HTTP."""
+
+import gzip
+
+import pytest
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.middleware import CompressionMiddleware, negotiate_encoding
+
+PAYLOAD = b'{"device_id":"867564050638581","latitude":"19.43260000"}\n' * 200
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    async def big():
+        return Response(PAYLOAD, media_type="application/json")
+
+    @app.get("/small")
+    async def small():
+        return Response(b'{"ok":true}', media_type="application/json")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(5):
+                yield PAYLOAD
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.get("/parquet")
+    async def parquet():
+        return Response(PAYLOAD, media_type="application/vnd.apache.parquet")
+
+    return app
+
+
+@pytest.mark.unit
+class TestNegotiateEncoding:
+    """Valida la elección de codificación a partir de Accept-Encoding."""
+
+    def test_prefers_zstd_on_ties(self):
+        assert negotiate_encoding("gzip, deflate, br, zstd") == "zstd"
+
+    def test_respects_quality(self):
+        assert negotiate_encoding("zstd;q=0.5, gzip") == "gzip"
+        assert negotiate_encoding("gzip;q=0, identity") is None
+
+    def test_wildcard_and_empty(self):
+        assert negotiate_encoding("*") == "zstd"
+        assert negotiate_encoding("") is None
+
+
+@pytest.mark.unit
+class TestCompressionMiddleware:
+    """Valida la compresión de respuestas completas y en streaming."""
+
+    def test_large_response_is_compressed(self):
+        client = TestClient(_app())
+
+        response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert int(response.headers["content-length"]) < len(PAYLOAD) / 10
+        assert response.content == PAYLOAD
+
+    def test_small_response_is_not_compressed(self):
+        client = TestClient(_app())
+
+        response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_streaming_chunks_are_compressed(self):
+        client = TestClient(_app())
+
+        with client.stream(
+            "GET", "/stream", headers={"Accept-Encoding": "zstd"}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "zstd"
+        assert "content-length" not in response.headers
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        assert decompressor.decompress(raw) == PAYLOAD * 5
+
+    def test_streaming_gzip_is_valid(self):
+        client = TestClient(_app())
+
+        with client.stream(
+            "GET", "/stream", headers={"Accept-Encoding": "gzip"}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert gzip.decompress(raw) == PAYLOAD * 5
+
+    def test_already_compressed_types_are_skipped(self):
+        client = TestClient(_app())
+
+        response = client.get("/parquet", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+
+    def test_brotli(self):
+        client = TestClient(_app())
+
+        response = client.get("/big", headers={"Accept-Encoding": "br"})
+
+        assert response.headers["content-encoding"] == "br"
+        assert response.content == PAYLOAD
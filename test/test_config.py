@@ -2,9 +2,13 @@
 Tests para el módulo de configuración.
 """
 
+import os
+
 import pytest
 
 from app.core.config import settings
+from app.services import kafka_client as kafka_client_module
+from app.services.kafka_client import KafkaClient
 
 
 @pytest.mark.unit
@@ -53,9 +57,65 @@ class TestSettings:
         assert settings.DB_CONNECTION_TIMEOUT_SECS > 0
         assert settings.DB_IDLE_TIMEOUT_SECS > 0
 
+    def test_replica_urls(self):
+        """
+        Test: Cada réplica usa las credenciales del primario y su propio host.
+        """
+        replica_settings = settings.model_copy(
+            update={"DB_REPLICA_HOSTS": "replica-1, replica-2:6432,"}
+        )
+
+        urls = replica_settings.REPLICA_DATABASE_URLS
+
+        assert len(urls) == 2
+        assert f"@replica-1:{settings.DB_PORT}/" in urls[0]
+        assert "@replica-2:6432/" in urls[1]
+        assert all(url.endswith(f"/{settings.DB_DATABASE}") for url in urls)
+
     def test_cors_settings_exist(self):
         """
         Test: Configuración CORS está presente.
         """
         assert settings.ALLOWED_ORIGINS is not None
         assert isinstance(settings.ALLOWED_ORIGINS, str)
+
+
+@pytest.mark.unit
+class TestKafkaGroupId:
+    """Cada instancia consume todas las particiones con su propio group id."""
+
+    def test_per_instance_group_id(self, monkeypatch):
+        """
+        Test: Por defecto el group id agrega el host y el pid.
+        """
+        monkeypatch.setattr(settings, "KAFKA_GROUP_ID_PER_INSTANCE", True)
+
+        group_id = KafkaClient()._group_id()
+
+        assert group_id.startswith(f"{settings.KAFKA_GROUP_ID}-")
+        assert group_id.endswith(f"-{os.getpid()}")
+
+    def test_shared_group_id(self, monkeypatch):
+        """
+        Test: Con KAFKA_GROUP_ID_PER_INSTANCE=false se usa KAFKA_GROUP_ID tal cual.
+        """
+        monkeypatch.setattr(settings, "KAFKA_GROUP_ID_PER_INSTANCE", False)
+
+        assert KafkaClient()._group_id() == settings.KAFKA_GROUP_ID
+
+    def test_per_instance_group_does_not_commit_offsets(self, monkeypatch):
+        """
+        Test: Con un group id por instancia no se hace commit de offsets.
+        """
+        configs = []
+        monkeypatch.setattr(
+            kafka_client_module,
+            "KafkaConsumer",
+            lambda *topics, **config: configs.append(config),
+        )
+
+        for per_instance in (True, False):
+            monkeypatch.setattr(settings, "KAFKA_GROUP_ID_PER_INSTANCE", per_instance)
+            KafkaClient()._create_consumer()
+
+        assert [c["enable_auto_commit"] for c in configs] == [False, True]
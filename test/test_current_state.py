@@ -0,0 +1,552 @@
+"""Tests unitarios para la caché en memoria del estado actual."""
+
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.main import app
+from app.models.communications import CommunicationCurrentState
+from app.services import current_state as current_state_module
+from app.services import repository
+from app.services.current_state import (
+    STATE_FIELDS,
+    CurrentStateCache,
+    current_state_message_handler,
+    state_from_kafka_event,
+)
+
+# Sesión sin engine: las consultas de prueba no llegan a la base de datos
+SESSION = AsyncSession()
+
+
+def _state(device_id: str, received_at: datetime, **extra) -> dict:
+    return {
+        "device_id": device_id,
+        "latitude": Decimal("19.43260000"),
+        "longitude": Decimal("-99.13320000"),
+        "msg_class": "STATUS",
+        "received_at": received_at,
+        **extra,
+    }
+
+
+@pytest.fixture
+def cache(monkeypatch) -> CurrentStateCache:
+    cache = CurrentStateCache()
+    monkeypatch.setattr(current_state_module, "current_state", cache)
+    monkeypatch.setattr(repository, "current_state", cache)
+    monkeypatch.setattr(current_state_module.settings, "KAFKA_TOPIC", "positions")
+    return cache
+
+
+@pytest.fixture
+def db_calls(monkeypatch) -> list:
+    calls = []
+
+    async def fake_query(_session, device_ids, msg_class=None):
+        calls.append((list(device_ids), msg_class))
+        return [
+            CommunicationCurrentState(
+                **_state(device_id, datetime(2024, 1, 1), received_epoch=1)
+            )
+            for device_id in device_ids
+            if device_id != "UNKNOWN"
+        ]
+
+    monkeypatch.setattr(repository, "_query_latest_communications", fake_query)
+    return calls
+
+
+@pytest.mark.unit
+class TestStateFromKafkaEvent:
+    """Los mensajes de Kafka se convierten a los tipos de la tabla."""
+
+    def test_coerces_column_types(self):
+        state = state_from_kafka_event(
+            {
+                "payload": {
+                    "data": {
+                        "device_id": "A",
+                        "latitude": 20.652472,
+                        "speed": "45.5",
+                        "satellites": "9",
+                        "unknown_field": "x",
+                    }
+                },
+                "timestamp": 1735689600000,
+            }
+        )
+
+        assert state == {
+            "device_id": "A",
+            "latitude": Decimal("20.652472"),
+            "speed": Decimal("45.5"),
+            "satellites": 9,
+            "received_at": datetime(2025, 1, 1),
+            "received_epoch": 1735689600,
+        }
+
+    def test_without_device_id(self):
+        assert state_from_kafka_event({"payload": {"latitude": 1.0}}) is None
+
+
+@pytest.mark.unit
+class TestCurrentStateCache:
+    """Valida la combinación de mensajes parciales y el orden temporal."""
+
+    def test_partial_update_keeps_other_fields(self):
+        cache = CurrentStateCache()
+        cache.upsert(_state("A", datetime(2024, 1, 1), odometer=1000))
+
+        cache.upsert({"device_id": "A", "latitude": Decimal("20"), "received_at": None})
+
+        (state,), _ = cache.get_many(["A"])
+        assert state.latitude == Decimal("20")
+        assert state.odometer == 1000
+
+    def test_older_state_is_ignored(self):
+        cache = CurrentStateCache()
+        cache.upsert(_state("A", datetime(2024, 1, 2)))
+
+        assert not cache.upsert(_state("A", datetime(2024, 1, 1), odometer=5))
+        (state,), _ = cache.get_many(["A"])
+        assert state.odometer is None
+
+    def test_get_many_reports_missing(self):
+        cache = CurrentStateCache()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+
+        found, missing = cache.get_many(["A", "B", "A"])
+
+        assert [s.device_id for s in found] == ["A"]
+        assert missing == ["B"]
+
+
+@pytest.mark.unit
+class TestGetLatestCommunications:
+    """El estado actual se sirve desde la caché; los faltantes desde la base."""
+
+    def test_not_ready_queries_database(self, cache, db_calls):
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+
+        asyncio.run(repository.get_latest_communications(SESSION, ["A"]))
+
+        assert db_calls == [(["A"], None)]
+
+    def test_hits_do_not_query_database(self, cache, db_calls):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+        cache.upsert(_state("B", datetime(2024, 1, 1), msg_class="ALERT"))
+        cache.upsert(_state("C", datetime(2024, 1, 1), latitude=None))
+
+        latest = asyncio.run(
+            repository.get_latest_communications(SESSION, ["B", "A", "C"])
+        )
+
+        assert [s.device_id for s in latest] == ["B", "A"]
+        assert db_calls == []
+
+    def test_stale_cache_queries_database(self, cache, db_calls, monkeypatch):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+        monkeypatch.setattr(
+            current_state_module.settings, "CURRENT_STATE_MAX_STALENESS_SECS", -1
+        )
+
+        asyncio.run(repository.get_latest_communications(SESSION, ["A"]))
+
+        assert not cache.serving
+        assert db_calls == [(["A"], None)]
+
+    def test_open_circuit_breaker_queries_database(self, cache, db_calls, monkeypatch):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+        monkeypatch.setattr(current_state_module.kafka_client, "_circuit_open", True)
+
+        asyncio.run(repository.get_latest_communications(SESSION, ["A"]))
+
+        assert db_calls == [(["A"], None)]
+
+    def test_kafka_message_keeps_cache_serving(self, cache, monkeypatch):
+        cache.mark_ready()
+        monkeypatch.setattr(
+            current_state_module.settings, "CURRENT_STATE_MAX_STALENESS_SECS", 60
+        )
+        cache.updated_at -= 120
+        assert not cache.serving
+
+        asyncio.run(
+            current_state_message_handler(
+                {"topic": "positions", "payload": {"data": {"device_id": "A"}}}
+            )
+        )
+
+        assert cache.serving
+
+    def test_misses_are_loaded_from_database(self, cache, db_calls):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+
+        first = asyncio.run(
+            repository.get_latest_communications(SESSION, ["A", "B", "UNKNOWN"])
+        )
+        second = asyncio.run(repository.get_latest_communications(SESSION, ["B"]))
+
+        assert [s.device_id for s in first] == ["A", "B"]
+        assert [s.device_id for s in second] == ["B"]
+        assert db_calls == [(["B", "UNKNOWN"], None)]
+
+
+@pytest.fixture
+def class_calls(monkeypatch) -> list:
+    calls = []
+
+    async def fake_query(_session, device_id, msg_class):
+        calls.append((device_id, msg_class))
+        if device_id == "UNKNOWN":
+            return None
+        return _state(device_id, datetime(2023, 12, 31), msg_class=msg_class)
+
+    monkeypatch.setattr(repository, "_query_latest_by_class", fake_query)
+    return calls
+
+
+@pytest.mark.unit
+class TestLatestByClass:
+    """La última comunicación de cada clase no depende de la fila del dispositivo."""
+
+    def test_alert_survives_newer_status(self, cache, class_calls):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1), msg_class="ALERT"))
+        cache.upsert(_state("A", datetime(2024, 1, 2), msg_class="STATUS"))
+
+        alerts = asyncio.run(
+            repository.get_latest_communications(SESSION, ["A"], msg_class="ALERT")
+        )
+        status = asyncio.run(
+            repository.get_latest_communications(SESSION, ["A"], msg_class="STATUS")
+        )
+
+        assert [s.received_at for s in alerts] == [datetime(2024, 1, 1)]
+        assert [s.received_at for s in status] == [datetime(2024, 1, 2)]
+        assert class_calls == []
+
+    def test_miss_is_loaded_from_history_once(self, cache, class_calls):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 2), msg_class="STATUS"))
+
+        for _ in range(2):
+            alerts = asyncio.run(
+                repository.get_latest_communications(
+                    SESSION, ["A", "UNKNOWN"], msg_class="ALERT"
+                )
+            )
+
+        assert [(s.device_id, s.msg_class) for s in alerts] == [("A", "ALERT")]
+        assert class_calls == [("A", "ALERT"), ("UNKNOWN", "ALERT")]
+        (device_state,), _ = cache.get_many(["A"])
+        assert device_state.msg_class == "STATUS"
+
+    def test_history_row_is_not_the_device_state(self, cache, class_calls, db_calls):
+        cache.mark_ready()
+
+        asyncio.run(
+            repository.get_latest_communications(SESSION, ["A"], msg_class="ALERT")
+        )
+        latest = asyncio.run(repository.get_latest_communications(SESSION, ["A"]))
+
+        assert cache.get_class("A", "ALERT")[0]
+        assert db_calls == [(["A"], None)]
+        assert [s.msg_class for s in latest] == ["STATUS"]
+
+    def test_newer_history_row_updates_device_state(self, cache, class_calls):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2023, 12, 30), msg_class="STATUS"))
+
+        asyncio.run(
+            repository.get_latest_communications(SESSION, ["A"], msg_class="ALERT")
+        )
+
+        (state,), _ = cache.get_many(["A"])
+        assert (state.msg_class, state.received_at) == (
+            "ALERT",
+            datetime(2023, 12, 31),
+        )
+
+    def test_misses_are_queried_concurrently(self, cache, monkeypatch):
+        in_flight = []
+        peak = []
+
+        async def fake_query(_session, device_id, msg_class):
+            in_flight.append(device_id)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.remove(device_id)
+            return _state(device_id, datetime(2023, 12, 31), msg_class=msg_class)
+
+        monkeypatch.setattr(repository, "_query_latest_by_class", fake_query)
+
+        alerts = asyncio.run(
+            repository.get_latest_communications(
+                SESSION, ["A", "B", "C"], msg_class="ALERT"
+            )
+        )
+
+        assert [s.device_id for s in alerts] == ["A", "B", "C"]
+        assert max(peak) == 3
+
+    def test_kafka_alert_replaces_known_absence(self, cache, class_calls):
+        cache.mark_ready()
+        asyncio.run(
+            repository.get_latest_communications(
+                SESSION, ["UNKNOWN"], msg_class="ALERT"
+            )
+        )
+
+        cache.upsert(_state("UNKNOWN", datetime(2024, 1, 1), msg_class="ALERT"))
+        alerts = asyncio.run(
+            repository.get_latest_communications(
+                SESSION, ["UNKNOWN"], msg_class="ALERT"
+            )
+        )
+
+        assert [s.device_id for s in alerts] == ["UNKNOWN"]
+        assert len(class_calls) == 1
+
+    def test_known_absence_expires(self, cache, class_calls, monkeypatch):
+        cache.mark_ready()
+        monkeypatch.setattr(
+            current_state_module.settings, "CURRENT_STATE_ABSENT_TTL_SECS", -1
+        )
+
+        for _ in range(2):
+            asyncio.run(
+                repository.get_latest_communications(
+                    SESSION, ["UNKNOWN"], msg_class="ALERT"
+                )
+            )
+
+        assert class_calls == [("UNKNOWN", "ALERT")] * 2
+
+    def test_alerts_topic_replaces_known_absence(self, cache, class_calls, monkeypatch):
+        monkeypatch.setattr(
+            current_state_module.settings, "KAFKA_ALERTS_TOPIC", "alerts"
+        )
+        cache.mark_ready()
+        asyncio.run(
+            repository.get_latest_communications(
+                SESSION, ["UNKNOWN"], msg_class="ALERT"
+            )
+        )
+
+        asyncio.run(
+            current_state_message_handler(
+                {
+                    "topic": "alerts",
+                    "payload": {
+                        "device_id": "UNKNOWN",
+                        "alert_type": "Engine OFF",
+                        "payload": {"latitude": 19.21, "longitude": -102.57},
+                    },
+                    "timestamp": 1735689600000,
+                }
+            )
+        )
+        alerts = asyncio.run(
+            repository.get_latest_communications(
+                SESSION, ["UNKNOWN"], msg_class="ALERT"
+            )
+        )
+
+        assert [s.device_id for s in alerts] == ["UNKNOWN"]
+        assert len(class_calls) == 1
+
+    def test_not_ready_queries_history(self, cache, class_calls):
+        alerts = asyncio.run(
+            repository.get_latest_communications(SESSION, ["A"], msg_class="ALERT")
+        )
+
+        assert [s.msg_class for s in alerts] == ["ALERT"]
+        assert class_calls == [("A", "ALERT")]
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestKafkaHandler:
+    """Las posiciones de Kafka actualizan la caché."""
+
+    def test_position_message_updates_cache(self, cache):
+        cache.upsert(_state("A", datetime(2024, 1, 1), engine_status="OFF"))
+
+        asyncio.run(
+            current_state_message_handler(
+                {
+                    "topic": "positions",
+                    "payload": {"data": {"device_id": "A", "engine_status": "ON"}},
+                    "timestamp": 1735689600000,
+                }
+            )
+        )
+
+        (state,), _ = cache.get_many(["A"])
+        assert state.engine_status == "ON"
+        assert state.received_epoch == 1735689600
+
+    def test_alert_message_updates_its_class(self, cache, monkeypatch):
+        monkeypatch.setattr(
+            current_state_module.settings, "KAFKA_ALERTS_TOPIC", "alerts"
+        )
+        cache.upsert(_state("A", datetime(2024, 1, 1), engine_status="ON"))
+
+        asyncio.run(
+            current_state_message_handler(
+                {
+                    "topic": "alerts",
+                    "payload": {
+                        "id": "5e29d441-16c6-43f2-ba48-650ea9946a58",
+                        "device_id": "A",
+                        "alert_type": "Engine OFF",
+                        "payload": {
+                            "engine_status": "OFF",
+                            "latitude": 19.216813,
+                            "longitude": -102.575137,
+                        },
+                        "occurred_at": "2026-03-29T20:56:34Z",
+                    },
+                    "timestamp": 1735689600000,
+                }
+            )
+        )
+
+        found, alert = cache.get_class("A", "ALERT")
+        assert found
+        assert alert.engine_status == "OFF"
+        assert alert.latitude == Decimal("19.216813")
+        assert alert.received_epoch == 1735689600
+        (state,), _ = cache.get_many(["A"])
+        assert (state.msg_class, state.engine_status) == ("STATUS", "ON")
+
+    def test_other_topics_are_ignored(self, cache, monkeypatch):
+        monkeypatch.setattr(current_state_module.settings, "KAFKA_ALERTS_TOPIC", "")
+
+        for topic in ("alerts", "other"):
+            asyncio.run(
+                current_state_message_handler(
+                    {"topic": topic, "payload": {"device_id": "A"}}
+                )
+            )
+
+        assert len(cache) == 0
+        assert cache.get_class("A", "ALERT") == (False, None)
+
+
+@pytest.mark.unit
+class TestLatestBulk:
+    """POST /communications/latest/bulk entrega el estado de toda la flota."""
+
+    def test_served_from_cache(self, cache, db_calls):
+        cache.mark_ready()
+        for i in range(3000):
+            cache.upsert(_state(f"D{i}", datetime(2024, 1, 1), received_epoch=i))
+        cache.upsert(_state("NOPOS", datetime(2024, 1, 1), latitude=None))
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/v1/communications/latest/bulk",
+            json={"device_ids": [f"D{i}" for i in range(3000)] + ["NOPOS"]},
+        )
+
+        data = response.json()
+        assert response.status_code == 200
+        assert len(data) == 3000
+        assert data[1] == {
+            **dict.fromkeys(STATE_FIELDS),
+            **_state("D1", datetime(2024, 1, 1), received_epoch=1),
+            "latitude": "19.43260000",
+            "longitude": "-99.13320000",
+            "received_at": "2024-01-01T00:00:00",
+        }
+        assert db_calls == []
+
+    def test_ndjson(self, cache):
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1)))
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/v1/communications/latest/bulk",
+            json={"device_ids": ["A"]},
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+        lines = response.content.splitlines()
+        assert [orjson.loads(line)["device_id"] for line in lines] == ["A"]
+
+    def test_empty_list_is_rejected(self):
+        client = TestClient(app)
+
+        response = client.post(
+            "/api/v1/communications/latest/bulk", json={"device_ids": []}
+        )
+
+        assert response.status_code == 422
+
+
+@pytest.mark.unit
+class TestLatestChanges:
+    """GET /communications/latest/changes entrega solo lo que cambió."""
+
+    def test_changed_since_follows_updates(self):
+        cache = CurrentStateCache()
+        cache.upsert(_state("A", datetime(2024, 1, 1), received_epoch=100))
+        cache.upsert(_state("B", datetime(2024, 1, 1), received_epoch=105))
+        cache.upsert(_state("A", datetime(2024, 1, 2), received_epoch=110))
+
+        assert [s.device_id for s in cache.changed_since(0)] == ["B", "A"]
+        assert [s.device_id for s in cache.changed_since(105)] == ["A"]
+        assert cache.changed_since(110) == []
+
+    def test_changed_since_sparse_epochs(self):
+        cache = CurrentStateCache()
+        cache.upsert(_state("A", datetime(2024, 1, 1), received_epoch=1_700_000_000))
+        cache.upsert(_state("B", datetime(2024, 1, 1), received_epoch=5))
+
+        assert [s.device_id for s in cache.changed_since(1)] == ["B", "A"]
+
+    def test_endpoint_from_cache(self, cache, monkeypatch):
+        monkeypatch.setattr(repository.settings, "LATEST_CHANGES_SAFETY_SECS", 0)
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1), received_epoch=100))
+        cache.upsert(_state("B", datetime(2024, 1, 1), received_epoch=200))
+        cache.upsert(_state("NOPOS", datetime(2024, 1, 1), received_epoch=300))
+        cache.upsert({"device_id": "NOPOS", "latitude": None, "received_at": None})
+        client = TestClient(app)
+
+        response = client.get("/api/v1/communications/latest/changes?since=100")
+
+        body = response.json()
+        assert response.status_code == 200
+        assert [c["device_id"] for c in body["data"]] == ["B"]
+        assert body["watermark"] == 300
+
+    def test_watermark_stays_behind_clock(self, cache):
+        now = int(datetime.now().timestamp())
+        cache.mark_ready()
+        cache.upsert(_state("A", datetime(2024, 1, 1), received_epoch=now + 60))
+
+        states, watermark = asyncio.run(repository.get_latest_changes(None, 10))
+
+        assert [s.device_id for s in states] == ["A"]
+        assert 10 < watermark < now + 60
+
+    def test_negative_since_is_rejected(self):
+        client = TestClient(app)
+
+        response = client.get("/api/v1/communications/latest/changes?since=-1")
+
+        assert response.status_code == 422
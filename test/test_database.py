@@ -0,0 +1,143 @@
+"""Tests unitarios para el enrutamiento de lecturas a réplicas."""
+
+import asyncio
+import contextlib
+
+import pytest
+
+from app.core import database
+from app.core.database import ReadReplica, get_read_db
+
+
+class _FakeSession:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc):
+        await self.close()
+
+
+class _FakeEngine:
+    """Engine que cuenta las conexiones tomadas del pool y no devueltas."""
+
+    def __init__(self, name: str, fail: bool):
+        self.url = type("Url", (), {"host": name})
+        self.fail = fail
+        self.checked_out = 0
+        self.connects = 0
+
+    @contextlib.asynccontextmanager
+    async def connect(self):
+        self.connects += 1
+        if self.fail:
+            raise OSError("connection refused")
+        self.checked_out += 1
+        try:
+            yield self
+        finally:
+            self.checked_out -= 1
+
+
+class _FakeReplica(ReadReplica):
+    def __init__(self, name: str, fail: bool = False):
+        self.name = name
+        self.unavailable_until = 0.0
+        self.needs_probe = True
+        self.engine = _FakeEngine(name, fail)
+
+    def sessionmaker(self):
+        return _FakeSession(self.name)
+
+
+def _read_session_name() -> str:
+    async def run():
+        dependency = get_read_db()
+        session = await anext(dependency)
+        await dependency.aclose()
+        return getattr(session, "name", "primary")
+
+    return asyncio.run(run())
+
+
+def _use_replicas(monkeypatch, *replicas) -> None:
+    monkeypatch.setattr(database, "replicas", list(replicas))
+    monkeypatch.setattr(database, "_replica_cycle", iter(replicas * 10))
+
+
+@pytest.mark.unit
+class TestGetReadDb:
+    """Las lecturas pesadas van a réplicas y caen al primario si fallan."""
+
+    def test_without_replicas_uses_primary(self, monkeypatch):
+        _use_replicas(monkeypatch)
+
+        assert _read_session_name() == "primary"
+
+    def test_round_robin(self, monkeypatch):
+        _use_replicas(monkeypatch, _FakeReplica("r1"), _FakeReplica("r2"))
+
+        assert [_read_session_name() for _ in range(3)] == ["r1", "r2", "r1"]
+
+    def test_unavailable_replica_is_skipped(self, monkeypatch):
+        broken = _FakeReplica("r1", fail=True)
+        _use_replicas(monkeypatch, broken, _FakeReplica("r2"))
+
+        assert [_read_session_name() for _ in range(3)] == ["r2", "r2", "r2"]
+        assert not broken.available
+
+    def test_probe_connection_is_released(self, monkeypatch):
+        replica = _FakeReplica("r1")
+        _use_replicas(monkeypatch, replica)
+
+        async def run():
+            dependency = get_read_db()
+            await anext(dependency)
+            checked_out = replica.engine.checked_out
+            await dependency.aclose()
+            return checked_out
+
+        assert asyncio.run(run()) == 0
+
+    def test_healthy_replica_is_probed_once(self, monkeypatch):
+        replica = _FakeReplica("r1")
+        _use_replicas(monkeypatch, replica)
+
+        assert [_read_session_name() for _ in range(3)] == ["r1"] * 3
+        assert replica.engine.connects == 1
+
+    def test_failure_during_request_takes_replica_out(self, monkeypatch):
+        replica = _FakeReplica("r1")
+        _use_replicas(monkeypatch, replica)
+
+        async def run(error):
+            dependency = get_read_db()
+            await anext(dependency)
+            with pytest.raises(type(error)):
+                await dependency.athrow(error)
+
+        asyncio.run(run(ValueError("consulta inválida")))
+        assert replica.available
+
+        asyncio.run(run(OSError("connection reset")))
+        assert not replica.available
+        assert _read_session_name() == "primary"
+
+        # Pasado el cooldown se verifica de nuevo antes de usarla
+        replica.unavailable_until = 0.0
+        assert _read_session_name() == "r1"
+        assert replica.engine.connects == 2
+
+    def test_falls_back_to_primary(self, monkeypatch):
+        _use_replicas(
+            monkeypatch, ReadReplica("postgresql+asyncpg://u:p@127.0.0.1:1/db")
+        )
+
+        assert _read_session_name() == "primary"
+        assert not database.replicas[0].available
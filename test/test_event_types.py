@@ -0,0 +1,176 @@
+"""Tests unitarios para el catálogo en memoria de event_types."""
+
+import asyncio
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import event_types as event_types_module
+from app.services import events_repository
+from app.services.event_types import EventTypeCatalog
+
+IGNITION = UUID("00000000-0000-0000-0000-000000000001")
+SPEED = UUID("00000000-0000-0000-0000-000000000002")
+UNIT = UUID("123e4567-e89b-12d3-a456-426614174000")
+OCCURRED_AT = datetime(2026, 3, 15, 10, 30, tzinfo=UTC)
+
+
+class _Result(list):
+    def fetchall(self):
+        return list(self)
+
+
+class FakeSession:
+    """Responde el catálogo y una página de eventos; registra las consultas."""
+
+    def __init__(self, types: list[tuple], events: list[tuple] = ()):
+        self.types = types
+        self.events = list(events)
+        self.queries = []
+
+    async def execute(self, query):
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        self.queries.append(sql)
+        if "FROM event_types" in sql:
+            return _Result(self.types)
+        return _Result(self.events)
+
+    @property
+    def catalog_loads(self) -> int:
+        return sum("FROM event_types" in sql for sql in self.queries)
+
+    @property
+    def event_queries(self) -> list[str]:
+        return [sql for sql in self.queries if "FROM events" in sql]
+
+
+@pytest.fixture
+def catalog(monkeypatch) -> EventTypeCatalog:
+    async def run_in_same_session(session, fn, *args):
+        return await fn(session, *args)
+
+    # La recarga abre su propia sesión sobre el engine; aquí usa la falsa
+    monkeypatch.setattr(event_types_module, "run_in_new_session", run_in_same_session)
+    catalog = EventTypeCatalog()
+    monkeypatch.setattr(events_repository, "event_types", catalog)
+    return catalog
+
+
+@pytest.mark.unit
+class TestEventTypeCatalog:
+    """Valida la carga, el TTL y las recargas por ids o códigos nuevos."""
+
+    def test_codes(self, catalog):
+        session = FakeSession([(IGNITION, "ignition_on")])
+
+        codes = asyncio.run(catalog.codes(session, [IGNITION]))
+
+        assert codes == {IGNITION: "ignition_on"}
+        assert asyncio.run(catalog.codes(session, [IGNITION])) == codes
+        assert session.catalog_loads == 1
+
+    def test_unknown_id_reloads(self, catalog):
+        session = FakeSession([(IGNITION, "ignition_on")])
+        asyncio.run(catalog.load(session))
+        session.types.append((SPEED, "speed_alert"))
+
+        codes = asyncio.run(catalog.codes(session, [IGNITION, SPEED]))
+
+        assert codes[SPEED] == "speed_alert"
+        assert session.catalog_loads == 2
+
+    def test_unknown_code_reloads_once(self, catalog):
+        session = FakeSession([(IGNITION, "ignition_on")])
+        asyncio.run(catalog.load(session))
+
+        for _ in range(3):
+            assert asyncio.run(catalog.ids(session, ["nope"])) == []
+
+        assert session.catalog_loads == 2
+
+    def test_expired_catalog_reloads(self, catalog, monkeypatch):
+        session = FakeSession([(IGNITION, "ignition_on")])
+        asyncio.run(catalog.load(session))
+        monkeypatch.setattr(
+            event_types_module.settings, "EVENT_TYPES_CACHE_TTL_SECS", -1
+        )
+
+        asyncio.run(catalog.ids(session, ["ignition_on"]))
+
+        assert session.catalog_loads == 2
+
+
+@pytest.mark.unit
+class TestGetEventsWithoutJoin:
+    """La consulta de eventos lee una sola tabla y traduce el código en Python."""
+
+    def _session(self) -> FakeSession:
+        row = (UNIT, UNIT, "DEVICE123", SPEED, OCCURRED_AT, OCCURRED_AT, 1710499845)
+        return FakeSession([(IGNITION, "ignition_on"), (SPEED, "speed_alert")], [row])
+
+    def test_code_is_mapped(self, catalog):
+        session = self._session()
+
+        events, next_cursor = asyncio.run(
+            events_repository._get_events(
+                session, [UNIT], OCCURRED_AT, OCCURRED_AT, 20, "desc", None
+            )
+        )
+
+        assert [e["code"] for e in events] == ["speed_alert"]
+        assert next_cursor is None
+        (events_sql,) = session.event_queries
+        assert "JOIN" not in events_sql
+        assert "event_types" not in events_sql
+
+    def test_unknown_type_is_skipped(self, catalog):
+        # Como con el JOIN a event_types: el evento no se devuelve, pero el
+        # cursor avanza sobre él
+        unknown = UUID("00000000-0000-0000-0000-000000000009")
+        rows = [
+            (UNIT, UNIT, "DEVICE123", type_id, OCCURRED_AT, OCCURRED_AT, 1710499845)
+            for type_id in (SPEED, unknown)
+        ]
+        session = FakeSession([(SPEED, "speed_alert")], rows)
+
+        events, next_cursor = asyncio.run(
+            events_repository._get_events(
+                session, [UNIT], OCCURRED_AT, OCCURRED_AT, 2, "desc", None
+            )
+        )
+
+        assert [e["code"] for e in events] == ["speed_alert"]
+        assert next_cursor is None
+
+    def test_filter_by_code(self, catalog):
+        session = self._session()
+
+        asyncio.run(
+            events_repository._get_events(
+                session,
+                [UNIT],
+                OCCURRED_AT,
+                OCCURRED_AT,
+                20,
+                "desc",
+                None,
+                ["speed_alert"],
+            )
+        )
+
+        (events_sql,) = session.event_queries
+        assert "events.event_type_id IN" in events_sql
+
+    def test_unknown_code_skips_query(self, catalog):
+        session = self._session()
+
+        events, next_cursor = asyncio.run(
+            events_repository._get_events(
+                session, [UNIT], OCCURRED_AT, OCCURRED_AT, 20, "desc", None, ["x"]
+            )
+        )
+
+        assert (events, next_cursor) == ([], None)
+        assert session.event_queries == []
@@ -0,0 +1,81 @@
+"""Tests unitarios para la paginación keyset de eventos."""
+
+from datetime import UTC, datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.models.events import Event
+from app.services.events_repository import (
+    _keyset_clause,
+    _page_query,
+    decode_cursor,
+    encode_cursor,
+)
+
+EVENT_ID = UUID("123e4567-e89b-12d3-a456-426614174000")
+OCCURRED_AT = datetime(2024, 1, 15, 10, 30, tzinfo=UTC)
+
+
+def _compile(clause) -> str:
+    return str(select(Event.id).where(clause).compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.unit
+class TestEventsCursor:
+    """El cursor conserva (occurred_at, id) exactos."""
+
+    def test_round_trip(self):
+        cursor = encode_cursor(OCCURRED_AT, EVENT_ID)
+
+        assert decode_cursor(cursor) == (OCCURRED_AT, EVENT_ID)
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError, match="Cursor inválido"):
+            decode_cursor("no-es-un-cursor")
+
+
+@pytest.mark.unit
+class TestEventsKeysetClause:
+    """El keyset es una comparación de fila con el id como UUID."""
+
+    def test_desc_row_comparison(self):
+        sql = _compile(_keyset_clause(True, OCCURRED_AT, EVENT_ID))
+
+        assert "(events.occurred_at, events.id) < (" in sql
+        assert "::UUID" in sql
+        assert "CAST" not in sql
+
+    def test_asc_row_comparison(self):
+        sql = _compile(_keyset_clause(False, OCCURRED_AT, EVENT_ID))
+
+        assert "(events.occurred_at, events.id) > (" in sql
+
+
+@pytest.mark.unit
+class TestEventsPageQuery:
+    """Con varias unidades la página es la unión de una página por unidad."""
+
+    def test_single_unit(self):
+        sql = str(
+            _page_query([EVENT_ID], [], True, 21).compile(dialect=postgresql.dialect())
+        )
+
+        assert "events.unit_id = " in sql
+        assert "LATERAL" not in sql
+
+    def test_multiple_units_are_bounded_per_unit(self):
+        other = UUID("123e4567-e89b-12d3-a456-426614174001")
+
+        sql = str(
+            _page_query([EVENT_ID, other], [], False, 21).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+
+        assert "unnest(" in sql
+        assert "JOIN LATERAL" in sql
+        assert sql.count("LIMIT") == 2
+        assert "events.unit_id = units.unit_id" in sql
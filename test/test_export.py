@@ -0,0 +1,151 @@
+"""Tests unitarios para la exportación CSV/Parquet del histórico."""
+
+import asyncio
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import communications
+from app.main import app
+from app.schemas.communications import EXPORT_MAX_DEVICES
+from app.services.export import EXPORT_SCHEMA, export_communications
+
+
+def _rows(count: int) -> list:
+    return [
+        SimpleNamespace(
+            id=i,
+            device_id="867564050638581",
+            latitude=Decimal("19.43260000"),
+            longitude=Decimal("-99.13320000"),
+            received_at=datetime(2024, 1, 15, 10, 30, i % 60),
+            raw_message=f"STT;{i}",
+        )
+        for i in range(count)
+    ]
+
+
+def _export(rows: list, export_format: str, row_group_size: int) -> list[bytes]:
+    async def iterate():
+        for row in rows:
+            yield row
+
+    async def collect():
+        return [
+            chunk
+            async for chunk in export_communications(
+                iterate(), export_format, row_group_size
+            )
+        ]
+
+    return asyncio.run(collect())
+
+
+@pytest.mark.unit
+class TestExportCommunications:
+    """Valida los archivos generados por bloques."""
+
+    def test_csv_header_and_rows(self):
+        chunks = _export(_rows(5), "csv", row_group_size=2)
+
+        reader = csv.DictReader(io.StringIO(b"".join(chunks).decode()))
+        records = list(reader)
+
+        assert reader.fieldnames == list(EXPORT_SCHEMA.model_fields)
+        assert [r["id"] for r in records] == ["0", "1", "2", "3", "4"]
+        assert records[0]["latitude"] == "19.4326"
+        assert records[0]["raw_message"] == "STT;0"
+        assert records[0]["alert_type"] == ""
+
+    def test_parquet_row_groups(self):
+        chunks = _export(_rows(5), "parquet", row_group_size=2)
+
+        parquet_file = pq.ParquetFile(pa.BufferReader(b"".join(chunks)))
+        table = parquet_file.read()
+
+        assert parquet_file.num_row_groups == 3
+        assert table.num_rows == 5
+        assert table.column("id").to_pylist() == [0, 1, 2, 3, 4]
+
+    def test_written_incrementally(self):
+        chunks = _export(_rows(6), "parquet", row_group_size=2)
+
+        # Encabezado + un fragmento por row group + footer
+        assert len([c for c in chunks if c]) == 5
+
+    def test_empty_export_is_valid(self):
+        chunks = _export([], "parquet", row_group_size=2)
+
+        table = pq.read_table(pa.BufferReader(b"".join(chunks)))
+
+        assert table.num_rows == 0
+        assert table.column_names == list(EXPORT_SCHEMA.model_fields)
+
+
+@pytest.fixture
+def exported_ids(monkeypatch) -> list:
+    calls = []
+
+    async def fake_stream(_session, device_ids, **kwargs):
+        calls.append(device_ids)
+        for row in _rows(2):
+            yield row
+
+    monkeypatch.setattr(communications, "stream_communications", fake_stream)
+    return calls
+
+
+@pytest.mark.unit
+class TestExportEndpoint:
+    """POST /communications/export recibe la flota completa en el body."""
+
+    url = "/api/v1/communications/export"
+
+    def _body(self, count: int) -> dict:
+        return {
+            "device_ids": [f"{867564050000000 + i}" for i in range(count)],
+            "from": "2024-12-14T00:00:00Z",
+            "to": "2024-12-15T00:00:00Z",
+        }
+
+    def test_full_fleet_in_body(self, exported_ids):
+        client = TestClient(app)
+
+        response = client.post(self.url, json=self._body(EXPORT_MAX_DEVICES))
+
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == (
+            'attachment; filename="communications_20241214T000000_20241215T000000.csv"'
+        )
+        assert len(exported_ids[0]) == EXPORT_MAX_DEVICES
+        assert len(response.text.splitlines()) == 3
+
+    def test_parquet_format(self, exported_ids):
+        client = TestClient(app)
+
+        response = client.post(self.url, json={**self._body(1), "format": "parquet"})
+
+        assert pq.read_table(pa.BufferReader(response.content)).num_rows == 2
+
+    def test_too_many_devices(self, exported_ids):
+        client = TestClient(app)
+
+        response = client.post(self.url, json=self._body(EXPORT_MAX_DEVICES + 1))
+
+        assert response.status_code == 422
+        assert exported_ids == []
+
+    def test_invalid_range(self, exported_ids):
+        client = TestClient(app)
+        body = {**self._body(1), "from": "2024-12-15T00:00:00Z"}
+
+        response = client.post(self.url, json=body)
+
+        assert response.status_code == 400
@@ -0,0 +1,168 @@
+"""Tests unitarios para los snapshots pre-serializados del estado actual."""
+
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import zstandard
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.communications import CommunicationCurrentState
+from app.services import fleet_snapshot
+from app.services.fleet_snapshot import FleetSnapshotStore, load_groups
+
+
+def _state(device_id: str, speed: str = "10") -> CommunicationCurrentState:
+    return CommunicationCurrentState(
+        device_id=device_id,
+        latitude=Decimal("19.4326"),
+        longitude=Decimal("-99.1332"),
+        speed=Decimal(speed),
+        received_at=datetime(2024, 1, 1),
+    )
+
+
+@pytest.fixture
+def latest(monkeypatch) -> dict:
+    """Estado actual simulado por device_id; registra cada consulta."""
+    states = {"A": _state("A"), "B": _state("B")}
+    calls = []
+
+    async def fake_latest(_session, device_ids):
+        calls.append(list(device_ids))
+        await asyncio.sleep(0.01)
+        return [states[d] for d in device_ids if d in states]
+
+    monkeypatch.setattr(fleet_snapshot, "get_latest_communications", fake_latest)
+    states["calls"] = calls
+    return states
+
+
+@pytest.fixture
+def store(monkeypatch, latest) -> FleetSnapshotStore:
+    store = FleetSnapshotStore({"norte": ["A", "B"], "sur": ["B"]})
+    monkeypatch.setattr(fleet_snapshot, "fleet_snapshots", store)
+    return store
+
+
+@pytest.mark.unit
+class TestFleetSnapshotStore:
+    """Valida la generación, la antigüedad máxima y la compresión."""
+
+    def test_generation_changes_only_with_content(self, store, latest):
+        first = asyncio.run(store.refresh(None, "norte"))
+        same = asyncio.run(store.refresh(None, "norte"))
+        latest["A"] = _state("A", speed="50")
+        changed = asyncio.run(store.refresh(None, "norte"))
+
+        assert first is same
+        assert (first.generation, changed.generation) == (1, 2)
+        assert [d["speed"] for d in json.loads(changed.body)] == ["50", "10"]
+
+    def test_encodings_are_precomputed(self, store):
+        snapshot = asyncio.run(store.refresh(None, "sur"))
+
+        assert set(snapshot.encoded) == {"zstd", "br", "gzip"}
+        decompressed = (
+            zstandard.ZstdDecompressor()
+            .decompressobj()
+            .decompress(snapshot.content("zstd"))
+        )
+        assert decompressed == snapshot.body
+
+    def test_stale_snapshot_is_not_served(self, store, monkeypatch):
+        asyncio.run(store.refresh(None, "norte"))
+        assert store.get("norte") is not None
+
+        monkeypatch.setattr(
+            fleet_snapshot.settings, "FLEET_SNAPSHOT_MAX_STALENESS_SECS", -1
+        )
+
+        assert store.get("norte") is None
+
+    def test_concurrent_refreshes_share_work(self, store, latest):
+        async def run():
+            return await asyncio.gather(
+                store.refresh(None, "norte"), store.refresh(None, "norte")
+            )
+
+        first, second = asyncio.run(run())
+
+        assert first is second
+        assert latest["calls"] == [["A", "B"]]
+
+
+@pytest.mark.unit
+class TestLoadGroups:
+    """Los grupos se leen de un archivo JSON."""
+
+    def test_deduplicates_ids(self, tmp_path):
+        path = tmp_path / "groups.json"
+        path.write_text(json.dumps({"norte": ["A", "B", "A", 7]}))
+
+        assert load_groups(str(path)) == {"norte": ["A", "B", "7"]}
+
+    def test_invalid_format(self, tmp_path):
+        path = tmp_path / "groups.json"
+        path.write_text(json.dumps(["A", "B"]))
+
+        with pytest.raises(ValueError, match="se esperaba"):
+            load_groups(str(path))
+
+
+@pytest.mark.unit
+class TestFleetSnapshotEndpoint:
+    """GET /communications/latest/snapshot/{group} entrega los bytes guardados."""
+
+    url = "/api/v1/communications/latest/snapshot"
+
+    def test_served_without_rebuilding(self, store, latest):
+        asyncio.run(store.refresh(None, "norte"))
+        client = TestClient(app)
+
+        response = client.get(f"{self.url}/norte", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["x-snapshot-generation"] == "1"
+        assert response.headers["etag"].endswith('-gzip"')
+        assert [d["device_id"] for d in response.json()] == ["A", "B"]
+        assert len(latest["calls"]) == 1
+
+    def test_missing_snapshot_is_built(self, store, latest):
+        client = TestClient(app)
+
+        response = client.get(
+            f"{self.url}/sur", headers={"Accept-Encoding": "identity"}
+        )
+
+        assert "content-encoding" not in response.headers
+        assert [d["device_id"] for d in response.json()] == ["B"]
+        assert latest["calls"] == [["B"]]
+
+    def test_not_modified(self, store):
+        client = TestClient(app)
+        etag = client.get(f"{self.url}/norte").headers["etag"]
+
+        response = client.get(f"{self.url}/norte", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["x-snapshot-generation"] == "1"
+
+    def test_unknown_group(self, store):
+        client = TestClient(app)
+
+        response = client.get(f"{self.url}/oeste")
+
+        assert response.status_code == 404
+
+    def test_disabled(self, monkeypatch):
+        monkeypatch.setattr(fleet_snapshot, "fleet_snapshots", None)
+        client = TestClient(app)
+
+        response = client.get(f"{self.url}/norte")
+
+        assert response.status_code == 404
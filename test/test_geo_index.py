@@ -0,0 +1,217 @@
+"""Tests unitarios para el índice espacial de posiciones actuales."""
+
+import asyncio
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.services import geo_index as geo_index_module
+from app.services.geo_index import (
+    GeoGridIndex,
+    geo_index_message_handler,
+    point_in_polygon,
+)
+from app.utils.geo import haversine_m
+
+
+def _position(device_id: str, latitude, longitude, **extra) -> dict:
+    return {
+        "device_id": device_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        **extra,
+    }
+
+
+@pytest.mark.unit
+class TestGeoGridIndex:
+    """Valida el mantenimiento de celdas y las consultas por rectángulo."""
+
+    def test_bbox_returns_devices_inside(self):
+        index = GeoGridIndex(0.1)
+        index.upsert(_position("A", 19.43, -99.13))
+        index.upsert(_position("B", 19.60, -99.13))
+        index.upsert(_position("C", "19.45", "-99.05"))
+
+        result = index.query_bbox(19.4, -99.2, 19.5, -99.0)
+
+        assert [p["device_id"] for p in result] == ["A", "C"]
+        assert result[1]["latitude"] == 19.45
+
+    def test_moving_device_changes_cell(self):
+        index = GeoGridIndex(0.1)
+        index.upsert(_position("A", 19.43, -99.13))
+        index.upsert(_position("A", 25.0, -100.0))
+
+        assert index.query_bbox(19.4, -99.2, 19.5, -99.0) == []
+        assert len(index.query_bbox(24.9, -100.1, 25.1, -99.9)) == 1
+        assert len(index) == 1
+
+    def test_older_position_is_ignored(self):
+        index = GeoGridIndex(0.1)
+        index.upsert(_position("A", 19.43, -99.13, received_at=datetime(2024, 1, 2)))
+
+        accepted = index.upsert(
+            _position("A", 25.0, -100.0, received_at="2024-01-01T00:00:00Z")
+        )
+
+        assert not accepted
+        assert index.get("A")["latitude"] == 19.43
+
+    def test_invalid_coordinates_are_ignored(self):
+        index = GeoGridIndex(0.1)
+
+        assert not index.upsert(_position("A", None, -99.13))
+        assert not index.upsert(_position("B", 95.0, -99.13))
+        assert len(index) == 0
+
+    def test_bbox_across_antimeridian(self):
+        index = GeoGridIndex(1.0)
+        index.upsert(_position("EAST", -17.0, 179.5))
+        index.upsert(_position("WEST", -17.0, -179.5))
+        index.upsert(_position("FAR", -17.0, 0.0))
+
+        result = index.query_bbox(-18.0, 179.0, -16.0, -179.0)
+
+        assert [p["device_id"] for p in result] == ["EAST", "WEST"]
+
+    def test_large_bbox_scans_occupied_cells(self):
+        index = GeoGridIndex(0.01)
+        index.upsert(_position("A", 19.43, -99.13))
+        index.upsert(_position("B", -33.45, -70.66))
+
+        result = index.query_bbox(-90, -180, 90, 180)
+
+        assert [p["device_id"] for p in result] == ["A", "B"]
+
+
+@pytest.mark.unit
+class TestPolygon:
+    """Valida el filtro por polígono."""
+
+    def test_point_in_polygon(self):
+        triangle = [(0.0, 0.0), (10.0, 0.0), (0.0, 10.0)]
+
+        assert point_in_polygon(2.0, 2.0, triangle)
+        assert not point_in_polygon(8.0, 8.0, triangle)
+
+    def test_query_polygon_filters_bbox_candidates(self):
+        index = GeoGridIndex(1.0)
+        index.upsert(_position("IN", 2.0, 2.0))
+        index.upsert(_position("CORNER", 8.0, 8.0))
+
+        result = index.query_polygon([(0.0, 0.0), (10.0, 0.0), (0.0, 10.0)])
+
+        assert [p["device_id"] for p in result] == ["IN"]
+
+
+@pytest.mark.unit
+class TestNearest:
+    """Valida la búsqueda de los k dispositivos más cercanos."""
+
+    @staticmethod
+    def _random_index(n: int) -> tuple[GeoGridIndex, np.ndarray, np.ndarray]:
+        rng = random.Random(7)
+        index = GeoGridIndex(0.1)
+        latitudes = np.array([rng.uniform(19.0, 20.0) for _ in range(n)])
+        longitudes = np.array([rng.uniform(-99.5, -98.5) for _ in range(n)])
+        for i in range(n):
+            index.upsert(
+                _position(
+                    f"D{i:04d}",
+                    latitudes[i],
+                    longitudes[i],
+                    engine_status="ON" if i % 2 else "OFF",
+                )
+            )
+        return index, latitudes, longitudes
+
+    def test_matches_brute_force(self):
+        index, latitudes, longitudes = self._random_index(2000)
+
+        for latitude, longitude in [(19.43, -99.13), (19.0, -99.5), (21.0, -97.0)]:
+            distances = haversine_m(latitude, longitude, latitudes, longitudes)
+            expected = [f"D{i:04d}" for i in np.argsort(distances)[:10]]
+
+            result = index.nearest(latitude, longitude, 10)
+
+            assert [p["device_id"] for _, p in result] == expected
+            assert [d for d, _ in result] == sorted(d for d, _ in result)
+
+    def test_predicate_and_max_distance(self):
+        index, latitudes, longitudes = self._random_index(2000)
+        distances = haversine_m(19.43, -99.13, latitudes, longitudes)
+        radius = float(np.sort(distances)[20])
+
+        result = index.nearest(
+            19.43,
+            -99.13,
+            100,
+            predicate=lambda p: p["engine_status"] == "ON",
+            max_distance_m=radius,
+        )
+
+        assert result
+        assert all(p["engine_status"] == "ON" for _, p in result)
+        assert all(d <= radius for d, _ in result)
+        assert len(result) == sum(
+            1 for i, d in enumerate(distances) if d <= radius and i % 2
+        )
+
+    def test_nearest_across_antimeridian(self):
+        index = GeoGridIndex(0.1)
+        index.upsert(_position("WEST", 0.0, -179.95))
+        index.upsert(_position("EAST", 0.0, 170.0))
+
+        result = index.nearest(0.0, 179.95, 1)
+
+        assert [p["device_id"] for _, p in result] == ["WEST"]
+
+    def test_empty_index(self):
+        assert GeoGridIndex(0.1).nearest(19.43, -99.13, 5) == []
+
+
+@pytest.mark.unit
+class TestKafkaHandler:
+    """Las posiciones de Kafka actualizan el índice."""
+
+    def test_position_message_updates_index(self, monkeypatch):
+        index = GeoGridIndex(0.1)
+        monkeypatch.setattr(geo_index_module, "geo_index", index)
+        monkeypatch.setattr(geo_index_module.settings, "KAFKA_TOPIC", "positions")
+
+        asyncio.run(
+            geo_index_message_handler(
+                {
+                    "topic": "positions",
+                    "payload": {
+                        "data": {
+                            "device_id": "A",
+                            "latitude": 20.652472,
+                            "longitude": -100.391423,
+                            "speed": 0,
+                        }
+                    },
+                    "timestamp": 1735689600000,
+                }
+            )
+        )
+
+        position = index.get("A")
+        assert position["longitude"] == -100.391423
+        assert position["received_at"] == datetime(2025, 1, 1)
+
+    def test_other_topics_are_ignored(self, monkeypatch):
+        index = GeoGridIndex(0.1)
+        monkeypatch.setattr(geo_index_module, "geo_index", index)
+        monkeypatch.setattr(geo_index_module.settings, "KAFKA_TOPIC", "positions")
+
+        asyncio.run(
+            geo_index_message_handler(
+                {"topic": "alerts", "payload": _position("A", 20.0, -100.0)}
+            )
+        )
+
+        assert len(index) == 0
@@ -0,0 +1,211 @@
+"""Tests unitarios para la caché en disco del histórico de días cerrados."""
+
+import asyncio
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+import pyarrow as pa
+import pytest
+from sqlalchemy.engine.result import result_tuple
+
+from app.schemas.communications import CommunicationFullResponse, CommunicationResponse
+from app.services import history_cache as history_cache_module
+from app.services.columnar import (
+    arrow_ipc_stream,
+    arrow_ipc_stream_table,
+    columnar_json,
+    columnar_json_table,
+)
+from app.services.history_cache import (
+    HistoryDiskCache,
+    get_closed_day_history,
+    is_cacheable_day,
+    table_rows,
+)
+from app.services.serialization import dump_rows
+
+DAY = date(2024, 1, 1)
+
+_Row = result_tuple(
+    ("id", "device_id", "latitude", "longitude", "speed", "gps_datetime", "received_at")
+)
+
+
+def _rows(n: int) -> list:
+    return [
+        _Row(
+            (
+                i,
+                "867564050638581",
+                Decimal("19.43260000") + i,
+                Decimal("-99.13320000"),
+                None if i % 2 else Decimal("42.50"),
+                datetime(2024, 1, 1, 12, 0, i % 60),
+                datetime(2024, 1, 1, 12, 0, i % 60, 123456),
+            )
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.unit
+class TestHistoryDiskCache:
+    """Valida el formato en disco y el límite de tamaño."""
+
+    def test_roundtrip_is_exact(self, tmp_path):
+        cache = HistoryDiskCache(str(tmp_path), 10**9)
+        rows = _rows(5)
+
+        cache.put("867564050638581", DAY, CommunicationResponse, rows)
+        cached = table_rows(cache.get("867564050638581", DAY, CommunicationResponse))
+
+        assert cached[0].latitude == Decimal("19.43260000")
+        assert cached[1].speed is None
+        assert cached[0].received_at == datetime(2024, 1, 1, 12, 0, 0, 123456)
+        assert dump_rows(cached, CommunicationResponse) == dump_rows(
+            rows, CommunicationResponse
+        )
+
+    def test_miss_by_device_day_and_schema(self, tmp_path):
+        cache = HistoryDiskCache(str(tmp_path), 10**9)
+        cache.put("A", DAY, CommunicationResponse, _rows(1))
+
+        assert cache.get("B", DAY, CommunicationResponse) is None
+        assert cache.get("A", date(2024, 1, 2), CommunicationResponse) is None
+        assert cache.get("A", DAY, CommunicationFullResponse) is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        probe = HistoryDiskCache(str(tmp_path / "probe"), 10**9)
+        probe.put("A", DAY, CommunicationResponse, _rows(50))
+        file_size = probe.size
+
+        cache = HistoryDiskCache(str(tmp_path / "cache"), int(file_size * 2.5))
+        cache.put("A", DAY, CommunicationResponse, _rows(50))
+        cache.put("B", DAY, CommunicationResponse, _rows(50))
+        cache.get("A", DAY, CommunicationResponse)
+        cache.put("C", DAY, CommunicationResponse, _rows(50))
+
+        assert len(cache) == 2
+        assert cache.size <= cache.max_bytes
+        assert cache.get("B", DAY, CommunicationResponse) is None
+        assert cache.get("A", DAY, CommunicationResponse) is not None
+
+    def test_existing_files_are_reused(self, tmp_path):
+        HistoryDiskCache(str(tmp_path), 10**9).put(
+            "A", DAY, CommunicationResponse, _rows(3)
+        )
+
+        cache = HistoryDiskCache(str(tmp_path), 10**9)
+
+        assert len(cache) == 1
+        assert cache.get("A", DAY, CommunicationResponse).num_rows == 3
+
+    def test_corrupt_file_is_a_miss(self, tmp_path):
+        cache = HistoryDiskCache(str(tmp_path), 10**9)
+        cache.put("A", DAY, CommunicationResponse, _rows(3))
+        path = next(tmp_path.rglob("*.arrow"))
+        path.write_bytes(b"not arrow")
+
+        assert cache.get("A", DAY, CommunicationResponse) is None
+        assert not path.exists()
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestIsCacheableDay:
+    """Solo se guardan en disco los días que ya no reciben comunicaciones."""
+
+    @pytest.fixture(autouse=True)
+    def _enabled(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            history_cache_module,
+            "history_cache",
+            HistoryDiskCache(str(tmp_path), 10**9),
+        )
+
+    def test_old_day_is_cacheable(self):
+        assert is_cacheable_day(DAY)
+
+    def test_day_within_grace_is_not_cacheable(self, monkeypatch):
+        monkeypatch.setattr(
+            history_cache_module.settings, "HISTORY_CLOSED_GRACE_SECS", 10 * 365 * 86400
+        )
+
+        assert not is_cacheable_day(DAY)
+
+    def test_today_is_not_cacheable(self):
+        assert not is_cacheable_day(datetime.now(UTC).date())
+
+
+@pytest.mark.unit
+class TestGetClosedDayHistory:
+    """La base de datos se consulta solo en la primera petición del día."""
+
+    def test_second_call_reads_from_disk(self, tmp_path, monkeypatch):
+        calls = []
+
+        async def fake_get_communications(_session, device_ids, **kwargs):
+            calls.append((device_ids, kwargs["received_at"]))
+            return _rows(4)
+
+        monkeypatch.setattr(
+            history_cache_module,
+            "history_cache",
+            HistoryDiskCache(str(tmp_path), 10**9),
+        )
+        monkeypatch.setattr(
+            history_cache_module, "get_communications", fake_get_communications
+        )
+
+        first = asyncio.run(
+            get_closed_day_history(None, "A", DAY, CommunicationResponse)
+        )
+        second = asyncio.run(
+            get_closed_day_history(None, "A", DAY, CommunicationResponse)
+        )
+
+        assert calls == [(["A"], DAY)]
+        assert first.equals(second)
+        assert dump_rows(table_rows(second), CommunicationResponse) == dump_rows(
+            _rows(4), CommunicationResponse
+        )
+
+
+@pytest.mark.unit
+class TestColumnarFromTable:
+    """Los formatos columnares desde la tabla en caché coinciden con las filas."""
+
+    def _table(self, tmp_path, rows: list) -> pa.Table:
+        cache = HistoryDiskCache(str(tmp_path), 10**9)
+        cache.put("A", DAY, CommunicationResponse, rows)
+        return cache.get("A", DAY, CommunicationResponse)
+
+    def test_columnar_json(self, tmp_path):
+        rows = _rows(7)
+        table = self._table(tmp_path, rows)
+
+        assert columnar_json_table(table, CommunicationResponse) == columnar_json(
+            rows, CommunicationResponse
+        )
+
+    def test_arrow_ipc_stream(self, tmp_path):
+        rows = _rows(7)
+        table = self._table(tmp_path, rows)
+
+        async def from_rows():
+            async def iterate():
+                for row in rows:
+                    yield row
+
+            return [
+                chunk
+                async for chunk in arrow_ipc_stream(iterate(), CommunicationResponse, 3)
+            ]
+
+        expected = pa.ipc.open_stream(b"".join(asyncio.run(from_rows()))).read_all()
+        chunks = list(arrow_ipc_stream_table(table, CommunicationResponse, 3))
+        served = pa.ipc.open_stream(b"".join(chunks)).read_all()
+
+        assert served.equals(expected)
+        # Encabezado + un fragmento por record batch + fin del stream
+        assert len([c for c in chunks if c]) == 4
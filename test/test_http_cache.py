@@ -0,0 +1,161 @@
+"""Tests unitarios para las peticiones condicionales (ETag / Last-Modified)."""
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.routes import communications
+from app.main import app
+from app.utils.http_cache import is_not_modified, make_etag
+
+
+def _latest(device_id: str, received_epoch: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        device_id=device_id,
+        received_epoch=received_epoch,
+        received_at=datetime(2024, 1, 1, 12, 0),
+        latitude=None,
+        longitude=None,
+    )
+
+
+@pytest.fixture
+def history_calls(monkeypatch) -> list:
+    calls = []
+
+    async def fake_get_communications(session, device_ids, **kwargs):
+        calls.append(kwargs)
+        return []
+
+    monkeypatch.setattr(communications, "get_communications", fake_get_communications)
+    return calls
+
+
+@pytest.mark.unit
+class TestMakeEtag:
+    """El ETag depende solo de los valores que lo forman."""
+
+    def test_is_strong_and_deterministic(self):
+        etag = make_etag("latest", ("A", 1))
+
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("latest", ("A", 1))
+        assert etag != make_etag("latest", ("A", 2))
+
+    def test_compressed_etag_matches(self):
+        etag = make_etag("latest")
+        request = SimpleNamespace(
+            headers={"if-none-match": f'W/"other", {etag[:-1]}-gzip"'}
+        )
+
+        assert is_not_modified(request, {"ETag": etag})
+
+
+@pytest.mark.unit
+class TestClosedDayHistory:
+    """Los días cerrados se validan sin consultar la base de datos."""
+
+    def test_closed_day_has_cache_headers(self, history_calls):
+        client = TestClient(app)
+
+        response = client.get(
+            "/api/v1/devices/T1/communications?received_at=2024-01-01"
+        )
+
+        assert response.status_code == 200
+        assert "immutable" in response.headers["cache-control"]
+        assert response.headers["last-modified"] == "Tue, 02 Jan 2024 00:00:00 GMT"
+        assert len(history_calls) == 1
+
+    def test_matching_etag_returns_304_without_query(self, history_calls):
+        client = TestClient(app)
+        url = "/api/v1/devices/T1/communications?received_at=2024-01-01"
+        etag = client.get(url).headers["etag"]
+
+        response = client.get(url, headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert len(history_calls) == 1
+
+    def test_format_changes_etag(self, history_calls):
+        client = TestClient(app)
+        url = "/api/v1/devices/T1/communications?received_at=2024-01-01"
+
+        json_etag = client.get(url).headers["etag"]
+        columnar_etag = client.get(
+            url, headers={"Accept": "application/vnd.siscom.columnar+json"}
+        ).headers["etag"]
+
+        assert json_etag != columnar_etag
+
+    def test_if_modified_since(self, history_calls):
+        client = TestClient(app)
+
+        response = client.get(
+            "/api/v1/communications?device_ids=T1&from=2024-01-01T00:00:00Z"
+            "&to=2024-01-02T00:00:00Z",
+            headers={"If-Modified-Since": "Wed, 03 Jan 2024 00:00:00 GMT"},
+        )
+
+        assert response.status_code == 304
+        assert history_calls == []
+
+    def test_day_within_grace_is_not_immutable(self, history_calls, monkeypatch):
+        # El día ya terminó, pero aún pueden llegar comunicaciones atrasadas
+        monkeypatch.setattr(
+            communications.settings, "HISTORY_CLOSED_GRACE_SECS", 10 * 365 * 86400
+        )
+        client = TestClient(app)
+
+        response = client.get(
+            "/api/v1/devices/T1/communications?received_at=2024-01-01",
+            headers={"If-None-Match": "*"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == (
+            f"public, max-age={communications.settings.HTTP_CACHE_CLOSING_MAX_AGE}"
+        )
+        assert "etag" not in response.headers
+        assert len(history_calls) == 1
+
+    def test_today_is_not_cached(self, history_calls):
+        client = TestClient(app)
+        today = date.today() + timedelta(days=1)
+
+        response = client.get(
+            f"/api/v1/devices/T1/communications?received_at={today}",
+            headers={"If-None-Match": "*"},
+        )
+
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+
+@pytest.mark.unit
+class TestLatestEtag:
+    """El ETag del estado actual cambia con received_epoch."""
+
+    def test_unchanged_state_returns_304(self, monkeypatch):
+        state = [_latest("A", 100), _latest("B", 200)]
+
+        async def fake_latest(session, device_ids, msg_class=None):
+            return state
+
+        monkeypatch.setattr(communications, "get_latest_communications", fake_latest)
+        client = TestClient(app)
+        url = "/api/v1/communications/latest?device_ids=A&device_ids=B"
+
+        first = client.get(url)
+        second = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+        state[1] = _latest("B", 201)
+        third = client.get(url, headers={"If-None-Match": first.headers["etag"]})
+
+        assert first.status_code == 200
+        assert first.headers["cache-control"] == "no-cache"
+        assert second.status_code == 304
+        assert third.status_code == 200
+        assert third.headers["etag"] != first.headers["etag"]
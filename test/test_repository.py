@@ -2,10 +2,23 @@
 Tests para el módulo de servicios/repository.
 """
 
+import asyncio
+from datetime import UTC, date, datetime, timedelta, timezone
+
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.repository import get_communications
+from app.models.communications import CommunicationQueclink, CommunicationSuntech
+from app.schemas.communications import CommunicationFullResponse
+from app.services.repository import (
+    _merge_history_streams,
+    decode_history_cursor,
+    encode_history_cursor,
+    get_communications,
+    get_communications_page,
+    received_range,
+    stream_communications,
+)
 
 
 @pytest.mark.unit
@@ -36,7 +49,8 @@ class TestGetCommunications:
 
         assert len(result) == 1
         assert result[0].device_id == "867564050638581"
-        assert result[0].__class__.__name__ == "CommunicationSuntech"
+        assert result[0].id == sample_suntech_communication.id
+        assert result[0].latitude == sample_suntech_communication.latitude
 
     @pytest.mark.asyncio
     async def test_get_communications_returns_queclink_data(
@@ -50,7 +64,8 @@ class TestGetCommunications:
 
         assert len(result) == 1
         assert result[0].device_id == "QUECLINK123"
-        assert result[0].__class__.__name__ == "CommunicationQueclink"
+        assert result[0].id == sample_queclink_communication.id
+        assert result[0].alert_type == "SPEED"
 
     @pytest.mark.asyncio
     async def test_get_communications_merges_both_tables(
@@ -103,6 +118,58 @@ class TestGetCommunications:
         assert "SUNTECH2" not in device_id_set
         assert "QUECLINK0" not in device_id_set
 
+    @pytest.mark.asyncio
+    async def test_get_communications_ordered_across_tables(
+        self, db_session: AsyncSession
+    ):
+        """
+        Test: Suntech y Queclink se mezclan en una sola línea de tiempo
+        ordenada por received_at descendente.
+        """
+        for minute, model in enumerate(
+            [CommunicationSuntech, CommunicationQueclink, CommunicationSuntech]
+        ):
+            db_session.add(
+                model(
+                    device_id="MERGED1",
+                    engine_status=model.__tablename__[-8:],
+                    received_at=datetime(2024, 3, 1, 9, minute),
+                )
+            )
+        await db_session.commit()
+
+        result = await get_communications(db_session, ["MERGED1"])
+
+        assert [c.received_at.minute for c in result] == [2, 1, 0]
+        assert [c.engine_status for c in result] == [
+            "_suntech",
+            "queclink",
+            "_suntech",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_communications_filters_by_day(self, db_session: AsyncSession):
+        """
+        Test: received_at filtra el día completo con límite superior excluido.
+        """
+        for received in (
+            datetime(2024, 3, 1, 23, 59, 59),
+            datetime(2024, 3, 2, 0, 0, 0),
+            datetime(2024, 3, 2, 23, 59, 59),
+            datetime(2024, 3, 3, 0, 0, 0),
+        ):
+            db_session.add(CommunicationSuntech(device_id="DAY1", received_at=received))
+        await db_session.commit()
+
+        result = await get_communications(
+            db_session, ["DAY1"], received_at=date(2024, 3, 2)
+        )
+
+        assert [c.received_at for c in result] == [
+            datetime(2024, 3, 2, 23, 59, 59),
+            datetime(2024, 3, 2, 0, 0, 0),
+        ]
+
     @pytest.mark.asyncio
     async def test_get_communications_with_single_device(
         self, db_session: AsyncSession, sample_suntech_communication
@@ -121,18 +188,275 @@ class TestGetCommunications:
         self, db_session: AsyncSession, sample_suntech_communication
     ):
         """
-        Test: Función retorna objetos SQLAlchemy correctos.
+        Test: Función retorna filas con solo las columnas del schema.
         """
-        from app.models.communications import CommunicationSuntech
-
         device_ids = ["867564050638581"]
         result = await get_communications(db_session, device_ids)
 
         assert len(result) == 1
-        assert isinstance(result[0], CommunicationSuntech)
+        assert not isinstance(result[0], CommunicationSuntech)
 
         # Verificar que tiene los atributos esperados
         assert hasattr(result[0], "id")
         assert hasattr(result[0], "device_id")
         assert hasattr(result[0], "latitude")
         assert hasattr(result[0], "longitude")
+
+        # Las columnas que CommunicationResponse no expone no se leen
+        assert not hasattr(result[0], "raw_message")
+        assert not hasattr(result[0], "client_ip")
+
+    @pytest.mark.asyncio
+    async def test_get_communications_full_schema_columns(
+        self, db_session: AsyncSession, sample_suntech_communication
+    ):
+        """
+        Test: Con CommunicationFullResponse se leen todos los campos del schema.
+        """
+        result = await get_communications(
+            db_session, ["867564050638581"], schema=CommunicationFullResponse
+        )
+
+        assert result
+        assert all(hasattr(r, "raw_message") for r in result)
+        assert all(hasattr(r, "client_ip") for r in result)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestStreamCommunications:
+    """Tests para la función stream_communications (cursor del servidor)."""
+
+    @pytest.mark.asyncio
+    async def test_stream_communications_empty_database(self, db_session: AsyncSession):
+        """
+        Test: El stream no produce filas si no hay datos.
+        """
+        result = [c async for c in stream_communications(db_session, ["NONEXISTENT"])]
+
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_stream_communications_yields_both_tables(
+        self,
+        db_session: AsyncSession,
+        sample_suntech_communication,
+        sample_queclink_communication,
+    ):
+        """
+        Test: El stream recorre las tablas Suntech y Queclink.
+        """
+        device_ids = ["867564050638581", "QUECLINK123"]
+        result = [c async for c in stream_communications(db_session, device_ids)]
+
+        device_id_set = {comm.device_id for comm in result}
+        assert device_id_set == {"867564050638581", "QUECLINK123"}
+
+
+@pytest.mark.unit
+class TestMergeHistoryStreams:
+    """Tests para la mezcla k-way de streams ordenados."""
+
+    def test_merge_keeps_descending_order(self):
+        async def stream(keys, source):
+            for key in keys:
+                yield (key, source, f"{source}-{key}")
+
+        async def run_test():
+            merged = _merge_history_streams(
+                [stream([9, 5, 1], "suntech"), stream([8, 7, 2], "queclink")]
+            )
+            return [item[0] async for item in merged]
+
+        assert asyncio.run(run_test()) == [9, 8, 7, 5, 2, 1]
+
+    def test_merge_with_empty_stream(self):
+        async def stream(keys):
+            for key in keys:
+                yield (key, "suntech", key)
+
+        async def run_test():
+            merged = _merge_history_streams([stream([]), stream([3, 1])])
+            return [item[0] async for item in merged]
+
+        assert asyncio.run(run_test()) == [3, 1]
+
+
+@pytest.mark.unit
+class TestReceivedRange:
+    """Tests para la traducción de filtros de fecha a rangos [inicio, fin)."""
+
+    def test_date_becomes_half_open_day(self):
+        """
+        Test: Una fecha se traduce al rango del día completo.
+        """
+        start, end = received_range(date(2024, 12, 14))
+
+        assert start == datetime(2024, 12, 14)
+        assert end == datetime(2024, 12, 15)
+
+    def test_no_filters_is_unbounded(self):
+        """
+        Test: Sin filtros el rango no tiene límites.
+        """
+        assert received_range() == (None, None)
+
+    def test_aware_datetimes_are_normalized_to_utc(self):
+        """
+        Test: from/to con zona horaria se convierten a UTC sin zona.
+        """
+        tz = timezone(timedelta(hours=-6))
+        start, end = received_range(
+            from_dt=datetime(2024, 12, 14, 6, 0, tzinfo=tz),
+            to_dt=datetime(2024, 12, 14, 12, 0, tzinfo=UTC),
+        )
+
+        assert start == datetime(2024, 12, 14, 12, 0)
+        assert end == datetime(2024, 12, 14, 12, 0)
+
+    def test_date_and_window_are_intersected(self):
+        """
+        Test: Fecha y from/to combinados usan la intersección de ambos rangos.
+        """
+        start, end = received_range(
+            date(2024, 12, 14),
+            from_dt=datetime(2024, 12, 13, 20, 0),
+            to_dt=datetime(2024, 12, 14, 8, 0),
+        )
+
+        assert start == datetime(2024, 12, 14)
+        assert end == datetime(2024, 12, 14, 8, 0)
+
+
+@pytest.mark.unit
+class TestHistoryCursor:
+    """Tests para el cursor opaco del histórico."""
+
+    def test_cursor_roundtrip(self):
+        """
+        Test: El cursor codificado se decodifica a los mismos valores.
+        """
+        received_at = datetime(2024, 1, 15, 10, 30, 1)
+        cursor = encode_history_cursor(received_at, "queclink", 42)
+
+        assert decode_history_cursor(cursor) == (received_at, "queclink", 42)
+
+    def test_cursor_invalid_raises(self):
+        """
+        Test: Un cursor mal formado lanza ValueError.
+        """
+        with pytest.raises(ValueError):
+            decode_history_cursor("no-es-un-cursor")
+
+    def test_cursor_unknown_source_raises(self):
+        """
+        Test: Un cursor con tabla de origen desconocida lanza ValueError.
+        """
+        cursor = encode_history_cursor(datetime(2024, 1, 15), "otra", 1)
+
+        with pytest.raises(ValueError):
+            decode_history_cursor(cursor)
+
+
+@pytest.mark.unit
+@pytest.mark.database
+class TestGetCommunicationsPage:
+    """Tests para la paginación keyset del histórico."""
+
+    @pytest.mark.asyncio
+    async def test_pages_cover_history_in_order(self, db_session: AsyncSession):
+        """
+        Test: Recorrer todas las páginas devuelve cada registro una sola vez
+        en orden descendente, incluso con received_at repetidos entre tablas.
+        """
+        for second in (0, 0, 1, 2, 2, 2):
+            for model in (CommunicationSuntech, CommunicationQueclink):
+                db_session.add(
+                    model(
+                        device_id="PAGED1",
+                        engine_status=model.__tablename__[-8:],
+                        received_at=datetime(2024, 2, 1, 8, 0, second),
+                    )
+                )
+        await db_session.commit()
+
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = await get_communications_page(
+                db_session, ["PAGED1"], limit=5, cursor=cursor
+            )
+            assert len(page) <= 5
+            seen.extend((c.received_at, c.engine_status, c.id) for c in page)
+            if cursor is None:
+                break
+
+        assert len(seen) == 12
+        assert len(set(seen)) == 12
+        received = [ra for ra, _, _ in seen]
+        assert received == sorted(received, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_multiple_devices_match_history(self, db_session: AsyncSession):
+        """
+        Test: Con varios dispositivos (una página por dispositivo unida con
+        LATERAL) las páginas recorren el mismo histórico que get_communications.
+        """
+        for index, second in enumerate((0, 0, 1, 2, 2, 3, 3, 3, 4)):
+            for model in (CommunicationSuntech, CommunicationQueclink):
+                db_session.add(
+                    model(
+                        device_id=("MULTI1", "MULTI2", "MULTI3")[index % 3],
+                        received_at=datetime(2024, 2, 1, 8, 0, second),
+                    )
+                )
+        await db_session.commit()
+        device_ids = ["MULTI1", "MULTI2", "MULTI3"]
+        history = await get_communications(db_session, device_ids)
+
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = await get_communications_page(
+                db_session, device_ids, limit=4, cursor=cursor
+            )
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        assert [(c.device_id, c.id) for c in seen] == [
+            (c.device_id, c.id) for c in history
+        ]
+
+    @pytest.mark.asyncio
+    async def test_repeated_device_ids_are_not_duplicated(
+        self, db_session: AsyncSession
+    ):
+        """
+        Test: Un dispositivo repetido en device_ids no repite sus registros.
+        """
+        for second in range(3):
+            for device_id in ("REPEAT1", "REPEAT2"):
+                db_session.add(
+                    CommunicationSuntech(
+                        device_id=device_id,
+                        received_at=datetime(2024, 2, 2, 8, 0, second),
+                    )
+                )
+        await db_session.commit()
+
+        for device_ids in (["REPEAT1", "REPEAT1"], ["REPEAT1", "REPEAT2", "REPEAT1"]):
+            history = await get_communications(db_session, device_ids)
+            page, _ = await get_communications_page(db_session, device_ids, limit=3)
+
+            assert [(c.device_id, c.id) for c in page] == [
+                (c.device_id, c.id) for c in history[:3]
+            ]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cursor_raises(self, db_session: AsyncSession):
+        """
+        Test: Un cursor inválido lanza ValueError.
+        """
+        with pytest.raises(ValueError):
+            await get_communications_page(db_session, ["PAGED1"], cursor="xx")
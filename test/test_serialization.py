@@ -0,0 +1,98 @@
+"""Tests unitarios para la serialización rápida del histórico."""
+
+import asyncio
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy.engine.result import result_tuple
+
+from app.schemas.communications import (
+    CommunicationFullResponse,
+    CommunicationResponse,
+    CommunicationsPageResponse,
+)
+from app.services.serialization import dump_page, dump_row, dump_rows, dump_rows_stream
+
+
+def _row(comm_id: int, **fields):
+    values = {
+        "id": comm_id,
+        "device_id": "867564050638581",
+        "latitude": Decimal("19.43260000"),
+        "longitude": Decimal("-99.13320000"),
+        "speed": Decimal("45.50"),
+        "odometer": 150000,
+        "gps_datetime": datetime(2024, 1, 15, 10, 30, 0, 123456),
+        "received_at": datetime(2024, 1, 15, 10, 30, 5),
+        "raw_message": "STT;867564050638581;...",
+    }
+    values.update(fields)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.unit
+class TestFastSerialization:
+    """La salida debe ser idéntica a la serialización de Pydantic."""
+
+    @pytest.mark.parametrize(
+        "schema", [CommunicationResponse, CommunicationFullResponse]
+    )
+    def test_rows_match_pydantic(self, schema):
+        rows = [_row(1), _row(2, latitude=None, alert_type="SPEED")]
+
+        expected = TypeAdapter(list[schema]).dump_json(
+            [schema.model_validate(r) for r in rows]
+        )
+
+        assert dump_rows(rows, schema) == expected
+
+    def test_row_matches_pydantic(self):
+        row = _row(1)
+
+        expected = CommunicationResponse.model_validate(row).model_dump_json()
+
+        assert dump_row(row, CommunicationResponse) == expected.encode()
+
+    def test_page_matches_pydantic(self):
+        rows = [_row(1)]
+
+        expected = CommunicationsPageResponse(
+            data=rows, next_cursor="abc"
+        ).model_dump_json()
+
+        assert dump_page(rows, "abc", CommunicationResponse) == expected.encode()
+
+    def test_only_schema_fields(self):
+        data = json.loads(dump_row(_row(1), CommunicationResponse))
+
+        assert "raw_message" not in data
+        assert "received_at" not in data
+        assert data["alert_type"] is None
+
+    def test_sqlalchemy_rows_with_missing_columns(self):
+        make_row = result_tuple(["id", "device_id", "latitude", "received_at"])
+        row = make_row((7, "867564050638581", Decimal("19.43260000"), None))
+
+        data = json.loads(dump_row(row, CommunicationResponse))
+
+        assert data["id"] == 7
+        assert data["latitude"] == "19.43260000"
+        assert data["alert_type"] is None
+
+    @pytest.mark.parametrize(("count", "batch_size"), [(0, 2), (1, 2), (5, 2), (4, 2)])
+    def test_stream_matches_dump_rows(self, count, batch_size):
+        rows = [_row(i) for i in range(count)]
+
+        async def collect():
+            async def iterate():
+                for row in rows:
+                    yield row
+
+            chunks = dump_rows_stream(iterate(), CommunicationResponse, batch_size)
+            return b"".join([chunk async for chunk in chunks])
+
+        assert asyncio.run(collect()) == dump_rows(rows, CommunicationResponse)
@@ -0,0 +1,159 @@
+"""Tests unitarios para la agrupación de consultas concurrentes idénticas."""
+
+import asyncio
+from datetime import date, datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services import events_repository, repository
+from app.utils.cache import SingleFlight
+
+UNIT_A = UUID("123e4567-e89b-12d3-a456-426614174000")
+UNIT_B = UUID("223e4567-e89b-12d3-a456-426614174001")
+
+# Sesión sin engine: las consultas de prueba no llegan a la base de datos
+SESSION = AsyncSession()
+
+
+def _counting(calls: list, result=None, delay: float = 0.01):
+    async def fn(*args, **_kwargs):
+        calls.append(args)
+        await asyncio.sleep(delay)
+        return result if result is not None else [len(calls)]
+
+    return fn
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Valida que las llamadas en curso se compartan y se liberen."""
+
+    def test_concurrent_calls_share_execution(self):
+        flight = SingleFlight()
+        calls = []
+        fn = _counting(calls)
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("a", fn, 1), flight.do("a", fn, 1), flight.do("b", fn, 2)
+            )
+
+        first, second, other = asyncio.run(run())
+
+        assert first is second
+        assert other is not first
+        assert len(calls) == 2
+        assert len(flight) == 0
+
+    def test_sequential_calls_run_again(self):
+        flight = SingleFlight()
+        calls = []
+        fn = _counting(calls)
+
+        async def run():
+            await flight.do("a", fn)
+            await flight.do("a", fn)
+
+        asyncio.run(run())
+
+        assert len(calls) == 2
+
+    def test_error_is_shared_and_released(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("a", failing), flight.do("a", failing), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert calls == [1]
+        assert len(flight) == 0
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        flight = SingleFlight()
+        fn = _counting([], result=["ok"], delay=0.05)
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("a", fn))
+            follower = asyncio.ensure_future(flight.do("a", fn))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == ["ok"]
+
+
+@pytest.mark.unit
+class TestRepositoryCoalescing:
+    """Las consultas del repositorio con argumentos equivalentes se agrupan."""
+
+    def test_get_communications(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(repository, "_get_communications", _counting(calls))
+
+        async def run():
+            return await asyncio.gather(
+                repository.get_communications(
+                    SESSION, ["A", "B"], received_at=date(2024, 1, 1)
+                ),
+                repository.get_communications(
+                    SESSION,
+                    ["B", "A", "A"],
+                    from_dt=datetime(2024, 1, 1),
+                    to_dt=datetime(2024, 1, 2),
+                ),
+                repository.get_communications(
+                    SESSION, ["A"], received_at=date(2024, 1, 1)
+                ),
+            )
+
+        asyncio.run(run())
+
+        assert len(calls) == 2
+
+    def test_get_events(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            events_repository, "_get_events", _counting(calls, result=([], None))
+        )
+        window = (datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+        async def run():
+            return await asyncio.gather(
+                events_repository.get_events(SESSION, [UNIT_A, UNIT_B], *window),
+                events_repository.get_events(SESSION, [UNIT_B, UNIT_A], *window),
+                events_repository.get_events(
+                    SESSION, [UNIT_A, UNIT_B], *window, order="asc"
+                ),
+            )
+
+        asyncio.run(run())
+
+        assert len(calls) == 2
+
+    def test_shared_work_runs_on_its_own_session(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(repository, "_get_communications", _counting(calls))
+
+        async def run():
+            return await asyncio.gather(
+                repository.get_communications(SESSION, ["A"]),
+                repository.get_communications(SESSION, ["A"]),
+            )
+
+        asyncio.run(run())
+
+        ((session, *_),) = calls
+        assert isinstance(session, AsyncSession)
+        assert session is not SESSION
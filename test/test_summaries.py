@@ -0,0 +1,153 @@
+"""Tests unitarios para los resúmenes diarios por dispositivo."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import summaries
+from app.services.summaries import _day_window, get_daily_summaries, summary_to_dict
+
+
+def _summary(**overrides) -> SimpleNamespace:
+    values = {
+        "device_id": "S1",
+        "day": date(2024, 1, 1),
+        "points": 10,
+        "odometer_start": 1000,
+        "odometer_end": 1900,
+        "idle_time_start": 50,
+        "idle_time_end": 170,
+        "max_speed": Decimal("80.00"),
+        "speed_sum": Decimal("400.00"),
+        "speed_count": 9,
+        "engine_on_seconds": 480,
+        "first_received_at": datetime(2024, 1, 1, 8, 0),
+        "last_received_at": datetime(2024, 1, 1, 8, 9),
+        "closed": True,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.unit
+class TestSummaryToDict:
+    """Valida las métricas derivadas de los agregados guardados."""
+
+    def test_derived_metrics(self):
+        result = summary_to_dict(_summary())
+
+        assert result["distance"] == 900
+        assert result["idle_seconds"] == 120
+        assert result["avg_speed"] == Decimal("44.44")
+        assert result["engine_on_seconds"] == 480
+
+    def test_missing_counters(self):
+        result = summary_to_dict(
+            _summary(odometer_start=None, odometer_end=None, speed_count=0)
+        )
+
+        assert result["distance"] is None
+        assert result["avg_speed"] is None
+
+
+@pytest.mark.unit
+class TestDayWindow:
+    """La ventana solo cubre lo que aún no está agregado."""
+
+    def test_new_day_covers_whole_day(self):
+        _, since, until = _day_window("S1", date(2024, 1, 1), None)
+
+        assert since < datetime(2024, 1, 1) < until
+        assert until == datetime(2024, 1, 2)
+
+    def test_stored_day_starts_after_last_point(self):
+        stored = _summary()
+
+        _, since, _ = _day_window("S1", date(2024, 1, 1), stored)
+
+        assert since == stored.last_received_at
+
+
+@pytest.mark.unit
+class TestGetDailySummaries:
+    """Solo se recalculan los días que no están cerrados."""
+
+    def test_closed_days_are_not_refreshed(self, monkeypatch):
+        stored = {
+            ("S1", date(2024, 1, 1)): _summary(),
+            ("S1", date(2024, 1, 2)): _summary(day=date(2024, 1, 2), points=0),
+        }
+        refreshed = []
+
+        async def fake_load(*_args):
+            return stored
+
+        async def fake_refresh(_session, pending, *_args):
+            refreshed.extend(pending)
+
+        monkeypatch.setattr(summaries, "_load_summaries", fake_load)
+        monkeypatch.setattr(summaries, "_refresh_summaries", fake_refresh)
+
+        result = asyncio.run(
+            get_daily_summaries(None, ["S1"], date(2024, 1, 1), date(2024, 1, 3))
+        )
+
+        # Los días vacíos no se devuelven
+        assert [s.day for s in result] == [date(2024, 1, 1)]
+        assert refreshed == [("S1", date(2024, 1, 3))]
+
+    def test_future_days_are_ignored(self, monkeypatch):
+        refreshed = []
+
+        async def fake_load(*_args):
+            return {}
+
+        async def fake_refresh(_session, pending, *_args):
+            refreshed.extend(pending)
+
+        monkeypatch.setattr(summaries, "_load_summaries", fake_load)
+        monkeypatch.setattr(summaries, "_refresh_summaries", fake_refresh)
+
+        today = datetime.now().date()
+        asyncio.run(get_daily_summaries(None, ["S1"], today, today + timedelta(days=5)))
+
+        assert max(day for _, day in refreshed) <= today + timedelta(days=1)
+
+
+@pytest.mark.unit
+class TestRefreshSummaries:
+    """Un día se cierra solo después del periodo de gracia."""
+
+    def _closed_flags(self, monkeypatch) -> dict:
+        merged = []
+
+        class FakeSession:
+            async def execute(self, statement):
+                return SimpleNamespace(mappings=list)
+
+            async def commit(self):
+                pass
+
+        monkeypatch.setattr(summaries, "_partial_aggregates_query", lambda w: w)
+        monkeypatch.setattr(summaries, "_merge_statement", merged.extend)
+
+        today = datetime.now().date() + timedelta(days=1)
+        pending = [("S1", date(2024, 1, 1)), ("S1", today)]
+        asyncio.run(summaries._refresh_summaries(FakeSession(), pending, {}))
+        return {row["day"]: row["closed"] for row in merged}
+
+    def test_past_day_is_closed(self, monkeypatch):
+        closed = self._closed_flags(monkeypatch)
+
+        assert closed[date(2024, 1, 1)]
+        assert not any(closed[day] for day in closed if day != date(2024, 1, 1))
+
+    def test_day_within_grace_stays_open(self, monkeypatch):
+        monkeypatch.setattr(
+            summaries.settings, "HISTORY_CLOSED_GRACE_SECS", 10 * 365 * 86400
+        )
+
+        assert not any(self._closed_flags(monkeypatch).values())
@@ -0,0 +1,110 @@
+"""Tests unitarios para la simplificación de trayectorias del histórico."""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services.track_simplification import (
+    bucket_mask,
+    douglas_peucker_mask,
+    simplify_track,
+)
+
+
+def _point(minute: int, latitude, longitude):
+    return SimpleNamespace(
+        latitude=latitude,
+        longitude=longitude,
+        received_at=datetime(2024, 1, 15, 10, 0) - timedelta(minutes=minute),
+    )
+
+
+@pytest.mark.unit
+class TestDouglasPeucker:
+    """Valida la reducción de puntos conservando la forma."""
+
+    def test_straight_line_keeps_endpoints(self):
+        x = np.arange(10, dtype=float) * 100
+        y = np.zeros(10)
+
+        keep = douglas_peucker_mask(x, y, tolerance=1.0)
+
+        assert np.flatnonzero(keep).tolist() == [0, 9]
+
+    def test_keeps_corner(self):
+        x = np.array([0.0, 50.0, 100.0, 100.0, 100.0])
+        y = np.array([0.0, 0.0, 0.0, 50.0, 100.0])
+
+        keep = douglas_peucker_mask(x, y, tolerance=1.0)
+
+        assert np.flatnonzero(keep).tolist() == [0, 2, 4]
+
+    def test_empty(self):
+        assert douglas_peucker_mask(np.array([]), np.array([]), 1.0).size == 0
+
+
+@pytest.mark.unit
+class TestBucketMask:
+    """Valida el muestreo de un punto por ventana de tiempo."""
+
+    def test_first_point_per_bucket(self):
+        epochs = np.array([599, 420, 300, 299, 10])
+
+        keep = bucket_mask(epochs, 300)
+
+        assert np.flatnonzero(keep).tolist() == [0, 3]
+
+
+@pytest.mark.unit
+class TestSimplifyTrack:
+    """Valida la simplificación sobre filas del histórico."""
+
+    def test_without_parameters_returns_all_rows(self):
+        rows = [_point(i, None, None) for i in range(3)]
+
+        assert simplify_track(rows) == rows
+
+    def test_tolerance_drops_collinear_points(self):
+        rows = [
+            _point(i, Decimal("19.4326") + Decimal(i) / 10000, Decimal("-99.1332"))
+            for i in range(20)
+        ]
+
+        result = simplify_track(rows, tolerance_m=5)
+
+        assert result == [rows[0], rows[-1]]
+
+    def test_tolerance_keeps_turn(self):
+        rows = [
+            _point(
+                i,
+                Decimal("19.4326") + Decimal(min(i, 10)) / 1000,
+                Decimal("-99.1332") + Decimal(max(i - 10, 0)) / 1000,
+            )
+            for i in range(21)
+        ]
+
+        result = simplify_track(rows, tolerance_m=5)
+
+        assert result == [rows[0], rows[10], rows[20]]
+
+    def test_bucket_keeps_order_and_most_recent(self):
+        rows = [_point(i, Decimal("19.4"), Decimal("-99.1")) for i in range(10)]
+
+        result = simplify_track(rows, bucket_seconds=300)
+
+        assert result == [rows[0], rows[1], rows[6]]
+
+    def test_rows_without_coordinates_are_dropped(self):
+        rows = [
+            _point(0, Decimal("19.4"), Decimal("-99.1")),
+            _point(1, None, None),
+            _point(2, Decimal("19.5"), Decimal("-99.1")),
+        ]
+
+        result = simplify_track(rows, tolerance_m=1)
+
+        assert result == [rows[0], rows[2]]
@@ -0,0 +1,189 @@
+"""Tests unitarios para la segmentación de viajes y paradas."""
+
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import trips
+from app.services.trips import build_trips, get_device_trips, segment_track
+from app.utils.cache import LRUCache
+
+
+def _day_rows() -> list:
+    """
+    Un día simulado con puntos cada 30 s:
+    0-9 estacionado, 10-29 manejando, 30-31 semáforo, 32-44 manejando,
+    45-59 estacionado (motor apagado desde el 50).
+    """
+    rows = []
+    latitude = Decimal("19.40000000")
+    for i in range(60):
+        driving = 10 <= i < 30 or 32 <= i < 45
+        if driving:
+            latitude += Decimal("0.00100000")
+        rows.append(
+            SimpleNamespace(
+                latitude=latitude,
+                longitude=Decimal("-99.10000000"),
+                speed=Decimal(40 if driving else 0),
+                engine_status="ON" if 5 <= i < 50 else "OFF",
+                received_at=datetime(2024, 1, 1, 8, 0) + timedelta(seconds=30 * i),
+            )
+        )
+    # El histórico llega en orden descendente
+    return rows[::-1]
+
+
+@pytest.mark.unit
+class TestSegmentTrack:
+    """Valida la detección de corridas y la unión de paradas cortas."""
+
+    def test_single_trip_between_stops(self):
+        epochs = np.arange(6) * 60
+        speeds = np.array([0.0, 0.0, 50.0, 50.0, 0.0, 0.0])
+
+        segments = segment_track(
+            epochs,
+            np.array([19.0, 19.0, 19.01, 19.02, 19.02, 19.02]),
+            np.full(6, -99.0),
+            speeds,
+            np.ones(6, dtype=bool),
+            min_speed_kmh=5,
+            min_stop_seconds=180,
+        )
+
+        assert [s["kind"] for s in segments] == ["stop", "trip", "stop"]
+        # El viaje empieza en el último punto detenido
+        assert [(s["start"], s["end"]) for s in segments] == [(0, 1), (1, 4), (4, 5)]
+        assert segments[0]["distance_m"] == 0.0
+        assert segments[1]["distance_m"] == pytest.approx(2223.9, abs=1)
+
+    def test_engine_off_is_not_moving(self):
+        segments = segment_track(
+            np.arange(3) * 60,
+            np.array([19.0, 19.01, 19.02]),
+            np.full(3, -99.0),
+            np.full(3, 50.0),
+            np.zeros(3, dtype=bool),
+            min_speed_kmh=5,
+            min_stop_seconds=180,
+        )
+
+        assert [s["kind"] for s in segments] == ["stop"]
+
+    def test_empty_track(self):
+        empty = np.array([])
+        assert segment_track(empty, empty, empty, empty, empty, 5, 180) == []
+
+
+@pytest.mark.unit
+class TestBuildTrips:
+    """Valida el resultado completo de un día."""
+
+    def test_short_stop_is_merged_into_trip(self):
+        result = build_trips("T1", date(2024, 1, 1), _day_rows())
+
+        assert result["trips"] == 1
+        assert result["stops"] == 2
+        trip = result["segments"][1]
+        assert trip["kind"] == "trip"
+        assert trip["start_time"] == datetime(2024, 1, 1, 8, 4, 30)
+        assert trip["end_time"] == datetime(2024, 1, 1, 8, 22, 30)
+        assert trip["max_speed"] == 40.0
+
+    def test_segments_cover_whole_day(self):
+        result = build_trips("T1", date(2024, 1, 1), _day_rows())
+        segments = result["segments"]
+
+        assert segments[0]["start_time"] == datetime(2024, 1, 1, 8, 0)
+        assert segments[-1]["end_time"] == datetime(2024, 1, 1, 8, 29, 30)
+        assert all(
+            a["end_time"] == b["start_time"] for a, b in zip(segments, segments[1:])
+        )
+        assert result["total_distance_m"] == pytest.approx(33 * 111.2, rel=0.01)
+
+    def test_rows_without_coordinates_are_ignored(self):
+        rows = _day_rows()
+        rows.append(
+            SimpleNamespace(
+                latitude=None,
+                longitude=None,
+                speed=None,
+                engine_status=None,
+                received_at=datetime(2024, 1, 1, 7, 0),
+            )
+        )
+
+        result = build_trips("T1", date(2024, 1, 1), rows)
+
+        assert result["segments"][0]["start_time"] == datetime(2024, 1, 1, 8, 0)
+
+
+@pytest.mark.unit
+class TestTripsCache:
+    """Los días cerrados se calculan una sola vez."""
+
+    def test_closed_day_is_cached(self, monkeypatch):
+        calls = []
+
+        async def fake_get_communications(session, device_ids, **kwargs):
+            calls.append(kwargs["received_at"])
+            return _day_rows()
+
+        monkeypatch.setattr(trips, "get_communications", fake_get_communications)
+        monkeypatch.setattr(trips, "trips_cache", LRUCache(10))
+
+        async def run_test():
+            first = await get_device_trips(None, "T1", date(2024, 1, 1))
+            second = await get_device_trips(None, "T1", date(2024, 1, 1))
+            return first, second
+
+        first, second = asyncio.run(run_test())
+
+        assert first is second
+        assert calls == [date(2024, 1, 1)]
+
+    def test_day_within_grace_is_not_cached(self, monkeypatch):
+        calls = []
+
+        async def fake_get_communications(session, device_ids, **kwargs):
+            calls.append(kwargs["received_at"])
+            return _day_rows()
+
+        monkeypatch.setattr(trips, "get_communications", fake_get_communications)
+        monkeypatch.setattr(trips, "trips_cache", LRUCache(10))
+        # Con un periodo de gracia largo el día aún recibe comunicaciones
+        monkeypatch.setattr(
+            trips.settings, "HISTORY_CLOSED_GRACE_SECS", 10 * 365 * 86400
+        )
+
+        async def run_test():
+            await get_device_trips(None, "T1", date(2024, 1, 1))
+            await get_device_trips(None, "T1", date(2024, 1, 1))
+
+        asyncio.run(run_test())
+
+        assert len(calls) == 2
+
+    def test_today_is_not_cached(self, monkeypatch):
+        calls = []
+
+        async def fake_get_communications(session, device_ids, **kwargs):
+            calls.append(kwargs["received_at"])
+            return []
+
+        monkeypatch.setattr(trips, "get_communications", fake_get_communications)
+        monkeypatch.setattr(trips, "trips_cache", LRUCache(10))
+
+        async def run_test():
+            open_day = datetime.now().date() + timedelta(days=1)
+            await get_device_trips(None, "T1", open_day)
+            await get_device_trips(None, "T1", open_day)
+
+        asyncio.run(run_test())
+
+        assert len(calls) == 2